@@ -0,0 +1,170 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from graphql import (
+    GraphQLError,
+    ValidationRule,
+    FieldNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    get_named_type,
+)
+from strawberry.extensions import AddValidationRules
+
+from domain.exceptions.custom_exceptions import (
+    PersistedQueryNotFoundError,
+    PersistedQueryMismatchError,
+)
+from config.settings import get_settings
+
+
+# --- Query complexity ---
+# Every field costs 1. List fields multiply the cost of their children by the
+# requested page size (limit / pageSize / maxItems / first, or the arg default).
+
+LIST_SIZE_ARGS = ("limit", "pageSize", "maxItems", "first")
+
+
+def _list_size(node: FieldNode, field_def: Any) -> int:
+    for arg in node.arguments or ():
+        if arg.name.value in LIST_SIZE_ARGS and isinstance(arg.value, IntValueNode):
+            return max(1, int(arg.value.value))
+    # Not in the query (or passed as a variable) -> fall back to the arg default
+    for name in LIST_SIZE_ARGS:
+        arg_def = field_def.args.get(name)
+        if arg_def is not None and isinstance(arg_def.default_value, int):
+            return max(1, arg_def.default_value)
+    return 1
+
+
+def _selection_cost(
+    context: Any,
+    selection_set: Optional[SelectionSetNode],
+    parent_type: Any,
+    visited_fragments: Set[str]
+) -> int:
+    if selection_set is None or parent_type is None:
+        return 0
+
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            if name.startswith("__"):  # introspection is free
+                continue
+            field_def = getattr(parent_type, "fields", {}).get(name)
+            if field_def is None:  # unknown field - FieldsOnCorrectType reports it
+                continue
+            child_cost = _selection_cost(
+                context,
+                selection.selection_set,
+                get_named_type(field_def.type),
+                visited_fragments
+            )
+            cost += 1 + _list_size(selection, field_def) * child_cost
+
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            fragment = context.get_fragment(name)
+            if fragment is None or name in visited_fragments:
+                continue
+            cost += _selection_cost(
+                context,
+                fragment.selection_set,
+                context.schema.get_type(fragment.type_condition.name.value),
+                visited_fragments | {name}
+            )
+
+        elif isinstance(selection, InlineFragmentNode):
+            fragment_type = parent_type
+            if selection.type_condition is not None:
+                fragment_type = context.schema.get_type(selection.type_condition.name.value)
+            cost += _selection_cost(context, selection.selection_set, fragment_type, visited_fragments)
+
+    return cost
+
+
+def create_complexity_rule(max_complexity: int):
+    """Build a validation rule that rejects operations costing more than max_complexity"""
+
+    class QueryComplexityRule(ValidationRule):
+        def enter_operation_definition(self, node: OperationDefinitionNode, *_args):
+            root_type = self.context.schema.get_root_type(node.operation)
+            cost = _selection_cost(self.context, node.selection_set, root_type, set())
+            if cost > max_complexity:
+                operation_name = node.name.value if node.name else "anonymous"
+                self.report_error(GraphQLError(
+                    f"'{operation_name}' exceeds maximum operation complexity of "
+                    f"{max_complexity} (cost {cost})",
+                    node
+                ))
+
+    return QueryComplexityRule
+
+
+class QueryComplexityLimiter(AddValidationRules):
+    """
+    Reject expensive operations during validation (before any resolver runs)
+
+    >>> schema = strawberry.Schema(Query, extensions=[QueryComplexityLimiter(max_complexity=5000)])
+    """
+
+    def __init__(self, max_complexity: int):
+        super().__init__([create_complexity_rule(max_complexity)])
+
+
+# --- Automatic persisted queries ---
+
+class PersistedQueryStore:
+    """
+    Automatic persisted queries (Apollo APQ protocol)
+    Clients send extensions.persistedQuery.sha256Hash instead of the full document;
+    the first time they get PersistedQueryNotFound and resend hash + query.
+    Bounded LRU of sha256 -> query text.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._queries: "OrderedDict[str, str]" = OrderedDict()
+
+    def resolve(self, query: Optional[str], extensions: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Return the query text to execute
+        Raises: PersistedQueryNotFoundError, PersistedQueryMismatchError
+        """
+        persisted = (extensions or {}).get("persistedQuery")
+        if not persisted:
+            return query
+
+        if not isinstance(persisted, dict):
+            raise PersistedQueryNotFoundError("Unsupported persisted query")
+        sha = persisted.get("sha256Hash")
+        if persisted.get("version", 1) != 1 or not sha:
+            raise PersistedQueryNotFoundError("Unsupported persisted query")
+
+        if query is None:
+            cached = self._queries.get(sha)
+            if cached is None:
+                raise PersistedQueryNotFoundError()
+            self._queries.move_to_end(sha)
+            return cached
+
+        if hashlib.sha256(query.encode("utf-8")).hexdigest() != sha:
+            raise PersistedQueryMismatchError()
+
+        self._queries[sha] = query
+        self._queries.move_to_end(sha)
+        while len(self._queries) > self.maxsize:
+            self._queries.popitem(last=False)
+        return query
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+# Singleton store // shared by HTTP and WebSocket transports
+persisted_queries = PersistedQueryStore(maxsize=get_settings().graphql_persisted_query_cache_size)
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    OperationDefinitionNode,
+    OperationType,
+    StringValueNode,
+    VariableNode,
+    print_ast,
+)
+
+from infrastructure.pubsub.broadcaster import (
+    LIVE_VITALS_FIELDS,
+    VITALS_CHANNEL,
+    patient_channel,
+)
+
+
+# Subscriptions that can skip execution and stream a pre-encoded VitalUpdate payload
+# when they select plain LIVE_VITALS_FIELDS (any subset and order, no aliases/directives/fragments)
+CANONICAL_ROOT_FIELDS = ("liveVitals", "patientVitals")
+
+
+@dataclass(frozen=True)
+class CanonicalSubscription:
+    """A subscription whose result is exactly VitalUpdate.payload_for(fields)"""
+    root_field: str
+    channel: str
+    fields: Tuple[str, ...] = LIVE_VITALS_FIELDS
+
+
+def _plain_field(node: Any) -> bool:
+    return isinstance(node, FieldNode) and node.alias is None and not node.directives
+
+
+def _string_argument(
+    node: FieldNode,
+    name: str,
+    variables: Optional[Dict[str, Any]]
+) -> Optional[str]:
+    for arg in node.arguments:
+        if arg.name.value != name:
+            continue
+        if isinstance(arg.value, StringValueNode):
+            return arg.value.value
+        if isinstance(arg.value, VariableNode):
+            value = (variables or {}).get(arg.value.name.value)
+            return value if isinstance(value, str) else None
+    return None
+
+
+def match_canonical_subscription(
+    document: DocumentNode,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None
+) -> Optional[CanonicalSubscription]:
+    """
+    Return the channel to stream if the document is a canonical live vitals
+    subscription, else None (-> normal execution)
+    subscription { liveVitals { id heartRate oxygenLevel bodyTemperature steps timestamp } }
+    subscription { liveVitals { heartRate oxygenLevel bodyTemperature timestamp } }
+    """
+    if len(document.definitions) != 1:
+        return None
+    operation = document.definitions[0]
+    if not isinstance(operation, OperationDefinitionNode):
+        return None
+    if operation.operation != OperationType.SUBSCRIPTION or operation.directives:
+        return None
+    if operation_name is not None and (operation.name is None or operation.name.value != operation_name):
+        return None
+
+    selections = operation.selection_set.selections
+    if len(selections) != 1 or not _plain_field(selections[0]):
+        return None
+    root = selections[0]
+    root_field = root.name.value
+    if root_field not in CANONICAL_ROOT_FIELDS or root.selection_set is None:
+        return None
+
+    fields = root.selection_set.selections
+    if not all(_plain_field(f) and f.selection_set is None for f in fields):
+        return None
+    names = tuple(f.name.value for f in fields)
+    # Repeated fields merge in GraphQL - leave those (and __typename) to execution
+    if not names or len(set(names)) != len(names) or not set(names) <= set(LIVE_VITALS_FIELDS):
+        return None
+
+    if root_field == "liveVitals":
+        if root.arguments or operation.variable_definitions:
+            return None
+        return CanonicalSubscription(root_field, VITALS_CHANNEL, names)
+
+    if len(root.arguments) != 1:
+        return None
+    # Only a patientId: String! variable - anything else goes through validation
+    if any(print_ast(v.type) != "String!" for v in operation.variable_definitions):
+        return None
+    patient_id = _string_argument(root, "patientId", variables)
+    if patient_id is None:
+        return None
+    return CanonicalSubscription(root_field, patient_channel(patient_id), names)
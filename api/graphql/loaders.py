@@ -0,0 +1,96 @@
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from strawberry.dataloader import DataLoader
+
+from api.graphql.types import VitalType, AlertType
+from domain.models.vital import VitalResponse, AlertResponse
+from domain.services.vital_service import vital_service, alert_service
+
+
+# Per-request DataLoaders for nested PatientType fields.
+# Every patient in a `patients { readings activeAlerts }` query is resolved in one
+# batch instead of one resolver round trip per patient (N+1): active alerts in one
+# $in query, readings from the in-memory rings or one $topN query for the rest
+# (get_recent_readings_for_patients).
+
+def _to_vital_type(v: VitalResponse) -> VitalType:
+    return VitalType(
+        id=v.id or "",
+        patient_id=v.patient_id,
+        heart_rate=v.heart_rate,
+        oxygen_level=v.oxygen_level,
+        body_temperature=v.body_temperature,
+        steps=v.steps,
+        timestamp=v.timestamp
+    )
+
+
+def _to_alert_type(a: AlertResponse) -> AlertType:
+    return AlertType(
+        id=a.id or "",
+        alert_id=a.alert_id,
+        patient_id=a.patient_id,
+        metric=a.metric,
+        type=a.type,
+        value=a.value,
+        threshold=a.threshold,
+        status=a.status,
+        created_at=a.created_at,
+        acknowledged_at=a.acknowledged_at
+    )
+
+
+# Selected fields are part of the keys - they become the Mongo projection
+Fields = Optional[FrozenSet[str]]
+
+
+async def load_readings(keys: List[Tuple[str, int, Fields]]) -> List[List[VitalType]]:
+    """
+    Keys are (patient_id, limit, fields) // one batch per distinct
+    (limit, fields) - usually just one
+    """
+    by_shape: Dict[Tuple[int, Fields], List[str]] = {}
+    for patient_id, limit, fields in keys:
+        by_shape.setdefault((limit, fields), []).append(patient_id)
+
+    results: Dict[Tuple[str, int, Fields], List[VitalType]] = {}
+    for (limit, fields), patient_ids in by_shape.items():
+        grouped = await vital_service.get_recent_readings_for_patients(
+            patient_ids, limit=limit, fields=fields
+        )
+        for patient_id in patient_ids:
+            results[(patient_id, limit, fields)] = [
+                _to_vital_type(v) for v in grouped.get(patient_id, [])
+            ]
+
+    return [results[key] for key in keys]
+
+
+async def load_active_alerts(keys: List[Tuple[str, Fields]]) -> List[List[AlertType]]:
+    """Keys are (patient_id, fields) // one query per distinct fields (usually just one)"""
+    by_fields: Dict[Fields, List[str]] = {}
+    for patient_id, fields in keys:
+        by_fields.setdefault(fields, []).append(patient_id)
+
+    results: Dict[Tuple[str, Fields], List[AlertType]] = {}
+    for fields, patient_ids in by_fields.items():
+        grouped = await alert_service.get_active_alerts_for_patients(patient_ids, fields=fields)
+        for patient_id in patient_ids:
+            results[(patient_id, fields)] = [
+                _to_alert_type(a) for a in grouped.get(patient_id, [])
+            ]
+
+    return [results[key] for key in keys]
+
+
+class Loaders:
+    """Fresh set of loaders per request (caches must not leak between requests)"""
+
+    def __init__(self):
+        self.readings = DataLoader(load_fn=load_readings)
+        self.active_alerts = DataLoader(load_fn=load_active_alerts)
+
+
+async def get_context() -> dict:
+    """GraphQLRouter context_getter // merged with request/response by Strawberry"""
+    return {"loaders": Loaders()}
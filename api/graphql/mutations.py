@@ -1,11 +1,17 @@
 import strawberry
 from datetime import datetime
+from typing import List
 
 from api.graphql.types import (
     ThresholdType, ThresholdInput,
     VitalDataInput, IngestResponse, AckResponse
 )
-from domain.models.vital import VitalDataInput as VitalDataInputModel, ThresholdSettings
+from domain.models.vital import (
+    VitalDataInput as VitalDataInputModel,
+    ThresholdSettings,
+    parse_vital_batch,
+)
+from config.settings import get_settings
 from domain.services.vital_service import vital_service, alert_service
 from domain.exceptions.custom_exceptions import (
     AlertNotFoundError,
@@ -14,6 +20,33 @@ from domain.exceptions.custom_exceptions import (
 from infrastructure.pubsub.broadcaster import broadcast_vital
 
 
+def _to_payload(data: VitalDataInput) -> dict:
+    """GraphQL input -> Node-RED style payload (what VitalDataInputModel expects)"""
+    return {
+        "deviceId": data.device_id,
+        "heartRate": data.heart_rate,
+        "oxygenLevel": data.oxygen_level,
+        "bodyTemperature": data.body_temperature,
+        "steps": data.steps,
+        "timestamp": data.timestamp
+    }
+
+
+async def _broadcast(vital_input: VitalDataInputModel, result: dict):
+    """Broadcast for subscriptions + the SSE patient stream"""
+    await broadcast_vital(
+        patient_id=vital_input.deviceId,
+        heart_rate=vital_input.heartRate,
+        oxygen_level=vital_input.oxygenLevel,
+        body_temperature=vital_input.bodyTemperature,
+        steps=vital_input.steps,
+        timestamp=vital_input.timestamp,
+        patient_status=result["patient_status"],
+        reading_id=result["reading_id"],
+        last_update=result["last_update"]
+    )
+
+
 @strawberry.type
 class Mutation:
     """Root GraphQL mutations"""
@@ -24,28 +57,13 @@ class Mutation:
         Ingest vital data from device/simulation
         Similar to POST /api/patients/data
         """
-        # Convert to domain model
-        vital_input = VitalDataInputModel(
-            deviceId=data.device_id,
-            heartRate=data.heart_rate,
-            oxygenLevel=data.oxygen_level,
-            bodyTemperature=data.body_temperature,
-            steps=data.steps,
-            timestamp=data.timestamp
-        )
+        # Convert to domain model (same validator as REST ingest)
+        vital_input = VitalDataInputModel.model_validate(_to_payload(data))
 
         # Process via service
         result = await vital_service.ingest_vital_data(vital_input)
 
-        # Broadcast for subscriptions
-        await broadcast_vital(
-            patient_id=data.device_id,
-            heart_rate=data.heart_rate,
-            oxygen_level=data.oxygen_level,
-            body_temperature=data.body_temperature,
-            steps=data.steps,
-            timestamp=data.timestamp
-        )
+        await _broadcast(vital_input, result)
 
         return IngestResponse(
             status="ok",
@@ -54,6 +72,34 @@ class Mutation:
             patient_status=result["patient_status"]
         )
 
+    @strawberry.mutation
+    async def ingest_vital_data_batch(self, data: List[VitalDataInput]) -> List[IngestResponse]:
+        """
+        Ingest several readings in one go
+        Similar to POST /api/patients/data/batch
+        """
+        max_batch = get_settings().ingest_max_batch_size
+        if len(data) > max_batch:
+            raise ValueError(f"Batch too large ({len(data)} readings, max {max_batch})")
+
+        # Shared pre-built batch validator
+        readings = parse_vital_batch([_to_payload(d) for d in data])
+
+        results = await vital_service.ingest_vital_batch(readings)
+
+        for vital_input, result in zip(readings, results):
+            await _broadcast(vital_input, result)
+
+        return [
+            IngestResponse(
+                status="ok",
+                message="Vital data ingested",
+                patient_id=r["patient_id"],
+                patient_status=r["patient_status"]
+            )
+            for r in results
+        ]
+
     @strawberry.mutation
     async def acknowledge_alert(self, alert_id: str) -> AckResponse:
         """
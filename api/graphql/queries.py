@@ -1,12 +1,79 @@
 import strawberry
+from bson import ObjectId
+from datetime import datetime
 from typing import List, Optional
 
+from strawberry.types import Info
+
+from api.graphql.selections import (
+    requested_fields, PATIENT_FIELD_SOURCES, VITAL_FIELD_SOURCES, ALERT_FIELD_SOURCES,
+)
 from api.graphql.types import (
     PatientType, VitalType, AlertType,
-    ThresholdType, KPIType, SummaryType
+    ThresholdType, KPIType, SummaryType,
+    PatientChangesType, VitalChangesType, AlertChangesType,
+    PageInfo, PatientEdge, PatientConnection, VitalEdge, VitalConnection,
+    AlertEdge, AlertConnection,
 )
 from domain.services.patient_service import patient_service
 from domain.services.vital_service import vital_service, alert_service, report_service
+from domain.exceptions.custom_exceptions import InvalidCursorError
+from infrastructure.database.cursors import encode_cursor
+
+MAX_CHANGES = 100  # same cap as the REST delta endpoints
+MAX_PAGE_SIZE = 100  # connections: same cap as the REST list endpoints
+
+
+def _to_patient_type(p) -> PatientType:
+    return PatientType(
+        id=p.id or "",
+        name=p.patient_name,
+        patient_id=p.patient_id,
+        status=p.status,
+        heart_rate=p.last_heart_rate,
+        oxygen_level=p.last_oxygen_level,
+        body_temperature=p.last_body_temperature,
+        steps=p.last_steps,
+        last_update=p.last_update
+    )
+
+
+def _to_vital_type(v) -> VitalType:
+    return VitalType(
+        id=v.id or "",
+        patient_id=v.patient_id,
+        heart_rate=v.heart_rate,
+        oxygen_level=v.oxygen_level,
+        body_temperature=v.body_temperature,
+        steps=v.steps,
+        timestamp=v.timestamp
+    )
+
+
+def _to_alert_type(a) -> AlertType:
+    return AlertType(
+        id=a.id or "",
+        alert_id=a.alert_id,
+        patient_id=a.patient_id,
+        metric=a.metric,
+        type=a.type,
+        value=a.value,
+        threshold=a.threshold,
+        status=a.status,
+        created_at=a.created_at,
+        acknowledged_at=a.acknowledged_at
+    )
+
+
+def _page_size(first: int) -> int:
+    return max(1, min(first, MAX_PAGE_SIZE))
+
+
+def _page_info(edges: list, has_more: bool) -> PageInfo:
+    return PageInfo(
+        has_next_page=has_more,
+        end_cursor=edges[-1].cursor if edges else None
+    )
 
 
 @strawberry.type
@@ -16,74 +83,54 @@ class Query:
     @strawberry.field
     async def patients(
         self,
+        info: Info,
         page: int = 1,
         page_size: int = 20
     ) -> List[PatientType]:
         """
         Get all patients with latest metrics
         query { patients { id name heartRate oxygenLevel bodyTemperature } }
+        Only the selected fields are read from Mongo (same for the other list queries)
         """
-        result = await patient_service.get_all_patients(page=page, page_size=page_size)
-
-        return [
-            PatientType(
-                id=p.id or "",
-                name=p.patient_name,
-                patient_id=p.patient_id,
-                status=p.status,
-                heart_rate=p.last_heart_rate,
-                oxygen_level=p.last_oxygen_level,
-                body_temperature=p.last_body_temperature,
-                steps=p.last_steps,
-                last_update=p.last_update
-            )
-            for p in result.items
-        ]
+        result = await patient_service.get_all_patients(
+            page=page,
+            page_size=page_size,
+            include_total=False,
+            fields=requested_fields(info, PATIENT_FIELD_SOURCES)
+        )
+
+        return [_to_patient_type(p) for p in result.items]
 
     @strawberry.field
     async def patient(self, patient_id: str) -> Optional[PatientType]:
         """Get single patient by ID"""
         try:
             p = await patient_service.get_patient_by_id(patient_id)
-            return PatientType(
-                id=p.id or "",
-                name=p.patient_name,
-                patient_id=p.patient_id,
-                status=p.status,
-                heart_rate=p.last_heart_rate,
-                oxygen_level=p.last_oxygen_level,
-                body_temperature=p.last_body_temperature,
-                steps=p.last_steps,
-                last_update=p.last_update
-            )
+            return _to_patient_type(p)
         except Exception:
             return None
 
     @strawberry.field
     async def patient_readings(
         self,
+        info: Info,
         patient_id: str,
         limit: int = 10
     ) -> List[VitalType]:
         """Get recent readings for a patient"""
-        result = await vital_service.get_patient_readings(patient_id, limit=limit)
-
-        return [
-            VitalType(
-                id=v.id or "",
-                patient_id=v.patient_id,
-                heart_rate=v.heart_rate,
-                oxygen_level=v.oxygen_level,
-                body_temperature=v.body_temperature,
-                steps=v.steps,
-                timestamp=v.timestamp
-            )
-            for v in result.items
-        ]
+        result = await vital_service.get_patient_readings(
+            patient_id,
+            limit=limit,
+            include_total=False,
+            fields=requested_fields(info, VITAL_FIELD_SOURCES)
+        )
+
+        return [_to_vital_type(v) for v in result.items]
 
     @strawberry.field
     async def alerts(
         self,
+        info: Info,
         status: Optional[str] = None,
         limit: int = 50
     ) -> List[AlertType]:
@@ -91,24 +138,162 @@ class Query:
         result = await alert_service.get_alerts(
             status_filter=status,
             skip=0,
-            limit=limit
-        )
-
-        return [
-            AlertType(
-                id=a.id or "",
-                alert_id=a.alert_id,
-                patient_id=a.patient_id,
-                metric=a.metric,
-                type=a.type,
-                value=a.value,
-                threshold=a.threshold,
-                status=a.status,
-                created_at=a.created_at,
-                acknowledged_at=a.acknowledged_at
+            limit=limit,
+            include_total=False,
+            fields=requested_fields(info, ALERT_FIELD_SOURCES)
+        )
+
+        return [_to_alert_type(a) for a in result.items]
+
+    @strawberry.field
+    async def patients_connection(
+        self,
+        info: Info,
+        first: int = 20,
+        after: Optional[str] = None
+    ) -> PatientConnection:
+        """
+        Keyset-paged patients // pass pageInfo.endCursor back as after
+        query { patientsConnection(first: 50) { edges { node { patientId } } pageInfo { hasNextPage endCursor } } }
+        """
+        try:
+            result = await patient_service.get_all_patients(
+                page_size=_page_size(first),
+                after=after,
+                include_total=False,
+                fields=requested_fields(info, PATIENT_FIELD_SOURCES, path=("edges", "node"))
             )
+        except InvalidCursorError as e:
+            raise ValueError(e.message)
+        edges = [
+            PatientEdge(node=_to_patient_type(p), cursor=encode_cursor((None, ObjectId(p.id))))
+            for p in result.items
+        ]
+        return PatientConnection(
+            edges=edges,
+            page_info=_page_info(edges, result.has_more),
+            count_total=patient_service.count_patients
+        )
+
+    @strawberry.field
+    async def patient_readings_connection(
+        self,
+        info: Info,
+        patient_id: str,
+        first: int = 10,
+        after: Optional[str] = None
+    ) -> VitalConnection:
+        """Keyset-paged readings for a patient, newest first"""
+        try:
+            result = await vital_service.get_patient_readings(
+                patient_id,
+                limit=_page_size(first),
+                after=after,
+                include_total=False,
+                fields=requested_fields(info, VITAL_FIELD_SOURCES, path=("edges", "node"))
+            )
+        except InvalidCursorError as e:
+            raise ValueError(e.message)
+        edges = [
+            VitalEdge(node=_to_vital_type(v), cursor=encode_cursor((v.timestamp, ObjectId(v.id))))
+            for v in result.items
+        ]
+        return VitalConnection(
+            edges=edges,
+            page_info=_page_info(edges, result.has_more),
+            count_total=lambda: vital_service.count_patient_readings(patient_id)
+        )
+
+    @strawberry.field
+    async def alerts_connection(
+        self,
+        info: Info,
+        status: Optional[str] = None,
+        first: int = 50,
+        after: Optional[str] = None
+    ) -> AlertConnection:
+        """Keyset-paged alerts (ACTIVE unless status is given), newest first"""
+        try:
+            result = await alert_service.get_alerts(
+                status_filter=status,
+                limit=_page_size(first),
+                after=after,
+                include_total=False,
+                fields=requested_fields(info, ALERT_FIELD_SOURCES, path=("edges", "node"))
+            )
+        except InvalidCursorError as e:
+            raise ValueError(e.message)
+        edges = [
+            AlertEdge(node=_to_alert_type(a), cursor=encode_cursor((a.created_at, ObjectId(a.id))))
             for a in result.items
         ]
+        return AlertConnection(
+            edges=edges,
+            page_info=_page_info(edges, result.has_more),
+            count_total=lambda: alert_service.count_alerts(status)
+        )
+
+    @strawberry.field
+    async def patient_changes(
+        self,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: int = MAX_CHANGES
+    ) -> PatientChangesType:
+        """
+        Patients updated since cursor / since (neither = from the beginning)
+        query { patientChanges(cursor: "...") { cursor hasMore items { patientId status } } }
+        """
+        result = await patient_service.get_patients_since(
+            cursor=cursor,
+            since=since,
+            limit=max(1, min(limit, MAX_CHANGES))
+        )
+        return PatientChangesType(
+            items=[_to_patient_type(p) for p in result.items],
+            cursor=result.cursor,
+            has_more=result.has_more
+        )
+
+    @strawberry.field
+    async def patient_reading_changes(
+        self,
+        patient_id: str,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: int = MAX_CHANGES
+    ) -> VitalChangesType:
+        """Readings stored since cursor / since, oldest first"""
+        result = await vital_service.get_patient_readings_since(
+            patient_id,
+            cursor=cursor,
+            since=since,
+            limit=max(1, min(limit, MAX_CHANGES))
+        )
+        return VitalChangesType(
+            items=[_to_vital_type(v) for v in result.items],
+            cursor=result.cursor,
+            has_more=result.has_more
+        )
+
+    @strawberry.field
+    async def alert_changes(
+        self,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: int = MAX_CHANGES
+    ) -> AlertChangesType:
+        """Alerts created or acknowledged since cursor / since, any status"""
+        result = await alert_service.get_alerts_since(
+            cursor=cursor,
+            since=since,
+            limit=max(1, min(limit, MAX_CHANGES))
+        )
+        return AlertChangesType(
+            items=[_to_alert_type(a) for a in result.items],
+            cursor=result.cursor,
+            has_more=result.has_more
+        )
 
     @strawberry.field
     async def thresholds(self) -> ThresholdType:
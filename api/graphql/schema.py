@@ -1,21 +1,216 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
 import strawberry
+from graphql import (
+    ExecutionResult as GraphQLExecutionResult,
+    GraphQLError,
+    GraphQLSyntaxError,
+    subscribe,
+)
+from graphql.validation import specified_rules
+from strawberry.extensions import ParserCache, QueryDepthLimiter, ValidationCache
 from strawberry.fastapi import GraphQLRouter
+from strawberry.fastapi.handlers import GraphQLTransportWSHandler
+from strawberry.http import GraphQLRequestData
+from strawberry.http.exceptions import HTTPException
+from strawberry.subscriptions.protocols.graphql_transport_ws.handlers import Operation
+from strawberry.subscriptions.protocols.graphql_transport_ws.types import (
+    CompleteMessage,
+    ErrorMessage,
+    SubscribeMessage,
+)
+from strawberry.types import ExecutionResult
+from strawberry.types.graphql import OperationType
+
+from api.graphql.queries import Query
+from api.graphql.mutations import Mutation
+from api.graphql.subscriptions import Subscription
+from api.graphql.loaders import get_context
+from api.graphql.extensions import QueryComplexityLimiter, persisted_queries
+from api.graphql.fast_path import CanonicalSubscription, match_canonical_subscription
+from domain.exceptions.custom_exceptions import PersistedQueryError
+from infrastructure.pubsub.broadcaster import broadcaster, VitalUpdate
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Guard rails run as validation rules, so expensive queries are rejected before
+# any resolver touches Mongo. The caches keep parsed + validated documents (LRU)
+# because Node-RED sends the same handful of documents over and over.
+depth_limiter = QueryDepthLimiter(max_depth=settings.graphql_max_depth)
+complexity_limiter = QueryComplexityLimiter(max_complexity=settings.graphql_max_complexity)
+parser_cache = ParserCache(maxsize=settings.graphql_document_cache_size)
+validation_cache = ValidationCache(maxsize=settings.graphql_document_cache_size)
+
+# Same rules for subscriptions (see CachedSchema.subscribe)
+SUBSCRIPTION_RULES = (
+    tuple(specified_rules)
+    + tuple(depth_limiter.validation_rules)
+    + tuple(complexity_limiter.validation_rules)
+)
 
-from api.graphql.queries import Query         
-from api.graphql.mutations import Mutation     
-from api.graphql.subscriptions import Subscription  
+
+class CachedSchema(strawberry.Schema):
+    """
+    Schema.subscribe() skips extensions in this Strawberry version (no cache, no
+    validation at all) - route it through the same caches and limits as queries
+    """
+
+    async def subscribe(
+        self,
+        query: str,
+        variable_values: Optional[Dict[str, Any]] = None,
+        context_value: Optional[Any] = None,
+        root_value: Optional[Any] = None,
+        operation_name: Optional[str] = None,
+    ) -> Union[AsyncIterator[GraphQLExecutionResult], GraphQLExecutionResult]:
+        document = parser_cache.cached_parse_document(query)
+        errors = validation_cache.cached_validate_document(
+            self._schema, document, SUBSCRIPTION_RULES
+        )
+        if errors:
+            return GraphQLExecutionResult(data=None, errors=errors)
+
+        return await subscribe(
+            self._schema,
+            document,
+            root_value=root_value,
+            context_value=context_value,
+            variable_values=variable_values,
+            operation_name=operation_name,
+        )
 
 
 # Create the main GraphQL schema - this is the "brain" of our GraphQL API
 # Combines all three operation types into one schema
-schema = strawberry.Schema(
-    query=Query,         
-    mutation=Mutation,   
-    subscription=Subscription  
+schema = CachedSchema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[
+        depth_limiter,        # limits first so their rules are part of the validation
+        complexity_limiter,
+        parser_cache,
+        validation_cache,
+    ]
 )
 
-graphql_router = GraphQLRouter(
+
+def _persisted_query_error(e: PersistedQueryError) -> GraphQLError:
+    return GraphQLError(e.message, extensions={"code": e.code})
+
+
+class PersistedQueryTransportWSHandler(GraphQLTransportWSHandler):
+    """
+    graphql-transport-ws handler that also understands persisted query hashes
+
+    Canonical live vitals subscriptions (see api/graphql/fast_path.py) skip
+    execution: each frame is the update's pre-serialized payload spliced into a
+    per-operation envelope, so a reading is JSON-encoded once, not once per socket.
+    """
+
+    async def handle_subscribe(self, message: SubscribeMessage) -> None:
+        payload = message.payload
+        try:
+            payload.query = persisted_queries.resolve(payload.query, payload.extensions)
+        except PersistedQueryError as e:
+            await self.send_message(
+                ErrorMessage(id=message.id, payload=[_persisted_query_error(e).formatted])
+            )
+            return
+
+        canonical = None
+        if self.connection_acknowledged and message.id not in self.operations:
+            try:
+                document = parser_cache.cached_parse_document(payload.query)
+            except GraphQLSyntaxError:
+                document = None  # super() closes the socket with the parse error
+            if document is not None:
+                canonical = match_canonical_subscription(
+                    document, payload.variables, payload.operationName
+                )
+
+        if canonical is None:
+            await super().handle_subscribe(message)
+            return
+
+        operation = Operation(self, message.id, OperationType.SUBSCRIPTION)
+        operation.task = asyncio.create_task(self._canonical_operation_task(canonical, operation))
+        self.operations[message.id] = operation
+
+    async def _canonical_operation_task(
+        self,
+        canonical: CanonicalSubscription,
+        operation: Operation
+    ) -> None:
+        """Same lifecycle as operation_task(), but streams payloads verbatim"""
+        prefix = (
+            '{"id":' + json.dumps(operation.id)
+            + ',"type":"next","payload":{"data":{"' + canonical.root_field + '":'
+        )
+        try:
+            async for update in broadcaster.subscribe(canonical.channel):
+                if operation.completed:
+                    return
+                if isinstance(update, VitalUpdate):
+                    await self._ws.send_text(prefix + update.payload_for(canonical.fields) + "}}}")
+        except Exception as error:
+            error = GraphQLError(str(error), original_error=error)
+            await operation.send_message(ErrorMessage(id=operation.id, payload=[error.formatted]))
+            self.schema.process_errors([error])
+        else:
+            await operation.send_message(CompleteMessage(id=operation.id))
+        finally:
+            self.completed_tasks.append(asyncio.current_task())
+
+
+class PersistedQueryGraphQLRouter(GraphQLRouter):
+    """GraphQLRouter with automatic persisted queries (POST and GET)"""
+
+    graphql_transport_ws_handler_class = PersistedQueryTransportWSHandler
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # A hash-only GET has no "query" param but is still an operation
+        if request.query_params.get("extensions") is not None:
+            return False
+        return super().should_render_graphql_ide(request)
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+
+        if "application/json" in content_type:
+            data = self.parse_json(await request.get_body())
+        elif request.method == "GET":
+            data = self.parse_query_params(request.query_params)
+        else:
+            # multipart uploads etc - no APQ there
+            return await super().parse_http_body(request)
+
+        extensions = data.get("extensions")
+        if isinstance(extensions, str):  # GET sends it JSON-encoded
+            extensions = self.parse_json(extensions)  # 400 if malformed, same as variables
+        if extensions is not None and not isinstance(extensions, dict):
+            raise HTTPException(400, "extensions must be a JSON object")
+
+        return GraphQLRequestData(
+            query=persisted_queries.resolve(data.get("query"), extensions),
+            variables=data.get("variables"),
+            operation_name=data.get("operationName"),
+        )
+
+    async def execute_operation(self, request, context, root_value) -> ExecutionResult:
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryError as e:
+            # Apollo clients look for this in the errors list (HTTP 200)
+            return ExecutionResult(data=None, errors=[_persisted_query_error(e)])
+
+
+graphql_router = PersistedQueryGraphQLRouter(
     schema,
+    context_getter=get_context,  # fresh DataLoaders per request
     subscription_protocols=[
         "graphql-transport-ws",  # Modern protocol
         "graphql-ws",            # Legacy protocol just in case
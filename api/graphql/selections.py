@@ -0,0 +1,81 @@
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence, Set, Tuple
+
+from strawberry.types import Info
+from strawberry.types.nodes import FragmentSpread, InlineFragment
+
+
+# Selection set -> the response model fields (and so the Mongo fields) a resolver
+# has to read. GraphQL field -> response model fields it is built from.
+
+PATIENT_FIELD_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "id": ("id",),
+    "name": ("patient_name",),
+    "patientId": ("patient_id",),
+    "status": ("status",),
+    "heartRate": ("last_heart_rate",),
+    "oxygenLevel": ("last_oxygen_level",),
+    "bodyTemperature": ("last_body_temperature",),
+    "steps": ("last_steps",),
+    "lastUpdate": ("last_update",),
+    # nested resolvers look their data up by patient_id
+    "readings": ("patient_id",),
+    "activeAlerts": ("patient_id",),
+}
+
+VITAL_FIELD_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "id": ("id",),
+    "patientId": ("patient_id",),
+    "heartRate": ("heart_rate",),
+    "oxygenLevel": ("oxygen_level",),
+    "bodyTemperature": ("body_temperature",),
+    "steps": ("steps",),
+    "timestamp": ("timestamp",),
+}
+
+ALERT_FIELD_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "id": ("id",),
+    "alertId": ("alert_id",),
+    "patientId": ("patient_id",),
+    "metric": ("metric",),
+    "type": ("type",),
+    "value": ("value",),
+    "threshold": ("threshold",),
+    "status": ("status",),
+    "createdAt": ("created_at",),
+    "acknowledgedAt": ("acknowledged_at",),
+}
+
+
+def _collect(selections: Iterable, path: Sequence[str], names: Set[str]):
+    for selection in selections:
+        if isinstance(selection, (FragmentSpread, InlineFragment)):
+            _collect(selection.selections, path, names)
+        elif path:
+            if selection.name == path[0]:
+                _collect(selection.selections, path[1:], names)
+        else:
+            names.add(selection.name)
+
+
+def requested_fields(
+    info: Info,
+    sources: Dict[str, Tuple[str, ...]],
+    path: Sequence[str] = ()
+) -> Optional[FrozenSet[str]]:
+    """
+    Response model fields behind the current field's selection set
+    path walks into wrappers first (("edges", "node") for connections).
+    None (= read whole docs) if something is selected that isn't in sources.
+    """
+    names: Set[str] = set()
+    for field in info.selected_fields:
+        _collect(field.selections, path, names)
+
+    fields: Set[str] = set()
+    for name in names:
+        if name.startswith("__"):
+            continue
+        if name not in sources:
+            return None
+        fields.update(sources[name])
+    return frozenset(fields) or None
@@ -1,8 +1,60 @@
 import strawberry
+from datetime import datetime
 from typing import AsyncGenerator
 
-from api.graphql.types import LiveVitalsType
-from infrastructure.pubsub.broadcaster import broadcaster, VitalUpdate
+from api.graphql.types import LiveVitalsType, LiveVitalsBatchType, AlertType, AlertEventType
+from domain.services.vital_service import alert_service
+from infrastructure.pubsub.broadcaster import (
+    broadcaster, VitalUpdate, AlertEvent, VITALS_CHANNEL, ALERTS_CHANNEL, patient_channel
+)
+from config.constants import AlertStatus, AlertEventKind
+
+# liveVitalsBatch bounds
+MIN_BATCH_INTERVAL_MS = 100
+MAX_BATCH_INTERVAL_MS = 60_000
+MAX_BATCH_ITEMS = 1000
+
+# Active alerts sent in the alertEvents snapshot
+MAX_ALERT_SNAPSHOT = 500
+
+
+def _to_live_vitals(update: VitalUpdate) -> LiveVitalsType:
+    return LiveVitalsType(
+        id=update.patient_id,
+        heart_rate=update.heart_rate,
+        oxygen_level=update.oxygen_level,
+        body_temperature=update.body_temperature,
+        steps=update.steps,
+        timestamp=update.timestamp
+    )
+
+
+def _to_alert_type(a) -> AlertType:
+    """AlertResponse / AlertEvent -> AlertType (same attribute names)"""
+    return AlertType(
+        id=a.id or "",
+        alert_id=a.alert_id,
+        patient_id=a.patient_id,
+        metric=a.metric,
+        type=a.type,
+        value=a.value,
+        threshold=a.threshold,
+        status=a.status,
+        created_at=a.created_at,
+        acknowledged_at=a.acknowledged_at
+    )
+
+
+async def _active_alerts_snapshot() -> list:
+    result = await alert_service.get_alerts(
+        status_filter=AlertStatus.ACTIVE,
+        limit=MAX_ALERT_SNAPSHOT,
+        include_total=False
+    )
+    return [AlertEventType(
+        kind=AlertEventKind.SNAPSHOT,
+        active_alerts=[_to_alert_type(a) for a in result.items]
+    )]
 
 
 @strawberry.type
@@ -17,16 +69,35 @@ class Subscription:
 
         Streams real-time data whenever new vitals are ingested
         """
-        async for update in broadcaster.subscribe("vitals"):
+        async for update in broadcaster.subscribe(VITALS_CHANNEL):
             if isinstance(update, VitalUpdate):
-                yield LiveVitalsType(
-                    id=update.patient_id,
-                    heart_rate=update.heart_rate,
-                    oxygen_level=update.oxygen_level,
-                    body_temperature=update.body_temperature,
-                    steps=update.steps,
-                    timestamp=update.timestamp
-                )
+                yield _to_live_vitals(update)
+
+    @strawberry.subscription
+    async def live_vitals_batch(
+        self,
+        interval_ms: int = 1000,
+        max_items: int = 500
+    ) -> AsyncGenerator[LiveVitalsBatchType, None]:
+        """
+        Live vitals in one frame per interval instead of one frame per reading
+        subscription { liveVitalsBatch(intervalMs: 1000) { windowEnd items { id heartRate } } }
+
+        Only the newest reading per patient in each window is sent; more than
+        maxItems patients spill over into the next frame. Empty windows send nothing.
+        """
+        interval_ms = max(MIN_BATCH_INTERVAL_MS, min(interval_ms, MAX_BATCH_INTERVAL_MS))
+        max_items = max(1, min(max_items, MAX_BATCH_ITEMS))
+
+        async for batch in broadcaster.subscribe_batched(
+            VITALS_CHANNEL,
+            interval=interval_ms / 1000,
+            max_items=max_items
+        ):
+            yield LiveVitalsBatchType(
+                items=[_to_live_vitals(u) for u in batch if isinstance(u, VitalUpdate)],
+                window_end=datetime.utcnow()
+            )
 
     @strawberry.subscription
     async def patient_vitals(
@@ -37,15 +108,23 @@ class Subscription:
         Subscribe to live vitals for a specific patient
         subscription { patientVitals(patientId: "P-101") { heartRate oxygenLevel } }
         """
-        async for update in broadcaster.subscribe("vitals"):
+        # Per-patient channel - only this patient's readings ever reach our queue
+        async for update in broadcaster.subscribe(patient_channel(patient_id)):
             if isinstance(update, VitalUpdate):
-                # Filter by patient_id
-                if update.patient_id == patient_id:
-                    yield LiveVitalsType(
-                        id=update.patient_id,
-                        heart_rate=update.heart_rate,
-                        oxygen_level=update.oxygen_level,
-                        body_temperature=update.body_temperature,
-                        steps=update.steps,
-                        timestamp=update.timestamp
-                    )
+                yield _to_live_vitals(update)
+
+    @strawberry.subscription
+    async def alert_events(self) -> AsyncGenerator[AlertEventType, None]:
+        """
+        Subscribe to alert lifecycle events // replaces polling GET /api/alerts?status=ACTIVE
+        subscription { alertEvents { kind alert { alertId status } activeAlerts { alertId } } }
+
+        First message is a SNAPSHOT of active alerts (newest first, up to 500), then
+        CREATED / ACKNOWLEDGED as they happen. An alert created while the
+        snapshot loads can show up in both - treat events as upserts by alertId.
+        """
+        async for event in broadcaster.subscribe(ALERTS_CHANNEL, snapshot=_active_alerts_snapshot):
+            if isinstance(event, AlertEvent):
+                yield AlertEventType(kind=event.kind, alert=_to_alert_type(event))
+            else:
+                yield event
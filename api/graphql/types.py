@@ -1,7 +1,13 @@
 import strawberry
-from typing import Optional, List
+from strawberry.types import Info
+from typing import Awaitable, Callable, Optional, List
 from datetime import datetime
 
+from api.graphql.selections import requested_fields, VITAL_FIELD_SOURCES, ALERT_FIELD_SOURCES
+
+
+MAX_NESTED_READINGS = 100  # same cap as GET /api/patients/{id}/readings
+
 
 @strawberry.type
 class PatientType:
@@ -16,6 +22,22 @@ class PatientType:
     steps: Optional[int] = None
     last_update: Optional[datetime] = None
 
+    @strawberry.field
+    async def readings(self, info: Info, limit: int = 10) -> List["VitalType"]:
+        """
+        Recent readings // batched across all patients in the query
+        query { patients { patientId readings(limit: 5) { heartRate timestamp } } }
+        """
+        limit = max(1, min(limit, MAX_NESTED_READINGS))
+        fields = requested_fields(info, VITAL_FIELD_SOURCES)
+        return await info.context["loaders"].readings.load((self.patient_id, limit, fields))
+
+    @strawberry.field
+    async def active_alerts(self, info: Info) -> List["AlertType"]:
+        """Active alerts // batched across all patients in the query"""
+        fields = requested_fields(info, ALERT_FIELD_SOURCES)
+        return await info.context["loaders"].active_alerts.load((self.patient_id, fields))
+
 
 @strawberry.type
 class VitalType:
@@ -44,6 +66,107 @@ class AlertType:
     acknowledged_at: Optional[datetime] = None
 
 
+@strawberry.type
+class PatientChangesType:
+    """Patients changed since a cursor // poll again with cursor"""
+    items: List[PatientType]
+    cursor: str
+    has_more: bool
+
+
+@strawberry.type
+class VitalChangesType:
+    """Readings stored since a cursor"""
+    items: List[VitalType]
+    cursor: str
+    has_more: bool
+
+
+@strawberry.type
+class AlertChangesType:
+    """Alerts created or acknowledged since a cursor"""
+    items: List[AlertType]
+    cursor: str
+    has_more: bool
+
+
+# --- Relay-style connections (keyset paging: first + after) ---
+
+@strawberry.type
+class PageInfo:
+    """Pass end_cursor back as after for the next page"""
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+
+@strawberry.type
+class PatientEdge:
+    node: PatientType
+    cursor: str
+
+
+@strawberry.type
+class PatientConnection:
+    """Patients in creation order"""
+    edges: List[PatientEdge]
+    page_info: PageInfo
+    count_total: strawberry.Private[Callable[[], Awaitable[int]]]
+
+    @strawberry.field
+    async def total_count(self) -> int:
+        """Only counted when selected"""
+        return await self.count_total()
+
+
+@strawberry.type
+class VitalEdge:
+    node: VitalType
+    cursor: str
+
+
+@strawberry.type
+class VitalConnection:
+    """Readings, newest first"""
+    edges: List[VitalEdge]
+    page_info: PageInfo
+    count_total: strawberry.Private[Callable[[], Awaitable[int]]]
+
+    @strawberry.field
+    async def total_count(self) -> int:
+        """Only counted when selected"""
+        return await self.count_total()
+
+
+@strawberry.type
+class AlertEdge:
+    node: AlertType
+    cursor: str
+
+
+@strawberry.type
+class AlertConnection:
+    """Alerts, newest first"""
+    edges: List[AlertEdge]
+    page_info: PageInfo
+    count_total: strawberry.Private[Callable[[], Awaitable[int]]]
+
+    @strawberry.field
+    async def total_count(self) -> int:
+        """Only counted when selected"""
+        return await self.count_total()
+
+
+@strawberry.type
+class AlertEventType:
+    """
+    Alert lifecycle event for subscriptions
+    kind: SNAPSHOT (first message, active_alerts filled) | CREATED | ACKNOWLEDGED
+    """
+    kind: str
+    alert: Optional[AlertType] = None
+    active_alerts: Optional[List[AlertType]] = None
+
+
 @strawberry.type
 class LiveVitalsType:
     """Live vitals for subscriptions"""
@@ -55,6 +178,13 @@ class LiveVitalsType:
     timestamp: datetime
 
 
+@strawberry.type
+class LiveVitalsBatchType:
+    """One window of live vitals // newest reading per patient"""
+    items: List[LiveVitalsType]
+    window_end: datetime
+
+
 @strawberry.type
 class ThresholdType:
     """Threshold settings type"""
@@ -9,10 +9,16 @@ from api.middleware.logging_middleware import (
     log_requests_middleware,
     get_request_id,
 )
+from api.middleware.compression import (
+    CompressionMiddleware,
+    negotiate_encoding,
+)
 
 __all__ = [
     "get_current_user",
     "get_current_user_optional",
     "log_requests_middleware",
     "get_request_id",
+    "CompressionMiddleware",
+    "negotiate_encoding",
 ]
@@ -0,0 +1,275 @@
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Plain ASGI (not @app.middleware / BaseHTTPMiddleware) so bodies are handled
+# message by message - StreamingResponse exports go out compressed as they're
+# produced, nothing is collected in memory first.
+#
+# Responses: the encoding comes from Accept-Encoding (client q-values first, then
+# our preference order). Only allow-listed media types, only bodies of at least
+# minimum_size (buffered until then), never ranged or resumable (Accept-Ranges)
+# responses - their byte offsets must stay offsets into the identity bytes.
+# Requests: gzip bodies on the given paths (ingest) are inflated, with a cap
+# on the inflated size, before the app sees them.
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4      # 11 (the default) is for static assets, far too slow per request
+ZSTD_LEVEL = 3
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+
+ENCODERS = {"zstd": _ZstdEncoder, "br": _BrotliEncoder, "gzip": _GzipEncoder}
+GZIP_CODINGS = ("gzip", "x-gzip")
+
+
+def negotiate_encoding(accept_encoding: str, preference: Sequence[str]) -> Optional[str]:
+    """Accept-Encoding -> best coding we support (highest q, ties by preference) // None = identity"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    wildcard = accepted.get("*", 0.0)
+    candidates = [(accepted.get(c, wildcard), -i, c) for i, c in enumerate(preference)]
+    q, _, coding = max(candidates, default=(0.0, 0, None))
+    return coding if q > 0 else None
+
+
+def _media_type(headers: Headers) -> str:
+    return headers.get("content-type", "").split(";", 1)[0].strip().lower()
+
+
+class _CompressingSender:
+    """Wraps send for one response // holds the start message until it knows whether to compress"""
+
+    def __init__(self, send: Send, encoding: Optional[str], minimum_size: int, media_types: frozenset):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.media_types = media_types
+        self._start: Optional[Message] = None
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        self._encoder = None
+        self._passthrough = False
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            await self._response_start(message)
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._encoder is None:
+            self._pending.append(body)
+            self._pending_size += len(body)
+            if self._pending_size < self.minimum_size:
+                if more_body:
+                    return  # maybe still small - keep holding
+                # Whole body is small - not worth it
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": b"".join(self._pending)})
+                return
+            self._begin()
+            await self._send(self._start)
+            body = b"".join(self._pending)
+            self._pending = []
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self._encoder.encode(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+    async def _response_start(self, message: Message):
+        headers = MutableHeaders(raw=message["headers"])
+        if _media_type(headers) not in self.media_types or "content-encoding" in headers:
+            self._passthrough = True
+            await self._send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")  # same URL, different bytes per encoding
+        declared = headers.get("content-length")
+        if (
+            self.encoding is None
+            or message["status"] < 200
+            or message["status"] in (204, 206, 304)
+            or "content-range" in headers
+            or headers.get("accept-ranges", "none").lower() != "none"  # export downloads resume by offset
+            or (declared is not None and declared.isdigit() and int(declared) < self.minimum_size)
+        ):
+            self._passthrough = True
+            await self._send(message)
+            return
+        self._start = message
+
+    def _begin(self):
+        headers = MutableHeaders(raw=self._start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        del headers["Content-Length"]
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"  # not byte-identical to the uncompressed version any more
+        self._encoder = ENCODERS[self.encoding]()
+
+
+class CompressionMiddleware:
+    """
+    Negotiated response compression (zstd / br / gzip) + gzip request
+    bodies on decompress_paths // see the note at the top of the module
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Iterable[str] = ("zstd", "br", "gzip"),
+        minimum_size: int = 1024,
+        media_types: Iterable[str] = ("application/json",),
+        decompress_paths: Iterable[str] = (),
+        max_decompressed_size: int = 10 * 1024 * 1024
+    ):
+        self.app = app
+        self.encodings = tuple(e.strip().lower() for e in encodings if e.strip())
+        unknown = set(self.encodings) - set(ENCODERS)
+        if unknown:
+            raise ValueError(f"Unsupported compression encodings: {', '.join(sorted(unknown))}")
+        self.minimum_size = minimum_size
+        self.media_types = frozenset(t.strip().lower() for t in media_types if t.strip())
+        self.decompress_paths = frozenset(decompress_paths)
+        self.max_decompressed_size = max_decompressed_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if (
+            self.decompress_paths
+            and scope["path"] in self.decompress_paths
+            and headers.get("content-encoding", "identity").strip().lower() != "identity"
+        ):
+            decoded = await self._decompress_request(scope, receive, headers)
+            if isinstance(decoded, JSONResponse):
+                await decoded(scope, receive, send)
+                return
+            scope, receive = decoded
+
+        if not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        # Range requests get identity bytes so offsets mean what the client thinks
+        encoding = None if "range" in headers else negotiate_encoding(
+            headers.get("accept-encoding", ""), self.encodings
+        )
+        sender = _CompressingSender(send, encoding, self.minimum_size, self.media_types)
+        await self.app(scope, receive, sender.send)
+
+    async def _decompress_request(
+        self,
+        scope: Scope,
+        receive: Receive,
+        headers: Headers
+    ) -> Union[Tuple[Scope, Receive], JSONResponse]:
+        """gzip body -> (scope, receive) replaying the inflated body, or the error response"""
+        coding = headers["content-encoding"].strip().lower()
+        if coding not in GZIP_CODINGS:
+            return JSONResponse(
+                {"detail": f"Unsupported Content-Encoding '{coding}' (use gzip)"},
+                status_code=415,
+                headers={"Accept-Encoding": "gzip"}
+            )
+
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                # Client went away - let the app see the disconnect
+                return scope, _replay(message, receive)
+            try:
+                # max_length one past the cap: getting that much back means over the cap
+                data = decompressor.decompress(message.get("body", b""), self.max_decompressed_size - size + 1)
+            except zlib.error:
+                return JSONResponse({"detail": "Request body is not valid gzip"}, status_code=400)
+            size += len(data)
+            if size > self.max_decompressed_size:
+                return JSONResponse(
+                    {"detail": f"Decompressed request body exceeds {self.max_decompressed_size} bytes"},
+                    status_code=413
+                )
+            chunks.append(data)
+            if not message.get("more_body", False):
+                break
+        if not decompressor.eof or decompressor.unused_data:
+            return JSONResponse({"detail": "Request body is not a single complete gzip stream"}, status_code=400)
+
+        body = b"".join(chunks)
+        raw_headers = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        raw_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        scope = {**scope, "headers": raw_headers}
+        return scope, _replay({"type": "http.request", "body": body, "more_body": False}, receive)
+
+
+def _replay(first: Message, receive: Receive) -> Receive:
+    """receive that returns first once, then defers to the real one"""
+    pending = [first]
+
+    async def replay_receive() -> Message:
+        if pending:
+            return pending.pop()
+        return await receive()
+
+    return replay_receive
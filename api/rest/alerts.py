@@ -1,35 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from typing import Optional, Union
 
 from api.middleware.jwt_auth import get_current_user
-from domain.models.vital import AlertListResponse
+from api.rest.responses import FastJSONResponse, etag_headers, not_modified, parse_fields, sparse
+from domain.models.vital import AlertResponse, AlertListResponse, AlertChangesResponse
 from domain.services.vital_service import alert_service
 from domain.exceptions.custom_exceptions import (
     AlertNotFoundError,
     AlertAlreadyAcknowledgedError,
+    InvalidCursorError,
 )
+from infrastructure.database.versions import collection_versions
+from config.constants import Collections
 
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 
-@router.get("", response_model=AlertListResponse)
+@router.get("", response_model=Union[AlertListResponse, AlertChangesResponse])
 async def list_alerts(
+    request: Request,
     status_filter: Optional[str] = Query(None, alias="status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    since: Optional[datetime] = Query(None, description="Only alerts created/acknowledged after this time"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous delta response"),
+    after: Optional[str] = Query(None, description="next_after from the previous page (keyset paging)"),
+    include_total: bool = Query(True, description="Count active alerts"),
+    fields: Optional[str] = Query(None, description="Comma separated item fields to return, e.g. alert_id,status"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     GET /api/alerts?status=ACTIVE
-    List alerts // filter by status
+    List alerts // filter by status, newest first
+    With ?after=: the next (older) page after that token (no skip)
+    With ?since= or ?cursor=: alerts created or acknowledged since then + a new cursor.
+    status is ignored there - an acknowledged alert has to reach the client too.
+    With ?fields=: only those fields per alert
+    Supports If-None-Match (304 when unchanged)
     Protected: requires JWT
     """
-    return await alert_service.get_alerts(
-        status_filter=status_filter,
-        skip=skip,
-        limit=limit
-    )
+    selected = parse_fields(fields, AlertResponse)
+    etag = collection_versions.etag(Collections.ALERTS)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    headers = etag_headers(etag)
+
+    if since is not None or cursor:
+        try:
+            result = await alert_service.get_alerts_since(cursor=cursor, since=since, limit=limit)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=e.message
+            )
+        return FastJSONResponse(sparse(result, selected), headers=headers)
+
+    try:
+        result = await alert_service.get_alerts(
+            status_filter=status_filter,
+            skip=skip,
+            limit=limit,
+            after=after,
+            include_total=include_total,
+            fields=selected
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    return FastJSONResponse(sparse(result, selected), headers=headers)  # skip response_model re-validation
 
 
 @router.post("/{alert_id}/ack")
@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from api.middleware.jwt_auth import get_current_user
+from infrastructure.pubsub.broadcaster import broadcaster
 
 router = APIRouter(tags=["Health"])
 
@@ -14,3 +17,19 @@ async def health_check():
         "service": "Smart Health Monitoring API",
         "version": "1.0.0"
     }
+
+
+@router.get("/health/subscribers")
+async def subscriber_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    GET /api/health/subscribers
+    Live subscription queues // lag + drop counters per subscriber
+    Protected: requires JWT
+    """
+    subscribers = broadcaster.get_stats()
+    return {
+        "subscriber_count": len(subscribers),
+        "subscribers": subscribers
+    }
@@ -1,20 +1,40 @@
-from fastapi import APIRouter, Depends, Query
+import time
+
+from fastapi import APIRouter, Depends, Query, Request
 
 from api.middleware.jwt_auth import get_current_user
+from api.rest.responses import FastJSONResponse, etag_headers, not_modified
 from domain.services.vital_service import report_service
+from infrastructure.database.versions import collection_versions
+from config.constants import Collections
 
 
 router = APIRouter(prefix="/overview", tags=["Overview"])
 
+# The KPI window slides even without writes (old readings drop out of the
+# average), so its ETag also rolls over every few seconds
+KPI_ETAG_SECONDS = 10
+
 
 @router.get("/kpis")
 async def get_kpis(
+    request: Request,
     window_minutes: int = Query(5, ge=1, le=60),
     current_user: dict = Depends(get_current_user)
 ):
     """
     GET /api/overview/kpis?window_minutes=5
     Get dashboard KPIs
+    Supports If-None-Match (304 when unchanged)
     Protected: requires JWT
     """
-    return await report_service.get_kpis(window_minutes=window_minutes)
+    etag = collection_versions.etag(
+        Collections.PATIENTS, Collections.ALERTS, Collections.VITALS,
+        extra=str(int(time.time() // KPI_ETAG_SECONDS))
+    )
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    result = await report_service.get_kpis(window_minutes=window_minutes)
+    return FastJSONResponse(result, headers=etag_headers(etag))
@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends, status, Query
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
 from api.middleware.jwt_auth import get_current_user
-from domain.models.patient import PatientListResponse
-from domain.models.vital import VitalDataInput, VitalListResponse
+from api.rest.responses import (
+    FastJSONResponse, dumps, etag_headers, not_modified, parse_fields, sparse,
+)
+from domain.models.patient import PatientResponse, PatientListResponse, PatientChangesResponse
+from domain.exceptions.custom_exceptions import (
+    IngestBatchTooLargeError, InvalidCursorError, ValidationException,
+)
+from domain.models.vital import (
+    VitalDataInput, VitalResponse, VitalListResponse, VitalChangesResponse,
+    vital_batch_adapter, parse_vital_json, parse_vital_batch_json,
+    MSGPACK_MEDIA_TYPES, VITAL_FRAME_MEDIA_TYPE, parse_vital_msgpack, parse_vital_batch_msgpack,
+    parse_vital_frame, parse_vital_frames,
+)
 from domain.services.patient_service import patient_service
 from domain.services.vital_service import vital_service
+from domain.services.patient_stream_service import patient_feed
 from infrastructure.pubsub.broadcaster import broadcast_vital
+from infrastructure.database.versions import collection_versions
+from config.constants import Collections
+from config.settings import get_settings
 from config.logging_config import get_logger
 from config.debug_utils import debug_timer, debug_vars, DebugContext
 
@@ -13,11 +34,129 @@ router = APIRouter(prefix="/patients", tags=["Patients"])
 logger = get_logger("api.patients")
 
 
-@router.post("/data", status_code=status.HTTP_201_CREATED)
+# --- Ingest body parsing ---
+# Ingest bodies are validated straight from the raw bytes (no request.json() round
+# trip). The body schema is declared by hand so /docs still shows it.
+# Content-Type picks the decoder: JSON (default), MessagePack or fixed-layout frames
+# (see "Binary ingest" in domain/models/vital.py) - all end up as VitalDataInput.
+# Cheap rejections come first: routes resolve the JWT before the body, oversized
+# bodies are refused before they're read, oversized batches before validation.
+
+def _body_validation_error(e: ValidationError) -> RequestValidationError:
+    """Pydantic errors -> same 422 shape FastAPI gives for body errors"""
+    errors = e.errors(include_url=False)
+    for err in errors:
+        err["loc"] = ("body", *err["loc"])
+    return RequestValidationError(errors)
+
+
+def _malformed_body_error(e: ValidationException) -> RequestValidationError:
+    """Undecodable body -> same 422 shape"""
+    return RequestValidationError([
+        {"type": "value_error", "loc": ("body",), "msg": e.message, "input": None}
+    ])
+
+
+def _media_type(request: Request) -> str:
+    return request.headers.get("content-type", "application/json").split(";", 1)[0].strip().lower()
+
+
+def _unsupported_media_type(media_type: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Unsupported Content-Type '{media_type}' "
+               f"(use application/json, application/msgpack or {VITAL_FRAME_MEDIA_TYPE})"
+    )
+
+
+def _body_too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body too large (max {limit} bytes)"
+    )
+
+
+async def _read_body(request: Request) -> bytes:
+    """Body bytes // 413 as soon as Content-Length or the bytes received pass INGEST_MAX_BODY_BYTES"""
+    limit = get_settings().ingest_max_body_bytes
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise _body_too_large(limit)
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise _body_too_large(limit)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def vital_body(request: Request) -> VitalDataInput:
+    """Dependency: raw body -> VitalDataInput"""
+    media_type = _media_type(request)
+    if media_type == "application/json":
+        parse = parse_vital_json
+    elif media_type in MSGPACK_MEDIA_TYPES:
+        parse = parse_vital_msgpack
+    elif media_type == VITAL_FRAME_MEDIA_TYPE:
+        parse = parse_vital_frame
+    else:
+        raise _unsupported_media_type(media_type)
+    raw = await _read_body(request)
+    try:
+        return parse(raw)
+    except ValidationError as e:
+        raise _body_validation_error(e)
+    except ValidationException as e:
+        raise _malformed_body_error(e)
+
+
+async def vital_batch_body(request: Request) -> List[VitalDataInput]:
+    """Dependency: raw array body (or back-to-back frames) -> list of VitalDataInput"""
+    media_type = _media_type(request)
+    if media_type == "application/json":
+        parse = parse_vital_batch_json
+    elif media_type in MSGPACK_MEDIA_TYPES:
+        parse = parse_vital_batch_msgpack
+    elif media_type == VITAL_FRAME_MEDIA_TYPE:
+        parse = parse_vital_frames
+    else:
+        raise _unsupported_media_type(media_type)
+    raw = await _read_body(request)
+    try:
+        return parse(raw, max_items=get_settings().ingest_max_batch_size)
+    except ValidationError as e:
+        raise _body_validation_error(e)
+    except IngestBatchTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=e.message)
+    except ValidationException as e:
+        raise _malformed_body_error(e)
+
+
+def _ingest_body_schema(schema: dict) -> dict:
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                "application/msgpack": binary,
+                VITAL_FRAME_MEDIA_TYPE: binary,
+            },
+        }
+    }
+
+
+@router.post(
+    "/data",
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_ingest_body_schema(VitalDataInput.model_json_schema())
+)
 @debug_timer
 async def ingest_patient_data(
-    data: VitalDataInput,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),  # first - no body parsing for 401s
+    data: VitalDataInput = Depends(vital_body)
 ):
     """
     POST /api/patients/data
@@ -49,7 +188,10 @@ async def ingest_patient_data(
             oxygen_level=data.oxygenLevel,
             body_temperature=data.bodyTemperature,
             steps=data.steps,
-            timestamp=data.timestamp
+            timestamp=data.timestamp,
+            patient_status=result["patient_status"],
+            reading_id=result["reading_id"],
+            last_update=result["last_update"]
         )
     
     logger.info("Patient vital data ingested successfully", extra={
@@ -66,29 +208,200 @@ async def ingest_patient_data(
     }
 
 
-@router.get("", response_model=PatientListResponse)
+@router.post(
+    "/data/batch",
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_ingest_body_schema(vital_batch_adapter.json_schema())
+)
+async def ingest_patient_data_batch(
+    current_user: dict = Depends(get_current_user),  # first - no body parsing for 401s
+    readings: List[VitalDataInput] = Depends(vital_batch_body)
+):
+    """
+    POST /api/patients/data/batch
+    Receive an array of vital readings in one request
+    (JSON or MessagePack array, or back-to-back binary frames)
+    Protected: requires JWT
+    """
+    # INGEST_MAX_BATCH_SIZE was enforced by vital_batch_body, before validation
+    results = await vital_service.ingest_vital_batch(readings)
+
+    # Broadcast for GraphQL subscriptions
+    for data, result in zip(readings, results):
+        await broadcast_vital(
+            patient_id=data.deviceId,
+            heart_rate=data.heartRate,
+            oxygen_level=data.oxygenLevel,
+            body_temperature=data.bodyTemperature,
+            steps=data.steps,
+            timestamp=data.timestamp,
+            patient_status=result["patient_status"],
+            reading_id=result["reading_id"],
+            last_update=result["last_update"]
+        )
+
+    logger.info("Patient vital batch ingested successfully", extra={
+        "readings_count": len(readings),
+        "operation": "ingest_vital_batch"
+    })
+
+    return {
+        "status": "ok",
+        "message": f"{len(results)} vital readings ingested",
+        "results": results
+    }
+
+
+def _invalid_cursor(e: InvalidCursorError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+
+@router.get("", response_model=Union[PatientListResponse, PatientChangesResponse])
 async def list_patients(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    since: Optional[datetime] = Query(None, description="Only patients updated after this time"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous delta response"),
+    after: Optional[str] = Query(None, description="next_after from the previous page (keyset paging)"),
+    include_total: bool = Query(True, description="Count all patients (skip it for cheaper deep paging)"),
+    fields: Optional[str] = Query(None, description="Comma separated item fields to return, e.g. patient_id,status"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     GET /api/patients
     List all patients with latest metrics
+    With ?after=: the page after that token (no skip, page is ignored)
+    With ?since= or ?cursor=: only patients changed since then (up to page_size) + a new cursor
+    With ?fields=: only those fields per patient (and only those are read from Mongo)
+    Supports If-None-Match (304 when unchanged)
+    Protected: requires JWT
+    """
+    selected = parse_fields(fields, PatientResponse)
+    etag = collection_versions.etag(Collections.PATIENTS)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    headers = etag_headers(etag)
+
+    if since is not None or cursor:
+        try:
+            result = await patient_service.get_patients_since(cursor=cursor, since=since, limit=page_size)
+        except InvalidCursorError as e:
+            raise _invalid_cursor(e)
+        return FastJSONResponse(sparse(result, selected), headers=headers)
+
+    try:
+        result = await patient_service.get_all_patients(
+            page=page,
+            page_size=page_size,
+            after=after,
+            include_total=include_total,
+            fields=selected
+        )
+    except InvalidCursorError as e:
+        raise _invalid_cursor(e)
+    return FastJSONResponse(sparse(result, selected), headers=headers)  # skip response_model re-validation
+
+
+# --- SSE patient stream ---
+
+SSE_RETRY_MS = 3000  # EventSource reconnect delay
+
+
+def _sse_event(event: str, event_id: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\nid: " + event_id.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def _patient_events(last_event_id: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    snapshot (all patients) once, then update events with the changed rows
+    Rows in an update are partial: patient_id + latest vitals, status, last_update
+    """
+    heartbeat = get_settings().sse_heartbeat_seconds
+    yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+
+    seq = patient_feed.parse_event_id(last_event_id)
+    while True:
+        changes = patient_feed.changes_since(seq) if seq is not None else None
+        if changes is None:
+            # New client, unknown id, or too far behind the replay buffer -> full snapshot.
+            # Take the seq first: anything ingested while we load is replayed after.
+            seq = patient_feed.seq
+            items = await patient_service.get_all_patients_snapshot()
+            yield _sse_event("snapshot", patient_feed.event_id(seq), {"items": items, "total": len(items)})
+            continue
+
+        if changes:
+            seq = changes[-1].seq
+            rows = {}
+            for change in changes:  # newest row per patient
+                rows[change.row["patient_id"]] = change.row
+            yield _sse_event("update", patient_feed.event_id(seq), {"items": list(rows.values())})
+            continue
+
+        if not await patient_feed.wait(heartbeat):
+            yield b": heartbeat\n\n"
+
+
+@router.get("/stream")
+async def stream_patients(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    GET /api/patients/stream
+    Server-Sent Events: full patient snapshot, then only changed rows as vitals come in
+    Reconnect with Last-Event-ID to resume without a new snapshot
     Protected: requires JWT
     """
-    return await patient_service.get_all_patients(page=page, page_size=page_size)
+    return StreamingResponse(
+        _patient_events(last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # don't let nginx / App Service buffer the stream
+        }
+    )
 
 
-@router.get("/{patient_id}/readings", response_model=VitalListResponse)
+@router.get("/{patient_id}/readings", response_model=Union[VitalListResponse, VitalChangesResponse])
 async def get_patient_readings(
     patient_id: str,
     limit: int = Query(10, ge=1, le=100),
+    since: Optional[datetime] = Query(None, description="Only readings stored after this time"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous delta response"),
+    after: Optional[str] = Query(None, description="next_after from the previous page (older readings)"),
+    include_total: bool = Query(True, description="Count all the patient's readings"),
+    fields: Optional[str] = Query(None, description="Comma separated item fields to return, e.g. heart_rate,timestamp"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     GET /api/patients/{patient_id}/readings
-    Get recent readings for a patient
+    Get recent readings for a patient, newest first
+    With ?after=: the next (older) page after that token
+    With ?fields=: only those fields per reading
+    With ?since= or ?cursor=: readings stored since then, oldest first + a new cursor
     Protected: requires JWT
     """
-    return await vital_service.get_patient_readings(patient_id, limit=limit)
+    selected = parse_fields(fields, VitalResponse)
+    if since is not None or cursor:
+        try:
+            result = await vital_service.get_patient_readings_since(
+                patient_id, cursor=cursor, since=since, limit=limit
+            )
+        except InvalidCursorError as e:
+            raise _invalid_cursor(e)
+        return FastJSONResponse(sparse(result, selected))
+
+    try:
+        result = await vital_service.get_patient_readings(
+            patient_id,
+            limit=limit,
+            after=after,
+            include_total=include_total,
+            fields=selected
+        )
+    except InvalidCursorError as e:
+        raise _invalid_cursor(e)
+    return FastJSONResponse(sparse(result, selected))  # skip response_model re-validation
@@ -1,11 +1,24 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import PlainTextResponse
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse, StreamingResponse, Response
+from typing import Optional, Tuple
 import io
 import csv
 
+import aiofiles
+
 from api.middleware.jwt_auth import get_current_user
+from domain.models.export import ExportJobCreate, ExportJobResponse
+from domain.models.analytics import AnalyticsQuery, AnalyticsResult, AnalyticsTablesResponse
 from domain.services.vital_service import report_service
+from domain.services.export_service import export_service, CSV_HEADER, format_csv_row
+from domain.services.analytics_service import analytics_service
+from infrastructure.database.raw_bson import decode_rows
+from domain.exceptions.custom_exceptions import (
+    ExportJobNotFoundError,
+    ExportJobNotReadyError,
+    AnalyticsQueryError,
+    AnalyticsTimeoutError,
+)
 
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
@@ -43,7 +56,8 @@ async def export_csv(
     # Get readings via service
     readings = await report_service.get_readings_for_export(
         window_minutes=window_minutes,
-        patient_id=patient_id
+        patient_id=patient_id,
+        raw=True
     )
 
     # Build CSV
@@ -51,25 +65,11 @@ async def export_csv(
     writer = csv.writer(output)
 
     # Header
-    writer.writerow([
-        "patient_id",
-        "heart_rate",
-        "oxygen_level",
-        "body_temperature",
-        "steps",
-        "timestamp"
-    ])
+    writer.writerow(CSV_HEADER)
 
     # Rows
-    for r in readings:
-        writer.writerow([
-            r.get("patient_id", ""),
-            r.get("heart_rate", 0),
-            r.get("oxygen_level", 0),
-            r.get("body_temperature", 0),
-            r.get("steps", 0),
-            r.get("timestamp", "").isoformat() if r.get("timestamp") else ""
-        ])
+    for r in decode_rows(readings):  # one decoded row at a time
+        writer.writerow(format_csv_row(r))
 
     csv_content = output.getvalue()
 
@@ -80,3 +80,182 @@ async def export_csv(
             "Content-Disposition": f"attachment; filename=vitals_export_{window_minutes}min.csv"
         }
     )
+
+
+# --- Background export jobs ---
+# For big windows (up to 1440 min across all patients) - the file is built in the
+# background so no HTTP worker sits waiting on it
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@router.post(
+    "/export/jobs",
+    response_model=ExportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_export_job(
+    job: ExportJobCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    POST /api/reports/export/jobs
+    Start a background CSV export // returns job id to poll
+    Identical params reuse the finished file until it expires
+    Protected: requires JWT
+    """
+    return await export_service.submit(job)
+
+
+@router.get("/export/jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    GET /api/reports/export/jobs/{job_id}
+    Poll export job status
+    Protected: requires JWT
+    """
+    try:
+        return await export_service.get_job(job_id)
+    except ExportJobNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.message
+        )
+
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    GET /api/reports/export/jobs/{job_id}/download
+    Download finished export // supports Range so dropped downloads can resume
+    Protected: requires JWT
+    """
+    try:
+        file_path, size = await export_service.get_download(job_id)
+    except ExportJobNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=e.message
+        )
+    except ExportJobNotReadyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.message
+        )
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename=vitals_export_{job_id}.csv"
+    }
+
+    range_header = request.headers.get("range")
+    if range_header is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            _iter_file(file_path, 0, size),
+            media_type="text/csv",
+            headers=headers
+        )
+
+    byte_range = _parse_range(range_header, size)
+    if byte_range is None:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"}
+        )
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _iter_file(file_path, start, end - start + 1),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="text/csv",
+        headers=headers
+    )
+
+
+@router.post("/analytics/query", response_model=AnalyticsResult)
+async def run_analytics_query(
+    query: AnalyticsQuery,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    POST /api/reports/analytics/query
+    Read-only SQL (DuckDB) over the Parquet snapshots - tables: vitals, alerts
+    One SELECT per request, values as params ({"sql": "... WHERE patient_id = ?", "params": ["P-1"]})
+    Capped at ANALYTICS_MAX_ROWS rows and ANALYTICS_QUERY_TIMEOUT_SECONDS
+    Protected: requires JWT
+    """
+    try:
+        return await analytics_service.query(query)
+    except AnalyticsQueryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+    except AnalyticsTimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=e.message
+        )
+
+
+@router.get("/analytics/tables", response_model=AnalyticsTablesResponse)
+async def list_analytics_tables(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    GET /api/reports/analytics/tables
+    Snapshot tables, their columns and how fresh they are
+    Protected: requires JWT
+    """
+    return await analytics_service.tables()
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=start-end" range // returns inclusive (start, end)
+    None means unsatisfiable (multi-range isn't supported)
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec or size == 0:
+        return None
+
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str == "":
+            # Suffix range: last N bytes
+            length = int(end_str)
+            if length <= 0:
+                return None
+            return max(0, size - length), size - 1
+
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+async def _iter_file(file_path: str, offset: int, length: int):
+    """Stream a slice of the file in chunks"""
+    async with aiofiles.open(file_path, mode="rb") as f:
+        await f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,83 @@
+from typing import Any, Dict, FrozenSet, Optional, Type
+
+import orjson
+from bson import ObjectId
+from pydantic import BaseModel
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson doesn't know // datetime & dataclasses are native"""
+    if isinstance(obj, BaseModel):
+        # One call dumps the whole tree (list responses included)
+        return obj.model_dump()
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """orjson with our fallbacks // shared by FastJSONResponse and the SSE stream"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-backed JSON response
+    Returning this directly from a route skips FastAPI's response_model
+    re-validation + jsonable_encoder pass (response_model still drives the docs)
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# --- Conditional GET ---
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison (W/ ignored) against a comma separated If-None-Match"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    # no-cache = keep it, but revalidate every time (cheap thanks to the ETag)
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 if the client already has this version, else None (build the real response)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    return None
+
+
+# --- Sparse fieldsets (?fields=a,b) ---
+
+def parse_fields(raw: Optional[str], model: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """"a,b" -> {"a", "b"} // None = every field, 400 for fields the item model doesn't have"""
+    if raw is None:
+        return None
+    fields = frozenset(f.strip() for f in raw.split(",") if f.strip())
+    unknown = fields - model.model_fields.keys()
+    if not fields or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown)) or '(none given)'} "
+                   f"(allowed: {', '.join(model.model_fields)})"
+        )
+    return fields
+
+
+def sparse(result: BaseModel, fields: Optional[FrozenSet[str]]) -> Any:
+    """List response with only `fields` in each item (everything else untouched)"""
+    if fields is None:
+        return result
+    include: Dict[str, Any] = {name: True for name in type(result).model_fields}
+    include["items"] = {"__all__": set(fields)}
+    return result.model_dump(include=include)
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from api.middleware.jwt_auth import get_current_user
+from api.rest.responses import FastJSONResponse, etag_headers, not_modified
 from domain.models.vital import ThresholdSettings
 from domain.services.vital_service import vital_service
+from infrastructure.database.versions import collection_versions
+from config.constants import Collections
 
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
@@ -10,14 +13,22 @@ router = APIRouter(prefix="/settings", tags=["Settings"])
 
 @router.get("/thresholds", response_model=ThresholdSettings)
 async def get_thresholds(
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """
     GET /api/settings/thresholds
     Get current alert thresholds
+    Supports If-None-Match (304 when unchanged)
     Protected: requires JWT
     """
-    return await vital_service.get_thresholds()
+    etag = collection_versions.etag(Collections.SETTINGS)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    result = await vital_service.get_thresholds()
+    return FastJSONResponse(result, headers=etag_headers(etag))
 
 
 @router.put("/thresholds", response_model=ThresholdSettings)
@@ -7,6 +7,8 @@ from config.constants import (
     PatientStatus,
     AlertType,
     AlertStatus,
+    AlertEventKind,
+    ExportJobStatus,
     Collections,
 )
 
@@ -17,5 +19,7 @@ __all__ = [
     "PatientStatus",
     "AlertType",
     "AlertStatus",
+    "AlertEventKind",
+    "ExportJobStatus",
     "Collections",
 ]
@@ -24,6 +24,19 @@ class AlertStatus:
     ACKNOWLEDGED = "ACKNOWLEDGED"
     RESOLVED = "RESOLVED"
 
+# Alert event kinds (alertEvents subscription)
+class AlertEventKind:
+    SNAPSHOT = "SNAPSHOT"
+    CREATED = "CREATED"
+    ACKNOWLEDGED = "ACKNOWLEDGED"
+
+# Export job statuses
+class ExportJobStatus:
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
 # Collection names for MongoDB
 class Collections:
     USERS = "users"
@@ -3,6 +3,7 @@
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -19,6 +20,8 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"   # HOST
     port: int = 8000        # PORT
 
+    # Storage engine picked by scheme: mongodb:// (Motor), sqlite:///path.db (edge boxes)
+    # or memory:// (in-process, not persisted)
     mongo_uri: str = "mongodb://localhost:27017"     # MONGO_URI
     mongo_db: str = "health_monitoring"              # MONGO_DB
 
@@ -30,6 +33,63 @@ class Settings(BaseSettings):
     # Default wildcard is intentional — avoids breaking WebSockets & Node-RED on deploy.
     cors_origins: str = "*"                                     # CORS_ORIGINS
 
+    # Max readings accepted in one batched ingest request
+    ingest_max_batch_size: int = 500                            # INGEST_MAX_BATCH_SIZE
+    ingest_max_body_bytes: int = 1024 * 1024                    # INGEST_MAX_BODY_BYTES (checked before parsing)
+
+    # GraphQL guard rails + caches
+    graphql_max_depth: int = 8                                  # GRAPHQL_MAX_DEPTH
+    graphql_max_complexity: int = 5000                          # GRAPHQL_MAX_COMPLEXITY
+    graphql_document_cache_size: int = 256                      # GRAPHQL_DOCUMENT_CACHE_SIZE
+    graphql_persisted_query_cache_size: int = 1000              # GRAPHQL_PERSISTED_QUERY_CACHE_SIZE
+
+    # Live subscriptions - per-subscriber queue bound + what happens when it's full
+    broadcaster_queue_maxsize: int = 1000                       # BROADCASTER_QUEUE_MAXSIZE (0 = unbounded)
+    # BROADCASTER_OVERFLOW_POLICY - any other value fails validation at startup
+    broadcaster_overflow_policy: Literal["drop_oldest", "drop_newest", "conflate"] = "conflate"
+    broadcaster_disconnect_after_drops: int = 5000              # BROADCASTER_DISCONNECT_AFTER_DROPS (0 = never)
+
+    # Pub/sub transport: "memory" (single worker) or "unix" (all workers on this host)
+    pubsub_backend: str = "memory"                              # PUBSUB_BACKEND
+    pubsub_socket_path: str = "/tmp/health_monitoring_pubsub.sock"  # PUBSUB_SOCKET_PATH
+
+    # SSE patient stream (GET /api/patients/stream)
+    sse_heartbeat_seconds: int = 15                             # SSE_HEARTBEAT_SECONDS
+    sse_replay_buffer_size: int = 10000                         # SSE_REPLAY_BUFFER_SIZE (changes kept for Last-Event-ID)
+
+    # Delta cursors re-scan this far behind their newest key - rows stamped by a
+    # slower worker clock / written late within this window are still delivered
+    delta_overlap_seconds: float = 5.0                          # DELTA_OVERLAP_SECONDS
+
+    # Recent readings kept in memory per patient (GET .../readings with limit <= this skips Mongo)
+    readings_buffer_size: int = 100                             # READINGS_BUFFER_SIZE
+
+    # Background CSV export jobs - files live on local disk until they expire
+    export_dir: str = "exports"                                 # EXPORT_DIR
+    export_job_ttl_minutes: int = 30                            # EXPORT_JOB_TTL_MINUTES
+    export_chunk_rows: int = 500                                # EXPORT_CHUNK_ROWS
+    export_max_concurrent_jobs: int = 2                         # EXPORT_MAX_CONCURRENT_JOBS
+
+    # Cold vitals archive - readings older than this move to compressed per-patient day files
+    archive_dir: str = "archive"                                # ARCHIVE_DIR
+    archive_after_hours: int = 0                                # ARCHIVE_AFTER_HOURS (0 = archiver off, segments still read)
+    archive_interval_seconds: int = 300                         # ARCHIVE_INTERVAL_SECONDS
+
+    # DuckDB analytics over Parquet snapshots (POST /api/reports/analytics/query)
+    analytics_dir: str = "analytics"                            # ANALYTICS_DIR
+    analytics_snapshot_interval_seconds: int = 900              # ANALYTICS_SNAPSHOT_INTERVAL_SECONDS (0 = no snapshots)
+    analytics_query_timeout_seconds: float = 10.0               # ANALYTICS_QUERY_TIMEOUT_SECONDS
+    analytics_max_rows: int = 10000                             # ANALYTICS_MAX_ROWS (per response)
+    analytics_max_concurrent_queries: int = 2                   # ANALYTICS_MAX_CONCURRENT_QUERIES
+    analytics_threads: int = 2                                  # ANALYTICS_THREADS (DuckDB threads per worker)
+    analytics_memory_limit: str = "512MB"                       # ANALYTICS_MEMORY_LIMIT
+
+    # HTTP compression (api/middleware/compression.py)
+    compression_encodings: str = "zstd,br,gzip"                 # COMPRESSION_ENCODINGS (server preference, empty = off)
+    compression_min_size: int = 1024                            # COMPRESSION_MIN_SIZE (bytes, smaller bodies go out as-is)
+    compression_media_types: str = "application/json,text/csv,text/plain,text/html"  # COMPRESSION_MEDIA_TYPES
+    request_max_decompressed_bytes: int = 10 * 1024 * 1024      # REQUEST_MAX_DECOMPRESSED_BYTES (gzip ingest bodies)
+
     class Config:
         """
         Pydantic Settings configuration:
@@ -14,7 +14,19 @@ from domain.exceptions.custom_exceptions import (
     AlertException,
     AlertNotFoundError,
     AlertAlreadyAcknowledgedError,
+    ExportException,
+    ExportJobNotFoundError,
+    ExportJobNotReadyError,
+    AnalyticsException,
+    AnalyticsQueryError,
+    AnalyticsTimeoutError,
+    PersistedQueryError,
+    PersistedQueryNotFoundError,
+    PersistedQueryMismatchError,
+    SubscriberLaggingError,
     ValidationException,
+    InvalidCursorError,
+    IngestBatchTooLargeError,
 )
 
 __all__ = [
@@ -30,5 +42,17 @@ __all__ = [
     "AlertException",
     "AlertNotFoundError",
     "AlertAlreadyAcknowledgedError",
+    "ExportException",
+    "ExportJobNotFoundError",
+    "ExportJobNotReadyError",
+    "AnalyticsException",
+    "AnalyticsQueryError",
+    "AnalyticsTimeoutError",
+    "PersistedQueryError",
+    "PersistedQueryNotFoundError",
+    "PersistedQueryMismatchError",
+    "SubscriberLaggingError",
     "ValidationException",
+    "InvalidCursorError",
+    "IngestBatchTooLargeError",
 ]
@@ -81,6 +81,79 @@ class AlertAlreadyAcknowledgedError(AlertException):
         self.alert_id = alert_id
 
 
+# --- Export Exceptions ---
+
+class ExportException(BaseAppException):
+    """Base export exception"""
+    pass
+
+
+class ExportJobNotFoundError(ExportException):
+    """Export job doesn't exist (or already expired)"""
+    def __init__(self, job_id: str):
+        super().__init__(f"Export job {job_id} not found", "EXPORT_JOB_NOT_FOUND")
+        self.job_id = job_id
+
+
+class ExportJobNotReadyError(ExportException):
+    """Export file isn't written yet"""
+    def __init__(self, job_id: str, status: str):
+        super().__init__(f"Export job {job_id} is {status}", "EXPORT_JOB_NOT_READY")
+        self.job_id = job_id
+        self.status = status
+
+
+# --- Analytics Exceptions ---
+
+class AnalyticsException(BaseAppException):
+    """Base analytics (DuckDB) exception"""
+    pass
+
+
+class AnalyticsQueryError(AnalyticsException):
+    """Query rejected (not a single SELECT) or failed in DuckDB"""
+    def __init__(self, message: str):
+        super().__init__(message, "ANALYTICS_QUERY_ERROR")
+
+
+class AnalyticsTimeoutError(AnalyticsException):
+    """Query interrupted after the time limit"""
+    def __init__(self, timeout: float):
+        super().__init__(f"Analytics query exceeded {timeout:g}s", "ANALYTICS_TIMEOUT")
+        self.timeout = timeout
+
+
+# --- GraphQL Exceptions ---
+
+class PersistedQueryError(BaseAppException):
+    """Base persisted query (APQ) exception"""
+    pass
+
+
+class PersistedQueryNotFoundError(PersistedQueryError):
+    """Hash not cached yet // client should resend with the full query"""
+    def __init__(self, message: str = "PersistedQueryNotFound"):
+        super().__init__(message, "PERSISTED_QUERY_NOT_FOUND")
+
+
+class PersistedQueryMismatchError(PersistedQueryError):
+    """sha256Hash doesn't match the query text"""
+    def __init__(self, message: str = "provided sha does not match query"):
+        super().__init__(message, "PERSISTED_QUERY_HASH_MISMATCH")
+
+
+# --- PubSub Exceptions ---
+
+class SubscriberLaggingError(BaseAppException):
+    """Subscriber couldn't keep up and was disconnected"""
+    def __init__(self, channel: str):
+        super().__init__(
+            f"Subscription to '{channel}' closed: consumer too slow",
+            "SUBSCRIBER_LAGGING"
+        )
+        self.channel = channel
+
+
 # --- Validation Exceptions ---
 
 class ValidationException(BaseAppException):
@@ -88,3 +161,18 @@ class ValidationException(BaseAppException):
     def __init__(self, message: str, field: str = None):
         super().__init__(message, "VALIDATION_ERROR")
         self.field = field
+
+
+class InvalidCursorError(ValidationException):
+    """Sync / pagination cursor that we can't decode"""
+    def __init__(self, message: str = "Invalid cursor"):
+        super().__init__(message, field="cursor")
+
+
+class IngestBatchTooLargeError(ValidationException):
+    """More readings in one ingest batch than INGEST_MAX_BATCH_SIZE"""
+    def __init__(self, count: int, max_size: int):
+        super().__init__(f"Batch too large ({count} readings, max {max_size})", field="body")
+        self.code = "BATCH_TOO_LARGE"
+        self.count = count
+        self.max_size = max_size
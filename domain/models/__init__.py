@@ -12,17 +12,41 @@ from domain.models.patient import (
     PatientInDB,
     PatientResponse,
     PatientListResponse,
+    PatientChangesResponse,
 )
 from domain.models.vital import (
     VitalDataInput,
     VitalInDB,
     VitalResponse,
     VitalListResponse,
+    VitalChangesResponse,
     AlertBase,
     AlertInDB,
     AlertResponse,
     AlertListResponse,
+    AlertChangesResponse,
     ThresholdSettings,
+    vital_batch_adapter,
+    parse_vital_json,
+    parse_vital_batch_json,
+    parse_vital_batch,
+    MSGPACK_MEDIA_TYPES,
+    VITAL_FRAME_MEDIA_TYPE,
+    parse_vital_msgpack,
+    parse_vital_batch_msgpack,
+    parse_vital_frame,
+    parse_vital_frames,
+)
+from domain.models.export import (
+    ExportJobCreate,
+    ExportJobResponse,
+)
+from domain.models.analytics import (
+    AnalyticsQuery,
+    AnalyticsResult,
+    AnalyticsColumn,
+    AnalyticsTable,
+    AnalyticsTablesResponse,
 )
 
 __all__ = [
@@ -39,14 +63,36 @@ __all__ = [
     "PatientInDB",
     "PatientResponse",
     "PatientListResponse",
+    "PatientChangesResponse",
     # Vital
     "VitalDataInput",
     "VitalInDB",
     "VitalResponse",
     "VitalListResponse",
+    "VitalChangesResponse",
     "AlertBase",
     "AlertInDB",
     "AlertResponse",
     "AlertListResponse",
+    "AlertChangesResponse",
     "ThresholdSettings",
+    "vital_batch_adapter",
+    "parse_vital_json",
+    "parse_vital_batch_json",
+    "parse_vital_batch",
+    "MSGPACK_MEDIA_TYPES",
+    "VITAL_FRAME_MEDIA_TYPE",
+    "parse_vital_msgpack",
+    "parse_vital_batch_msgpack",
+    "parse_vital_frame",
+    "parse_vital_frames",
+    # Export
+    "ExportJobCreate",
+    "ExportJobResponse",
+    # Analytics
+    "AnalyticsQuery",
+    "AnalyticsResult",
+    "AnalyticsColumn",
+    "AnalyticsTable",
+    "AnalyticsTablesResponse",
 ]
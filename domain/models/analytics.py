@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Union
+from datetime import datetime
+
+
+class AnalyticsQuery(BaseModel):
+    """Ad-hoc DuckDB query over the Parquet snapshots // one SELECT, values go in params"""
+    sql: str = Field(..., min_length=1, max_length=20000)
+    # positional (? / $1) or named ($name) parameters
+    params: Union[List[Any], Dict[str, Any]] = Field(default_factory=list)
+    max_rows: Optional[int] = Field(None, ge=1)  # capped at ANALYTICS_MAX_ROWS
+
+
+class AnalyticsResult(BaseModel):
+    """Query result, row-major"""
+    columns: List[str]
+    rows: List[List[Any]]
+    row_count: int
+    truncated: bool  # more rows than max_rows - narrow the query or aggregate
+    elapsed_ms: float
+    snapshot_at: Optional[datetime] = None  # data is as fresh as this
+
+
+class AnalyticsColumn(BaseModel):
+    name: str
+    type: str
+
+
+class AnalyticsTable(BaseModel):
+    """A queryable snapshot table"""
+    name: str
+    columns: List[AnalyticsColumn]
+    files: int
+
+
+class AnalyticsTablesResponse(BaseModel):
+    tables: List[AnalyticsTable]
+    snapshot_at: Optional[datetime] = None
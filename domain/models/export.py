@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class ExportJobCreate(BaseModel):
+    """Export job request // same knobs as GET /api/reports/export"""
+    window_minutes: int = Field(5, ge=1, le=1440)
+    patient_id: Optional[str] = None
+    format: str = Field("csv", pattern="^csv$")  # only CSV for now
+
+
+class ExportJobResponse(BaseModel):
+    """Export job status // what the client polls"""
+    job_id: str
+    status: str  # PENDING, RUNNING, COMPLETED, FAILED
+    window_minutes: int
+    patient_id: Optional[str] = None
+    format: str
+    rows_written: int = 0
+    size_bytes: Optional[int] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+    error: Optional[str] = None
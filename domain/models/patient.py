@@ -47,6 +47,15 @@ class PatientResponse(PatientBase):
 class PatientListResponse(BaseModel):
     """Paginated patient list - because nobody wants to load 1000 patients at once"""
     items: list[PatientResponse]  # The actual patients
-    total: int                    # Total count in DB
+    total: Optional[int]          # Total count in DB (None when not asked for)
     page: int = 1                # Current page
     page_size: int = 20          # Items per page
+    next_after: Optional[str] = None  # Pass back as ?after= for the next page (keyset, no skip)
+    has_more: bool = False
+
+
+class PatientChangesResponse(BaseModel):
+    """Patients changed since a cursor - poll again with the returned cursor"""
+    items: list[PatientResponse]  # Oldest change first
+    cursor: str                   # Pass back as ?cursor= next time
+    has_more: bool                # More changes waiting - fetch again right away
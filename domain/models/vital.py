@@ -1,6 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Any, Optional, List, Union
+from datetime import datetime, timedelta, timezone
+import struct
+
+import msgpack
+import orjson
+
+from domain.exceptions.custom_exceptions import IngestBatchTooLargeError, ValidationException
 
 
 class VitalDataInput(BaseModel):
@@ -42,7 +48,156 @@ class VitalResponse(BaseModel):
 class VitalListResponse(BaseModel):
     """List of vital readings"""
     items: list[VitalResponse]
-    total: int
+    total: Optional[int]              # None when not asked for
+    next_after: Optional[str] = None  # Pass back as ?after= for the next (older) page
+    has_more: bool = False
+
+
+class VitalChangesResponse(BaseModel):
+    """Readings stored since a cursor // oldest first"""
+    items: list[VitalResponse]
+    cursor: str
+    has_more: bool
+
+
+# --- Ingest validators ---
+# Built once at import so the ingest hot path never rebuilds a validator.
+# REST validates straight from the raw body bytes (batches go through orjson first,
+# so they're counted before a single reading is validated - that's also faster
+# than validate_json), GraphQL from its input objects, all through these instances.
+
+vital_batch_adapter: TypeAdapter[List[VitalDataInput]] = TypeAdapter(List[VitalDataInput])
+
+
+def parse_vital_json(raw: Union[bytes, str]) -> VitalDataInput:
+    """Raw JSON body -> validated VitalDataInput (no intermediate dict)"""
+    return VitalDataInput.model_validate_json(raw)
+
+
+def _check_batch_size(count: int, max_items: Optional[int]):
+    if max_items is not None and count > max_items:
+        raise IngestBatchTooLargeError(count, max_items)
+
+
+def parse_vital_batch_json(raw: Union[bytes, str], max_items: Optional[int] = None) -> List[VitalDataInput]:
+    """
+    Raw JSON array body -> list of validated VitalDataInput
+    Raises: IngestBatchTooLargeError (before validating anything), ValidationException
+    """
+    try:
+        items = orjson.loads(raw)
+    except orjson.JSONDecodeError as e:
+        raise ValidationException(f"Invalid JSON body: {e}", field="body")
+    if isinstance(items, list):
+        _check_batch_size(len(items), max_items)
+    return vital_batch_adapter.validate_python(items)
+
+
+def parse_vital_batch(items: List[dict]) -> List[VitalDataInput]:
+    """Already-decoded payloads (GraphQL) -> list of validated VitalDataInput"""
+    return vital_batch_adapter.validate_python(items)
+
+
+# --- Binary ingest ---
+# Smaller bodies for constrained devices, decoded into the same validated
+# VitalDataInput as JSON. The Content-Type picks the format:
+#
+#   application/msgpack          a reading is a map with the JSON keys, or the positional
+#                                array [deviceId, epoch ms, heartRate, oxygenLevel,
+#                                bodyTemperature, steps]; a batch is an array of readings
+#   application/vnd.vitals.frame fixed 32-byte little-endian frames, a batch is frames
+#                                back to back (no header, no separators):
+#       16s device id (UTF-8, NUL padded) | q epoch ms | B heart rate | B SpO2
+#       | H body temperature x 100 | I steps
+#
+# msgpack timestamps may be epoch ms, the msgpack Timestamp extension or ISO strings.
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+VITAL_FRAME_MEDIA_TYPE = "application/vnd.vitals.frame"
+VITAL_FRAME = struct.Struct("<16sqBBHI")
+VITAL_POSITIONAL_FIELDS = ("deviceId", "timestamp", "heartRate", "oxygenLevel", "bodyTemperature", "steps")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _from_epoch_ms(ms: int) -> datetime:
+    """Epoch ms -> naive UTC datetime, like the rest of the service stores"""
+    try:
+        return _EPOCH + timedelta(milliseconds=ms)
+    except OverflowError:
+        raise ValidationException(f"Timestamp {ms} ms is out of range", field="body")
+
+
+def _unpack_msgpack(raw: bytes) -> Any:
+    try:
+        return msgpack.unpackb(raw, timestamp=3)  # Timestamp ext -> aware UTC datetime
+    except (ValueError, msgpack.UnpackException) as e:
+        raise ValidationException(f"Invalid MessagePack body ({type(e).__name__})", field="body")
+
+
+def _msgpack_reading(item: Any) -> Any:
+    """Positional array -> dict, epoch ms / Timestamp ext -> naive UTC // anything else is left for validation to reject"""
+    if isinstance(item, (list, tuple)) and len(item) == len(VITAL_POSITIONAL_FIELDS):
+        item = dict(zip(VITAL_POSITIONAL_FIELDS, item))
+    if isinstance(item, dict):
+        ts = item.get("timestamp")
+        if isinstance(ts, int) and not isinstance(ts, bool):
+            item["timestamp"] = _from_epoch_ms(ts)
+        elif isinstance(ts, datetime) and ts.tzinfo is not None:
+            item["timestamp"] = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return item
+
+
+def parse_vital_msgpack(raw: bytes) -> VitalDataInput:
+    """MessagePack body -> validated VitalDataInput"""
+    return VitalDataInput.model_validate(_msgpack_reading(_unpack_msgpack(raw)))
+
+
+def parse_vital_batch_msgpack(raw: bytes, max_items: Optional[int] = None) -> List[VitalDataInput]:
+    """MessagePack array body -> list of validated VitalDataInput"""
+    items = _unpack_msgpack(raw)
+    if not isinstance(items, list):
+        raise ValidationException("MessagePack batch must be an array of readings", field="body")
+    _check_batch_size(len(items), max_items)
+    return vital_batch_adapter.validate_python([_msgpack_reading(item) for item in items])
+
+
+def _frame_readings(raw: bytes, max_items: Optional[int] = None) -> List[dict]:
+    if len(raw) % VITAL_FRAME.size:
+        raise ValidationException(
+            f"Body is {len(raw)} bytes, not a whole number of {VITAL_FRAME.size}-byte frames",
+            field="body"
+        )
+    _check_batch_size(len(raw) // VITAL_FRAME.size, max_items)
+    try:
+        return [
+            {
+                "deviceId": device_id.rstrip(b"\0").decode("utf-8"),
+                "timestamp": _from_epoch_ms(ts_ms),
+                "heartRate": heart_rate,
+                "oxygenLevel": oxygen_level,
+                "bodyTemperature": temperature / 100,
+                "steps": steps,
+            }
+            for device_id, ts_ms, heart_rate, oxygen_level, temperature, steps in VITAL_FRAME.iter_unpack(raw)
+        ]
+    except UnicodeDecodeError:
+        raise ValidationException("Invalid vitals frame: device id is not UTF-8", field="body")
+
+
+def parse_vital_frame(raw: bytes) -> VitalDataInput:
+    """Exactly one 32-byte frame -> validated VitalDataInput"""
+    if len(raw) != VITAL_FRAME.size:
+        raise ValidationException(
+            f"Expected one {VITAL_FRAME.size}-byte frame, got {len(raw)} bytes (batches go to /data/batch)",
+            field="body"
+        )
+    return VitalDataInput.model_validate(_frame_readings(raw)[0])
+
+
+def parse_vital_frames(raw: bytes, max_items: Optional[int] = None) -> List[VitalDataInput]:
+    """Back-to-back 32-byte frames -> list of validated VitalDataInput"""
+    return vital_batch_adapter.validate_python(_frame_readings(raw, max_items))
 
 
 # --- Alerts ---
@@ -80,7 +235,16 @@ class AlertResponse(AlertBase):
 class AlertListResponse(BaseModel):
     """List of alerts"""
     items: list[AlertResponse]
-    total: int
+    total: Optional[int]              # None when not asked for
+    next_after: Optional[str] = None  # Pass back as ?after= for the next (older) page
+    has_more: bool = False
+
+
+class AlertChangesResponse(BaseModel):
+    """Alerts created or acknowledged since a cursor // oldest change first"""
+    items: list[AlertResponse]
+    cursor: str
+    has_more: bool
 
 
 # --- Thresholds ---
@@ -5,6 +5,15 @@ from domain.services.vital_service import (
     alert_service, AlertService,
     report_service, ReportService,
 )
+from domain.services.export_service import export_service, ExportJobService
+from domain.services.patient_stream_service import patient_feed, PatientChangeFeed
+from domain.services.patient_cache import patient_cache, PatientStateCache
+from domain.services.reading_buffer import recent_readings, RecentReadingsCache, ReadingRing
+from domain.services.archive_service import vital_archiver, VitalArchiver
+from domain.services.analytics_service import (
+    analytics_service, AnalyticsService,
+    analytics_snapshotter, AnalyticsSnapshotter,
+)
 
 __all__ = [
     "auth_service",
@@ -17,4 +26,19 @@ __all__ = [
     "AlertService",
     "report_service",
     "ReportService",
+    "export_service",
+    "ExportJobService",
+    "patient_feed",
+    "PatientChangeFeed",
+    "patient_cache",
+    "PatientStateCache",
+    "recent_readings",
+    "RecentReadingsCache",
+    "ReadingRing",
+    "vital_archiver",
+    "VitalArchiver",
+    "analytics_service",
+    "AnalyticsService",
+    "analytics_snapshotter",
+    "AnalyticsSnapshotter",
 ]
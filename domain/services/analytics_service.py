@@ -0,0 +1,220 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from domain.models.analytics import AnalyticsQuery, AnalyticsResult, AnalyticsTablesResponse
+from infrastructure.analytics.engine import AnalyticsEngine
+from infrastructure.analytics.snapshots import ParquetSnapshots
+from infrastructure.archive.segments import vital_archive
+from infrastructure.database.cursors import (
+    MIN_OBJECT_ID, DeltaCursor, decode_delta_cursor, encode_delta_cursor, delta_overlap,
+)
+from infrastructure.database.repositories.vital_repository import vital_repo, alert_repo
+from infrastructure.locks import try_file_lock
+from config.settings import get_settings
+from config.logging_config import get_logger
+
+logger = get_logger("services.analytics")
+
+SNAPSHOT_BATCH = 5000
+EPOCH = datetime(1970, 1, 1)
+ONE_DAY = timedelta(days=1)
+
+
+class AnalyticsSnapshotter:
+    """
+    Copies vitals and alerts into Parquet (infrastructure/analytics) every
+    ANALYTICS_SNAPSHOT_INTERVAL_SECONDS, so analytics queries never touch the database
+
+    Incremental: vitals are read from where the last pass stopped ((created_at, _id)
+    delta cursor, so late writes within DELTA_OVERLAP_SECONDS aren't skipped),
+    alerts by their last change. The first pass also copies the cold vitals
+    archive. One worker snapshots at a time (flock on the snapshot dir).
+    """
+
+    def __init__(self, snapshots: ParquetSnapshots):
+        self.snapshots = snapshots
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        interval = get_settings().analytics_snapshot_interval_seconds
+        if interval > 0:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.snapshots.close)
+
+    async def _loop(self, interval: int):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analytics snapshot failed: {e}", extra={
+                    "error": str(e),
+                    "operation": "analytics_snapshot"
+                }, exc_info=True)
+            await asyncio.sleep(interval)
+
+    async def run_once(self) -> Optional[dict]:
+        """One snapshot pass // returns what it copied, None if another worker is on it"""
+        with try_file_lock(os.path.join(self.snapshots.root, ".lock")) as acquired:
+            if not acquired:
+                return None
+            started = datetime.utcnow()
+            state = await asyncio.to_thread(self.snapshots.load_state)
+            copied = {"archived": 0, "vitals": 0, "alert_days": 0}
+
+            not_before = None
+            if "vitals" not in state:
+                # First pass: the archive holds everything before its watermark
+                copied["archived"] = await asyncio.to_thread(self._copy_archive)
+                not_before = vital_archive.watermark
+            copied["vitals"] = await self._copy_vitals(state, not_before, started)
+            copied["alert_days"] = await self._copy_alerts(state)
+
+            state["snapshot_at"] = datetime.utcnow().isoformat()
+            await asyncio.to_thread(self.snapshots.save_state, state)
+            await asyncio.to_thread(self.snapshots.compact_vitals, datetime.utcnow().date())
+
+        logger.info(f"Analytics snapshot: {copied['vitals'] + copied['archived']} readings", extra={
+            **copied,
+            "operation": "analytics_snapshot"
+        })
+        return copied
+
+    def _copy_archive(self) -> int:
+        copied = 0
+        for _, rows in vital_archive.iter_days():
+            self.snapshots.append_vitals(rows)
+            copied += len(rows)
+        return copied
+
+    async def _copy_vitals(self, state: dict, not_before: Optional[datetime], started: datetime) -> int:
+        overlap = delta_overlap()
+        if "vitals" in state:
+            delta = decode_delta_cursor(state["vitals"])
+        else:
+            delta = DeltaCursor((datetime.min, MIN_OBJECT_ID), (datetime.min, MIN_OBJECT_ID))
+        copied = 0
+        while True:
+            rows = await vital_repo.find_changed_since(
+                delta.floor, limit=delta.fetch_limit(SNAPSHOT_BATCH), not_before=not_before
+            )
+            # Every seen row is kept - this cursor lives in the state file, not a URL
+            rows, has_more, delta = delta.advance(rows, "created_at", SNAPSHOT_BATCH, overlap, max_seen=None)
+            if not rows:
+                break
+            await asyncio.to_thread(self.snapshots.append_vitals, rows)
+            copied += len(rows)
+            # Saved per batch - a crash re-copies at most one batch
+            state["vitals"] = encode_delta_cursor(delta)
+            await asyncio.to_thread(self.snapshots.save_state, state)
+            if not has_more:
+                break
+        if "vitals" not in state:
+            # Nothing live on the first pass - carry on from readings stored after it began
+            start = (started - overlap, MIN_OBJECT_ID)
+            state["vitals"] = encode_delta_cursor(DeltaCursor(start, start))
+        return copied
+
+    async def _copy_alerts(self, state: dict) -> int:
+        """Rewrite every day that has new or acknowledged alerts"""
+        if "alerts" in state:
+            delta = decode_delta_cursor(state["alerts"])
+        else:
+            delta = DeltaCursor((EPOCH, MIN_OBJECT_ID), (EPOCH, MIN_OBJECT_ID))
+        overlap = delta_overlap()
+        days = set()
+        while True:
+            changed = await alert_repo.find_changed_since(delta.floor, limit=delta.fetch_limit(SNAPSHOT_BATCH))
+            changed, has_more, delta = delta.advance(changed, "modified_at", SNAPSHOT_BATCH, overlap, max_seen=None)
+            days.update(a["created_at"].date() for a in changed)
+            if not has_more:
+                break
+        for day in sorted(days):
+            start = datetime(day.year, day.month, day.day)
+            rows = await alert_repo.find_created_between(start, start + ONE_DAY)
+            await asyncio.to_thread(self.snapshots.write_alerts_day, day, rows)
+        state["alerts"] = encode_delta_cursor(delta)
+        return len(days)
+
+
+class AnalyticsService:
+    """
+    Read-only SQL over the snapshots // a few queries at a time, each with
+    a row cap and a timeout (DuckDB is interrupted, not just abandoned)
+    """
+
+    def __init__(self, engine: AnalyticsEngine, snapshots: ParquetSnapshots):
+        self.engine = engine
+        self.snapshots = snapshots
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(get_settings().analytics_max_concurrent_queries)
+        return self._semaphore
+
+    async def _snapshot_at(self) -> Optional[datetime]:
+        state = await asyncio.to_thread(self.snapshots.load_state)
+        return datetime.fromisoformat(state["snapshot_at"]) if "snapshot_at" in state else None
+
+    async def query(self, request: AnalyticsQuery) -> AnalyticsResult:
+        """
+        Run one parameterized SELECT
+        Raises: AnalyticsQueryError, AnalyticsTimeoutError
+        """
+        settings = get_settings()
+        max_rows = min(request.max_rows or settings.analytics_max_rows, settings.analytics_max_rows)
+        async with self._get_semaphore():
+            columns, rows, truncated, elapsed_ms = await asyncio.to_thread(
+                self.engine.execute,
+                request.sql,
+                request.params,
+                max_rows,
+                settings.analytics_query_timeout_seconds
+            )
+        logger.info(f"Analytics query returned {len(rows)} rows in {elapsed_ms}ms", extra={
+            "rows": len(rows),
+            "truncated": truncated,
+            "elapsed_ms": elapsed_ms,
+            "operation": "analytics_query"
+        })
+        return AnalyticsResult.model_construct(
+            columns=columns,
+            rows=rows,
+            row_count=len(rows),
+            truncated=truncated,
+            elapsed_ms=elapsed_ms,
+            snapshot_at=await self._snapshot_at()
+        )
+
+    async def tables(self) -> AnalyticsTablesResponse:
+        """Queryable tables + columns"""
+        tables = await asyncio.to_thread(self.engine.tables)
+        return AnalyticsTablesResponse(tables=tables, snapshot_at=await self._snapshot_at())
+
+    async def shutdown(self):
+        await asyncio.to_thread(self.engine.close)
+
+
+# Singleton instances // both sides share ANALYTICS_DIR
+_settings = get_settings()
+parquet_snapshots = ParquetSnapshots(_settings.analytics_dir)
+analytics_snapshotter = AnalyticsSnapshotter(parquet_snapshots)
+analytics_service = AnalyticsService(
+    AnalyticsEngine(
+        _settings.analytics_dir,
+        threads=_settings.analytics_threads,
+        memory_limit=_settings.analytics_memory_limit
+    ),
+    parquet_snapshots
+)
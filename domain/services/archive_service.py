@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bson import ObjectId
+
+from infrastructure.archive.segments import vital_archive, VitalArchive, day_start
+from infrastructure.database.repositories.vital_repository import vital_repo
+from config.settings import get_settings
+from config.logging_config import get_logger
+
+logger = get_logger("services.archive")
+
+ONE_DAY = timedelta(days=1)
+DELETE_CHUNK = 5000
+
+
+class VitalArchiver:
+    """
+    Moves vitals older than archive_after_hours out of the database into
+    per-patient day segments (infrastructure/archive)
+
+    A pass, under a cross-process lock so one worker archives at a time:
+      1. every whole UTC day before the cutoff goes into its segment files
+      2. the cutoff is published as the archive watermark
+      3. live readings before the *previous* watermark are deleted
+    Deleting one pass late gives the other workers an interval to pick up the
+    new watermark (they refresh every pass), so none of them reads a window
+    that's gone from the database but not yet visible in its archive view.
+    """
+
+    def __init__(self, archive: VitalArchive):
+        self.archive = archive
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load the segment directory // archiving loop only if ARCHIVE_AFTER_HOURS is set"""
+        segments = await asyncio.to_thread(self.archive.load)
+        logger.info(f"Vitals archive loaded with {segments} segments", extra={
+            "segments": segments,
+            "watermark": self.archive.watermark.isoformat() if self.archive.watermark else None,
+            "event": "archive_loaded"
+        })
+        if get_settings().archive_after_hours > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Start of the UTC day archive_after_hours ago - only whole days get archived"""
+        now = now or datetime.utcnow()
+        return day_start((now - timedelta(hours=get_settings().archive_after_hours)).date())
+
+    async def _loop(self):
+        interval = max(1, get_settings().archive_interval_seconds)
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Archive pass failed: {e}", extra={
+                    "error": str(e),
+                    "operation": "archive_pass"
+                }, exc_info=True)
+            await asyncio.sleep(interval)
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """One archiving pass // returns readings deleted from the database"""
+        with self.archive.writer_lock() as acquired:
+            if not acquired:
+                await asyncio.to_thread(self.archive.refresh)
+                return 0
+            await asyncio.to_thread(self.archive.refresh)
+
+            previous = self.archive.watermark
+            cutoff = self.cutoff(now)
+            if previous is not None and cutoff < previous:
+                cutoff = previous  # ARCHIVE_AFTER_HOURS went up - don't un-archive days
+
+            archived_ids: List[ObjectId] = []
+            patients = await vital_repo.find_patients_before(cutoff)
+            for patient_id, oldest in patients.items():
+                archived_ids += await self._archive_patient(patient_id, oldest, cutoff, previous)
+
+            if patients:
+                await asyncio.to_thread(self.archive.publish, cutoff)
+
+            deleted = 0
+            for start in range(0, len(archived_ids), DELETE_CHUNK):
+                deleted += await vital_repo.delete_by_ids(archived_ids[start:start + DELETE_CHUNK])
+
+        if patients or deleted:
+            logger.info(f"Archived {len(patients)} patients up to {cutoff.isoformat()}", extra={
+                "patients": len(patients),
+                "deleted": deleted,
+                "watermark": cutoff.isoformat(),
+                "operation": "archive_pass"
+            })
+        return deleted
+
+    async def _archive_patient(
+        self,
+        patient_id: str,
+        oldest: datetime,
+        cutoff: datetime,
+        previous: Optional[datetime]
+    ) -> List[ObjectId]:
+        """Write the patient's days before cutoff // ids safe to delete (older than previous watermark)"""
+        deletable = []
+        day = day_start(oldest.date())
+        while day < cutoff:
+            end = min(day + ONE_DAY, cutoff)
+            rows = await vital_repo.find_by_patient_between(patient_id, day, end)
+            if rows:
+                await asyncio.to_thread(self.archive.write_day, patient_id, day.date(), rows)
+                if previous is not None:
+                    deletable += [r["_id"] for r in rows if r["timestamp"] < previous]
+            # Skip empty days in one index seek
+            next_ts = await vital_repo.find_oldest_between(patient_id, end, cutoff)
+            if next_ts is None:
+                break
+            day = day_start(next_ts.date())
+        return deletable
+
+
+# Singleton
+vital_archiver = VitalArchiver(vital_archive)
@@ -0,0 +1,344 @@
+import asyncio
+import csv
+import glob
+import io
+import os
+import re
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+import orjson
+
+from domain.models.export import ExportJobCreate, ExportJobResponse
+from domain.exceptions.custom_exceptions import (
+    ExportJobNotFoundError,
+    ExportJobNotReadyError,
+)
+from domain.services.vital_service import report_service
+from infrastructure.database.raw_bson import decode_rows
+from config.constants import ExportJobStatus
+from config.settings import get_settings
+from config.logging_config import get_logger
+
+logger = get_logger("services.export")
+
+
+# Same columns as GET /api/reports/export
+CSV_HEADER = [
+    "patient_id",
+    "heart_rate",
+    "oxygen_level",
+    "body_temperature",
+    "steps",
+    "timestamp"
+]
+
+
+def format_csv_row(reading: dict) -> list:
+    """Mongo vital doc -> CSV row"""
+    return [
+        reading.get("patient_id", ""),
+        reading.get("heart_rate", 0),
+        reading.get("oxygen_level", 0),
+        reading.get("body_temperature", 0),
+        reading.get("steps", 0),
+        reading.get("timestamp", "").isoformat() if reading.get("timestamp") else ""
+    ]
+
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+JOB_DATETIME_FIELDS = ("created_at", "completed_at", "expires_at")
+
+
+@dataclass
+class ExportJob:
+    """Export job record // kept in memory by the worker running it, mirrored to <job_id>.json"""
+    job_id: str
+    window_minutes: int
+    patient_id: Optional[str]
+    format: str
+    status: str
+    created_at: datetime
+    file_path: str
+    rows_written: int = 0
+    size_bytes: Optional[int] = None
+    completed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    @property
+    def params_key(self) -> Tuple[int, Optional[str], str]:
+        return (self.window_minutes, self.patient_id, self.format)
+
+    @property
+    def record_path(self) -> str:
+        return os.path.splitext(self.file_path)[0] + ".json"
+
+    @classmethod
+    def from_record(cls, record: dict) -> "ExportJob":
+        for field in JOB_DATETIME_FIELDS:
+            if record.get(field) is not None:
+                record[field] = datetime.fromisoformat(record[field])
+        return cls(**record)
+
+
+class ExportJobService:
+    """
+    Export job service layer
+    Runs long CSV exports in the background and keeps the files on local disk
+    so clients can poll and download (with resume) instead of holding a worker
+
+    Every job's record is written next to its file (EXPORT_DIR/<job_id>.json), so
+    a poll or download that lands on another worker finds it - as long as the
+    workers share EXPORT_DIR. Reusing a job for identical params is per worker.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, ExportJob] = {}
+        # Params -> job_id, so identical requests reuse the same file
+        self._by_params: Dict[Tuple[int, Optional[str], str], str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def export_dir(self) -> str:
+        return get_settings().export_dir
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(get_settings().export_max_concurrent_jobs)
+        return self._semaphore
+
+    async def submit(self, request: ExportJobCreate) -> ExportJobResponse:
+        """
+        Submit an export job // returns immediately with the job id
+        Reuses a pending/running/completed job with identical params until it expires
+        """
+        await self.purge_expired()
+
+        key = (request.window_minutes, request.patient_id, request.format)
+        existing_id = self._by_params.get(key)
+        if existing_id:
+            existing = self._jobs.get(existing_id)
+            if existing and existing.status != ExportJobStatus.FAILED:
+                logger.info(f"Reusing export job {existing_id}", extra={
+                    "job_id": existing_id,
+                    "status": existing.status,
+                    "operation": "submit_export_job"
+                })
+                return self._to_response(existing)
+
+        job_id = uuid.uuid4().hex
+        job = ExportJob(
+            job_id=job_id,
+            window_minutes=request.window_minutes,
+            patient_id=request.patient_id,
+            format=request.format,
+            status=ExportJobStatus.PENDING,
+            created_at=datetime.utcnow(),
+            file_path=os.path.join(self.export_dir, f"{job_id}.{request.format}")
+        )
+        self._jobs[job_id] = job
+        self._by_params[key] = job_id
+        await aiofiles.os.makedirs(self.export_dir, exist_ok=True)
+        await self._save(job)
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+        logger.info(f"Export job {job_id} submitted", extra={
+            "job_id": job_id,
+            "window_minutes": request.window_minutes,
+            "patient_id": request.patient_id,
+            "operation": "submit_export_job"
+        })
+        return self._to_response(job)
+
+    async def get_job(self, job_id: str) -> ExportJobResponse:
+        """
+        Get job status
+        Raises: ExportJobNotFoundError
+        """
+        return self._to_response(await self._get(job_id))
+
+    async def get_download(self, job_id: str) -> Tuple[str, int]:
+        """
+        Get finished file path + size for download
+        Raises: ExportJobNotFoundError, ExportJobNotReadyError
+        """
+        job = await self._get(job_id)
+        if job.status != ExportJobStatus.COMPLETED:
+            raise ExportJobNotReadyError(job_id, job.status)
+        return job.file_path, job.size_bytes or 0
+
+    async def purge_expired(self):
+        """Drop expired jobs (any worker's, from their records) and delete their files"""
+        now = datetime.utcnow()
+        jobs = {j.job_id: j for j in await asyncio.to_thread(self._load_all)}
+        jobs.update(self._jobs)
+        expired = [
+            j for j in jobs.values()
+            if j.expires_at is not None and j.expires_at <= now
+        ]
+        for job in expired:
+            self._forget(job)
+            await self._remove_quietly(job.file_path)
+            await self._remove_quietly(job.record_path)
+            logger.info(f"Export job {job.job_id} expired", extra={
+                "job_id": job.job_id,
+                "operation": "purge_export_job"
+            })
+
+    async def shutdown(self):
+        """Cancel any running jobs // called on app shutdown"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _get(self, job_id: str) -> ExportJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Submitted on another worker?
+            job = await self._load(job_id)
+        if job is None:
+            raise ExportJobNotFoundError(job_id)
+        if job.expires_at is not None and job.expires_at <= datetime.utcnow():
+            raise ExportJobNotFoundError(job_id)
+        return job
+
+    def _forget(self, job: ExportJob):
+        self._jobs.pop(job.job_id, None)
+        if self._by_params.get(job.params_key) == job.job_id:
+            del self._by_params[job.params_key]
+
+    async def _run(self, job: ExportJob):
+        """Background worker // writes the CSV to disk in chunks"""
+        settings = get_settings()
+        tmp_path = f"{job.file_path}.part"
+
+        async with self._get_semaphore():
+            job.status = ExportJobStatus.RUNNING
+            try:
+                await aiofiles.os.makedirs(self.export_dir, exist_ok=True)
+
+                await self._save(job)
+
+                async with aiofiles.open(tmp_path, mode="w", newline="") as f:
+                    await f.write(self._encode_rows([CSV_HEADER]))
+                    # Raw rows, a chunk at a time straight off the cursor - each row
+                    # is decoded only when its CSV line is written
+                    async for chunk in report_service.iter_readings_for_export(
+                        window_minutes=job.window_minutes,
+                        patient_id=job.patient_id,
+                        raw=True,
+                        batch_size=max(1, settings.export_chunk_rows)
+                    ):
+                        await f.write(self._encode_rows([format_csv_row(r) for r in decode_rows(chunk)]))
+                        job.rows_written += len(chunk)
+                        await self._save(job)  # progress for polls on other workers
+
+                # Only expose the file once it's complete
+                await aiofiles.os.replace(tmp_path, job.file_path)
+                stat = await aiofiles.os.stat(job.file_path)
+
+                job.size_bytes = stat.st_size
+                job.completed_at = datetime.utcnow()
+                job.expires_at = job.completed_at + timedelta(minutes=settings.export_job_ttl_minutes)
+                job.status = ExportJobStatus.COMPLETED
+                await self._save(job)
+
+                logger.info(f"Export job {job.job_id} completed", extra={
+                    "job_id": job.job_id,
+                    "rows_written": job.rows_written,
+                    "size_bytes": job.size_bytes,
+                    "operation": "run_export_job"
+                })
+            except asyncio.CancelledError:
+                self._forget(job)
+                await self._remove_quietly(tmp_path)
+                await self._remove_quietly(job.record_path)
+                raise
+            except Exception as e:
+                job.status = ExportJobStatus.FAILED
+                job.error = str(e)
+                job.completed_at = datetime.utcnow()
+                # Keep failed jobs around long enough for the client to see why
+                job.expires_at = job.completed_at + timedelta(minutes=settings.export_job_ttl_minutes)
+                await self._remove_quietly(tmp_path)
+                await self._save(job)
+                logger.error(f"Export job {job.job_id} failed: {e}", extra={
+                    "job_id": job.job_id,
+                    "error": str(e),
+                    "operation": "run_export_job"
+                }, exc_info=True)
+
+    async def _save(self, job: ExportJob):
+        """Write the job's record (atomic rename, readers never see half a file)"""
+        tmp_path = f"{job.record_path}.{os.getpid()}.tmp"
+        async with aiofiles.open(tmp_path, mode="wb") as f:
+            await f.write(orjson.dumps(asdict(job)))
+        await aiofiles.os.replace(tmp_path, job.record_path)
+
+    async def _load(self, job_id: str) -> Optional[ExportJob]:
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None  # never turn a path segment from the URL into a file path
+        try:
+            async with aiofiles.open(os.path.join(self.export_dir, f"{job_id}.json"), mode="rb") as f:
+                return ExportJob.from_record(orjson.loads(await f.read()))
+        except FileNotFoundError:
+            return None
+
+    def _load_all(self) -> List[ExportJob]:
+        jobs = []
+        for path in glob.glob(os.path.join(self.export_dir, "*.json")):
+            try:
+                with open(path, "rb") as f:
+                    jobs.append(ExportJob.from_record(orjson.loads(f.read())))
+            except (FileNotFoundError, ValueError, TypeError):
+                continue  # purged by another worker meanwhile / not a job record
+        return jobs
+
+    @staticmethod
+    def _encode_rows(rows: List[list]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    @staticmethod
+    async def _remove_quietly(path: str):
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _to_response(job: ExportJob) -> ExportJobResponse:
+        download_url = None
+        if job.status == ExportJobStatus.COMPLETED:
+            download_url = f"/api/reports/export/jobs/{job.job_id}/download"
+        return ExportJobResponse(
+            job_id=job.job_id,
+            status=job.status,
+            window_minutes=job.window_minutes,
+            patient_id=job.patient_id,
+            format=job.format,
+            rows_written=job.rows_written,
+            size_bytes=job.size_bytes,
+            created_at=job.created_at,
+            completed_at=job.completed_at,
+            expires_at=job.expires_at,
+            download_url=download_url,
+            error=job.error
+        )
+
+
+# Singleton instance
+export_service = ExportJobService()
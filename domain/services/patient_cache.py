@@ -0,0 +1,160 @@
+import asyncio
+import bisect
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from domain.exceptions.custom_exceptions import SubscriberLaggingError
+from infrastructure.database.repositories.patient_repository import patient_repo
+from infrastructure.pubsub.broadcaster import broadcaster, VitalUpdate, VITALS_CHANNEL
+from config.logging_config import get_logger
+
+logger = get_logger("services.patient_cache")
+
+
+class PatientStateCache:
+    """
+    Write-through in-process cache of every patient's latest state
+
+    - warmed from Mongo at startup (warm())
+    - ingest_vital_data writes through it right after the Mongo write
+    - other workers' ingests arrive as VitalUpdates on the vitals channel
+      (unknown patients are fetched once from Mongo)
+    Docs are kept in the Mongo shape; order is by _id (= creation order, same as
+    the old unsorted find()), so pages are stable. Until warm() succeeds, callers
+    fall back to Mongo (ready is False).
+    """
+
+    def __init__(self):
+        self._docs: Dict[str, dict] = {}   # patient_id -> doc
+        self._order: List[tuple] = []      # sorted (str(_id), patient_id)
+        self._active = 0                   # docs with last_update set
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def warm(self):
+        """Load every patient // call on startup, after connect_db"""
+        docs = await patient_repo.find_all_ordered()
+        self._docs.clear()
+        self._order.clear()
+        self._active = 0
+        for doc in docs:
+            self._put(doc)
+        self.ready = True
+        logger.info(f"Patient cache warmed with {len(docs)} patients", extra={
+            "patients": len(docs),
+            "event": "patient_cache_warmed"
+        })
+
+    async def start(self):
+        """Follow other workers' ingests // call after warm()"""
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # --- reads ---
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def get(self, patient_id: str) -> Optional[dict]:
+        return self._docs.get(patient_id)
+
+    def page(self, skip: int, limit: int) -> List[dict]:
+        return [self._docs[pid] for _, pid in self._order[skip:skip + limit]]
+
+    def page_after(self, after_id: str, limit: int) -> List[dict]:
+        """Keyset page: patients after that _id (same order as page())"""
+        start = bisect.bisect_right(self._order, (after_id, "\U0010ffff"))
+        return [self._docs[pid] for _, pid in self._order[start:start + limit]]
+
+    def all(self) -> List[dict]:
+        return [self._docs[pid] for _, pid in self._order]
+
+    def count_active(self) -> int:
+        """Same as patient_repo.count_active (last_update set)"""
+        return self._active
+
+    # --- writes ---
+
+    def _put(self, doc: dict):
+        previous = self._docs.get(doc["patient_id"])
+        if previous is None:
+            bisect.insort(self._order, (str(doc["_id"]), doc["patient_id"]))
+        elif previous.get("last_update") is not None:
+            self._active -= 1
+        self._docs[doc["patient_id"]] = doc
+        if doc.get("last_update") is not None:
+            self._active += 1
+
+    def apply_ingest(
+        self,
+        patient_id: str,
+        doc_id: str,
+        heart_rate: int,
+        oxygen_level: int,
+        body_temp: float,
+        steps: int,
+        status: str,
+        last_update: datetime
+    ):
+        """Write-through after ingest_vital_data's Mongo writes // last_update = what Mongo got"""
+        doc = dict(self._docs.get(patient_id) or {
+            "_id": doc_id,
+            "patient_id": patient_id,
+            "patient_name": f"Patient {patient_id}",
+            "created_at": last_update,
+        })
+        doc.update(
+            last_heart_rate=heart_rate,
+            last_oxygen_level=oxygen_level,
+            last_body_temperature=body_temp,
+            last_steps=steps,
+            status=status,
+            last_update=last_update
+        )
+        self._put(doc)
+
+    async def _follow(self):
+        while True:
+            try:
+                async for update in broadcaster.subscribe(VITALS_CHANNEL, maxsize=0):
+                    if isinstance(update, VitalUpdate):
+                        await self._apply_update(update)
+            except SubscriberLaggingError:
+                logger.warning("Patient cache resubscribing", extra={
+                    "event": "patient_cache_resubscribe"
+                })
+
+    async def _apply_update(self, update: VitalUpdate):
+        doc = self._docs.get(update.patient_id)
+        if doc is None:
+            # Created by another worker - it's in Mongo by the time the update is published
+            doc = await patient_repo.find_by_patient_id(update.patient_id)
+            if doc is None:
+                return
+            self._put(doc)
+            return
+
+        if update.last_update is None or update.last_update <= (doc.get("last_update") or datetime.min):
+            # Our own ingest (already applied by apply_ingest) or older than what we hold
+            return
+
+        doc = dict(doc)
+        doc.update(
+            last_heart_rate=update.heart_rate,
+            last_oxygen_level=update.oxygen_level,
+            last_body_temperature=update.body_temperature,
+            last_steps=update.steps,
+            last_update=update.last_update  # the publisher's Mongo value - ETags agree across workers
+        )
+        if update.patient_status is not None:
+            doc["status"] = update.patient_status
+        self._put(doc)
+
+
+# Singleton instance
+patient_cache = PatientStateCache()
@@ -1,13 +1,38 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, List, Optional
 
-from domain.models.patient import PatientResponse, PatientListResponse
+from domain.models.patient import PatientResponse, PatientListResponse, PatientChangesResponse
 from domain.exceptions.custom_exceptions import PatientNotFoundError
 from infrastructure.database.repositories.patient_repository import patient_repo
+from infrastructure.database.cursors import (
+    decode_cursor, page_token, start_delta, encode_delta_cursor, delta_overlap,
+)
+from infrastructure.database.projections import to_projection
+from domain.services.patient_cache import patient_cache
 from config.logging_config import get_logger
 
 logger = get_logger("services.patient")
 
 
+# What a patient list reads from Mongo by default - created_at etc. stay on the server
+PATIENT_FIELDS = tuple(PatientResponse.model_fields)
+
+
+def _to_patient_response(p: dict) -> PatientResponse:
+    """MongoDB doc (maybe projected) -> PatientResponse // trusted data, skips validation"""
+    return PatientResponse.model_construct(
+        id=str(p["_id"]),  # MongoDB ObjectId to string
+        patient_id=p.get("patient_id"),
+        patient_name=p.get("patient_name", "Unknown"),  # Fallback if missing
+        status=p.get("status", "OK"),                   # Default to OK
+        last_heart_rate=p.get("last_heart_rate"),
+        last_oxygen_level=p.get("last_oxygen_level"),
+        last_body_temperature=p.get("last_body_temperature"),
+        last_steps=p.get("last_steps"),
+        last_update=p.get("last_update")
+    )
+
+
 class PatientService:
     """
     Patient service layer - handles all patient-related business logic
@@ -17,71 +42,126 @@ class PatientService:
     async def get_all_patients(
         self,
         page: int = 1,        # Which page (starts at 1, not 0 - user friendly)
-        page_size: int = 20   # How many per page (20 seems reasonable)
+        page_size: int = 20,  # How many per page (20 seems reasonable)
+        after: Optional[str] = None,
+        include_total: bool = True,
+        fields: Optional[Iterable[str]] = None
     ) -> PatientListResponse:
         """ 
         Returns a paginated response so the frontend doesn't crash
         when we have thousands of patients ( we won't get there with this demo but still useful)
+        after = next_after token from the previous page (keyset, page is ignored)
+        fields = PatientResponse fields to read from Mongo (others come back empty)
+        Raises: InvalidCursorError
         """
         logger.debug(f"Getting patients page {page} with page_size {page_size}", extra={
             "page": page,
             "page_size": page_size,
+            "keyset": after is not None,
             "operation": "get_all_patients"
         })
-        
+
+        after_id = decode_cursor(after)[1] if after else None
         skip = (page - 1) * page_size  # Convert page number to skip count
-        patients = await patient_repo.find_all(skip=skip, limit=page_size)
-        total = await patient_repo.count_all()  # For pagination info
-        
-        logger.info(f"Retrieved {len(patients)} patients from database", extra={
+        total = None
+        if patient_cache.ready:
+            # Latest state lives in memory - no Mongo round trip per table refresh
+            if after_id is not None:
+                patients = patient_cache.page_after(str(after_id), page_size + 1)
+            else:
+                patients = patient_cache.page(skip, page_size + 1)
+            total = len(patient_cache)  # free here, so always filled in
+        else:
+            # One extra row tells us whether there's a next page
+            patients = await patient_repo.find_all(
+                skip=skip,
+                limit=page_size + 1,
+                after_id=after_id,
+                projection=to_projection(fields or PATIENT_FIELDS, always=("id",))
+            )
+            if include_total:
+                total = await patient_repo.count_all()  # For pagination info
+
+        has_more = len(patients) > page_size
+        patients = patients[:page_size]
+
+        logger.info(f"Retrieved {len(patients)} patients", extra={
             "patients_count": len(patients),
             "total_patients": total,
             "page": page,
             "operation": "get_all_patients"
         })
 
-        items = []  # Build our response list
-        for p in patients:
-            # Convert MongoDB doc to our response model
-            items.append(PatientResponse(
-                id=str(p["_id"]),  # MongoDB ObjectId to string
-                patient_id=p["patient_id"],
-                patient_name=p.get("patient_name", "Unknown"),  # Fallback if missing
-                status=p.get("status", "OK"),                   # Default to OK
-                last_heart_rate=p.get("last_heart_rate"),
-                last_oxygen_level=p.get("last_oxygen_level"),
-                last_body_temperature=p.get("last_body_temperature"),
-                last_steps=p.get("last_steps"),
-                last_update=p.get("last_update")
-            ))
-
-        return PatientListResponse(
+        # Convert MongoDB docs to our response model
+        items = [_to_patient_response(p) for p in patients]
+
+        # Docs come from our own writes - no need to re-validate every row
+        return PatientListResponse.model_construct(
             items=items,
             total=total,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_after=page_token(patients[-1]) if has_more else None,
+            has_more=has_more
+        )
+
+    async def count_patients(self) -> int:
+        """Total patients // for GraphQL totalCount, only when selected"""
+        if patient_cache.ready:
+            return len(patient_cache)
+        return await patient_repo.count_all()
+
+    async def get_patients_since(
+        self,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100
+    ) -> PatientChangesResponse:
+        """
+        Patients updated after cursor (or since) // dashboards poll this instead of full pages
+        Nothing changed -> empty items + the same cursor
+        Late writes within DELTA_OVERLAP_SECONDS are still delivered (cursors.py)
+        Raises: InvalidCursorError
+        """
+        delta = start_delta(cursor, since)
+        patients = await patient_repo.find_changed_since(delta.floor, limit=delta.fetch_limit(limit))
+        patients, has_more, delta = delta.advance(patients, "last_update", limit, delta_overlap())
+
+        return PatientChangesResponse.model_construct(
+            items=[_to_patient_response(p) for p in patients],
+            cursor=encode_delta_cursor(delta),
+            has_more=has_more
         )
 
+    async def get_all_patients_snapshot(self, batch_size: int = 500) -> List[PatientResponse]:
+        """Every patient, fetched in batches // full snapshot for the SSE stream"""
+        if patient_cache.ready:
+            return [_to_patient_response(p) for p in patient_cache.all()]
+        items: List[PatientResponse] = []
+        after_id = None
+        while True:
+            patients = await patient_repo.find_all(
+                limit=batch_size,
+                after_id=after_id,
+                projection=to_projection(PATIENT_FIELDS)
+            )
+            items.extend(_to_patient_response(p) for p in patients)
+            if len(patients) < batch_size:
+                return items
+            after_id = patients[-1]["_id"]
+
     async def get_patient_by_id(self, patient_id: str) -> PatientResponse:
         """
         Get single patient by patient_id
         Raises: PatientNotFoundError if not found
         """
-        patient = await patient_repo.find_by_patient_id(patient_id)
+        patient = patient_cache.get(patient_id) if patient_cache.ready else None
+        if patient is None:
+            patient = await patient_repo.find_by_patient_id(patient_id)
         if patient is None:
             raise PatientNotFoundError(patient_id)
 
-        return PatientResponse(
-            id=str(patient["_id"]),
-            patient_id=patient["patient_id"],
-            patient_name=patient.get("patient_name", "Unknown"),
-            status=patient.get("status", "OK"),
-            last_heart_rate=patient.get("last_heart_rate"),
-            last_oxygen_level=patient.get("last_oxygen_level"),
-            last_body_temperature=patient.get("last_body_temperature"),
-            last_steps=patient.get("last_steps"),
-            last_update=patient.get("last_update")
-        )
+        return _to_patient_response(patient)
 
     async def ensure_patient_exists(self, patient_id: str, name: str = None) -> str:
         """
@@ -115,6 +195,8 @@ class PatientService:
 
     async def get_monitored_count(self) -> int:
         """Get count of patients with recent updates"""
+        if patient_cache.ready:
+            return patient_cache.count_active()
         return await patient_repo.count_active()
 
 
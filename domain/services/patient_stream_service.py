@@ -0,0 +1,126 @@
+import asyncio
+import itertools
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from domain.exceptions.custom_exceptions import SubscriberLaggingError
+from infrastructure.pubsub.broadcaster import broadcaster, VitalUpdate, VITALS_CHANNEL
+from config.settings import get_settings
+from config.logging_config import get_logger
+
+logger = get_logger("services.patient_stream")
+
+
+@dataclass
+class PatientChange:
+    """One changed patient row // partial PatientResponse"""
+    seq: int
+    row: dict
+
+
+class PatientChangeFeed:
+    """
+    Patient row changes for the SSE stream (GET /api/patients/stream)
+
+    Consumes the broadcaster's vitals channel - the broadcast_vital publish point -
+    numbers every change and keeps the last N in a ring buffer, so a client
+    reconnecting with Last-Event-ID gets what it missed instead of a new snapshot.
+    Clients wait on one shared future rather than holding a queue each.
+
+    Event ids are "<feed id>-<seq>"; the feed id changes on restart, which makes
+    old ids unknown and sends the client a fresh snapshot.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.feed_id = uuid.uuid4().hex[:8]
+        self._changes: Deque[PatientChange] = deque(maxlen=max(1, buffer_size))
+        self._seq = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def seq(self) -> int:
+        """Seq of the newest change"""
+        return self._seq
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.feed_id}-{seq}"
+
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """Last-Event-ID -> seq, or None if it isn't one of ours"""
+        if not event_id:
+            return None
+        feed_id, _, seq = event_id.partition("-")
+        if feed_id != self.feed_id or not seq.isdigit():
+            return None
+        return int(seq)
+
+    async def start(self):
+        """Start consuming vitals // call on app startup"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                # Unbounded: we only append to a deque, so we never fall behind
+                async for update in broadcaster.subscribe(VITALS_CHANNEL, maxsize=0):
+                    if isinstance(update, VitalUpdate):
+                        self._append(update)
+            except SubscriberLaggingError:
+                logger.warning("Patient change feed resubscribing", extra={
+                    "event": "patient_feed_resubscribe"
+                })
+
+    def _append(self, update: VitalUpdate):
+        self._seq += 1
+        row = {
+            "patient_id": update.patient_id,
+            "last_heart_rate": update.heart_rate,
+            "last_oxygen_level": update.oxygen_level,
+            "last_body_temperature": update.body_temperature,
+            "last_steps": update.steps,
+            "last_update": update.last_update or datetime.utcnow(),  # what the patient doc got on ingest
+        }
+        if update.patient_status is not None:
+            row["status"] = update.patient_status
+        self._changes.append(PatientChange(seq=self._seq, row=row))
+
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+        self._waiter = None
+
+    def changes_since(self, seq: int) -> Optional[List[PatientChange]]:
+        """
+        Changes after seq, oldest first
+        None if seq already fell out of the buffer (client has to resync)
+        """
+        if seq >= self._seq:
+            return []
+        oldest = self._changes[0].seq if self._changes else self._seq + 1
+        if seq < oldest - 1:
+            return None
+        return list(itertools.islice(self._changes, seq - oldest + 1, None))
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for the next change // False on timeout"""
+        if self._waiter is None:
+            self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            # shield: one client giving up must not cancel everyone's future
+            await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+# Singleton instance
+patient_feed = PatientChangeFeed(buffer_size=get_settings().sse_replay_buffer_size)
@@ -0,0 +1,169 @@
+import asyncio
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from domain.models.vital import VitalResponse
+from domain.exceptions.custom_exceptions import SubscriberLaggingError
+from infrastructure.pubsub.broadcaster import broadcaster, VitalUpdate, VITALS_CHANNEL
+from config.settings import get_settings
+from config.logging_config import get_logger
+
+logger = get_logger("services.reading_buffer")
+
+EPOCH = datetime(1970, 1, 1)
+OID_SIZE = 12
+
+
+def _to_epoch_ms(dt: datetime) -> int:
+    """Naive = UTC (how Mongo hands them back); ms precision like BSON dates"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - EPOCH) // timedelta(milliseconds=1)
+
+
+def _from_epoch_ms(ms: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=ms)
+
+
+class ReadingRing:
+    """
+    Last `capacity` readings of one patient in fixed, array-backed columns
+    (~35 bytes per reading instead of a dict per doc). Newest timestamp last.
+    total counts every reading the patient has, not just the buffered ones.
+    """
+
+    __slots__ = ("capacity", "head", "size", "total",
+                 "ts", "heart_rate", "oxygen", "temperature", "steps", "ids")
+
+    def __init__(self, capacity: int, total: int = 0):
+        self.capacity = capacity
+        self.head = 0       # next slot to write
+        self.size = 0
+        self.total = total
+        self.ts = array("q", bytes(8 * capacity))           # epoch ms
+        self.heart_rate = array("H", bytes(2 * capacity))   # 0-300
+        self.oxygen = array("B", bytes(capacity))            # 0-100
+        self.temperature = array("d", bytes(8 * capacity))
+        self.steps = array("q", bytes(8 * capacity))
+        self.ids = bytearray(OID_SIZE * capacity)            # raw ObjectIds
+
+    @property
+    def newest_ts(self) -> Optional[int]:
+        return self.ts[(self.head - 1) % self.capacity] if self.size else None
+
+    def append(self, reading_id: ObjectId, ts_ms: int, heart_rate: int,
+               oxygen_level: int, body_temperature: float, steps: int):
+        i = self.head
+        self.ts[i] = ts_ms
+        self.heart_rate[i] = heart_rate
+        self.oxygen[i] = oxygen_level
+        self.temperature[i] = body_temperature
+        self.steps[i] = steps
+        self.ids[i * OID_SIZE:(i + 1) * OID_SIZE] = reading_id.binary
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def contains(self, reading_id: ObjectId) -> bool:
+        raw = reading_id.binary
+        for k in range(self.size):
+            i = (self.head - 1 - k) % self.capacity
+            if self.ids[i * OID_SIZE:(i + 1) * OID_SIZE] == raw:
+                return True
+        return False
+
+    def latest(self, patient_id: str, limit: int) -> List[VitalResponse]:
+        """Newest first, like find_by_patient"""
+        items = []
+        for k in range(min(limit, self.size)):
+            i = (self.head - 1 - k) % self.capacity
+            items.append(VitalResponse.model_construct(
+                id=str(ObjectId(bytes(self.ids[i * OID_SIZE:(i + 1) * OID_SIZE]))),
+                patient_id=patient_id,
+                heart_rate=self.heart_rate[i],
+                oxygen_level=self.oxygen[i],
+                body_temperature=self.temperature[i],
+                steps=self.steps[i],
+                timestamp=_from_epoch_ms(self.ts[i])
+            ))
+        return items
+
+
+class RecentReadingsCache:
+    """
+    Per-patient ReadingRing, created the first time a patient's readings are read
+    (seeded from Mongo once: last N readings + one count) and then kept current
+    by the ingest path. Other workers' ingests arrive as VitalUpdates and are
+    de-duplicated by reading id. A reading older than the newest buffered one
+    (device clock / replay) drops the ring; the next read reseeds it.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._rings: Dict[str, ReadingRing] = {}
+        # patient_id -> ingests seen; a seed that raced an ingest is thrown away
+        self._generation: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, patient_id: str) -> Optional[ReadingRing]:
+        return self._rings.get(patient_id)
+
+    def generation(self, patient_id: str) -> int:
+        return self._generation.get(patient_id, 0)
+
+    def seed(self, patient_id: str, readings: List[dict], total: int, generation: int) -> Optional[ReadingRing]:
+        """Build a ring from find_by_patient (newest first) // None if an ingest raced us"""
+        if self._generation.get(patient_id, 0) != generation:
+            return None
+        ring = ReadingRing(self.capacity, total=total)
+        for r in reversed(readings[:self.capacity]):
+            ring.append(r["_id"], _to_epoch_ms(r["timestamp"]), r["heart_rate"],
+                        r["oxygen_level"], r["body_temperature"], r["steps"])
+        self._rings[patient_id] = ring
+        return ring
+
+    def record(self, patient_id: str, reading_id: str, timestamp: datetime,
+               heart_rate: int, oxygen_level: int, body_temperature: float, steps: int):
+        """A reading was stored // called by the ingest path (and for other workers' updates)"""
+        self._generation[patient_id] = self._generation.get(patient_id, 0) + 1
+        ring = self._rings.get(patient_id)
+        if ring is None:
+            return
+        oid = ObjectId(reading_id)
+        if ring.contains(oid):
+            return  # our own ingest coming back over the broadcaster
+        ts_ms = _to_epoch_ms(timestamp)
+        if ring.size and ts_ms < ring.newest_ts:
+            del self._rings[patient_id]  # out of order - reseed on next read
+            return
+        ring.append(oid, ts_ms, heart_rate, oxygen_level, body_temperature, steps)
+        ring.total += 1
+
+    async def start(self):
+        """Follow other workers' ingests // call on app startup"""
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _follow(self):
+        while True:
+            try:
+                async for update in broadcaster.subscribe(VITALS_CHANNEL, maxsize=0):
+                    if isinstance(update, VitalUpdate) and update.reading_id:
+                        self.record(update.patient_id, update.reading_id, update.timestamp,
+                                    update.heart_rate, update.oxygen_level,
+                                    update.body_temperature, update.steps)
+            except SubscriberLaggingError:
+                logger.warning("Recent readings cache resubscribing", extra={
+                    "event": "reading_buffer_resubscribe"
+                })
+
+
+# Singleton instance
+recent_readings = RecentReadingsCache(capacity=get_settings().readings_buffer_size)
@@ -1,9 +1,13 @@
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
 
 from domain.models.vital import (
-    VitalDataInput, VitalResponse, VitalListResponse,
-    AlertResponse, AlertListResponse, ThresholdSettings
+    VitalDataInput, VitalResponse, VitalListResponse, VitalChangesResponse,
+    AlertResponse, AlertListResponse, AlertChangesResponse, ThresholdSettings
 )
 from domain.exceptions.custom_exceptions import (
     AlertNotFoundError,
@@ -11,12 +15,80 @@ from domain.exceptions.custom_exceptions import (
     PatientNotFoundError,
 )
 from infrastructure.database.repositories.vital_repository import (
-    vital_repo, alert_repo, settings_repo
+    vital_repo, alert_repo, settings_repo, WINDOW_READINGS_LIMIT
 )
 from infrastructure.database.repositories.patient_repository import patient_repo
+from infrastructure.database.cursors import (
+    MIN_OBJECT_ID, encode_cursor, decode_cursor, page_token,
+    start_delta, encode_delta_cursor, delta_overlap,
+)
+from infrastructure.database.projections import to_projection
+from infrastructure.database.raw_bson import decode_rows
+from infrastructure.archive.segments import vital_archive
+from domain.services.patient_cache import patient_cache
+from domain.services.reading_buffer import recent_readings
 from config.constants import PatientStatus, AlertType, AlertStatus, DEFAULT_THRESHOLDS
 
 
+# Fields read from Mongo by default (= the response models) - created_at etc. stay on the server
+VITAL_FIELDS = tuple(VitalResponse.model_fields)
+ALERT_FIELDS = tuple(AlertResponse.model_fields)
+# CSV export columns only (export_service.CSV_HEADER) - no _id / created_at
+EXPORT_FIELDS = ("patient_id", "heart_rate", "oxygen_level", "body_temperature", "steps", "timestamp")
+EXPORT_PROJECTION = to_projection(EXPORT_FIELDS)
+# Streamed exports page on (timestamp, _id), so _id comes along (the CSV ignores it)
+EXPORT_STREAM_PROJECTION = to_projection(EXPORT_FIELDS, always=("id",))
+
+
+def _to_vital_response(r: dict) -> VitalResponse:
+    """MongoDB doc (maybe projected) -> VitalResponse // validated on ingest, so no re-validation"""
+    return VitalResponse.model_construct(
+        id=str(r["_id"]) if "_id" in r else None,
+        patient_id=r.get("patient_id"),
+        heart_rate=r.get("heart_rate"),
+        oxygen_level=r.get("oxygen_level"),
+        body_temperature=r.get("body_temperature"),
+        steps=r.get("steps"),
+        timestamp=r.get("timestamp")
+    )
+
+
+def _select_fields(row: dict, projection: Optional[dict]) -> dict:
+    """Archived rows come back whole - trim them like the live query's projection"""
+    if projection is None:
+        return row
+    return {k: v for k, v in row.items() if projection.get(k)}
+
+
+def _to_vital_page(items: List[VitalResponse], total: Optional[int], has_more: bool) -> VitalListResponse:
+    """Readings page + keyset token from its last (oldest) reading"""
+    next_after = None
+    if has_more and items:
+        next_after = encode_cursor((items[-1].timestamp, ObjectId(items[-1].id)))
+    return VitalListResponse.model_construct(
+        items=items,
+        total=total,
+        next_after=next_after,
+        has_more=has_more
+    )
+
+
+def _to_alert_response(a: dict) -> AlertResponse:
+    """MongoDB doc (maybe projected) -> AlertResponse // written by us - skip validation, just coerce the floats"""
+    return AlertResponse.model_construct(
+        id=str(a["_id"]) if "_id" in a else None,
+        alert_id=a.get("alert_id"),
+        patient_id=a.get("patient_id"),
+        metric=a.get("metric"),
+        type=a.get("type"),
+        value=float(a["value"]) if "value" in a else None,
+        threshold=float(a["threshold"]) if "threshold" in a else None,
+        status=a.get("status"),
+        created_at=a.get("created_at"),
+        acknowledged_at=a.get("acknowledged_at")
+    )
+
+
 class VitalService:
     """
     Vital service layer
@@ -43,13 +115,16 @@ class VitalService:
         patient_id: str,
         heart_rate: int,
         oxygen_level: int,
-        body_temp: float
+        body_temp: float,
+        thresholds: Optional[ThresholdSettings] = None
     ) -> str:
         """
         Check vitals against thresholds and create alerts
         Returns patient status: OK or ALERT
+        Pass thresholds to skip the settings lookup (batch ingest)
         """
-        thresholds = await self.get_thresholds()
+        if thresholds is None:
+            thresholds = await self.get_thresholds()
         alerts_created = []
 
         # Heart rate HIGH
@@ -109,7 +184,11 @@ class VitalService:
 
         return PatientStatus.ALERT if alerts_created else PatientStatus.OK
 
-    async def ingest_vital_data(self, data: VitalDataInput) -> dict:
+    async def ingest_vital_data(
+        self,
+        data: VitalDataInput,
+        thresholds: Optional[ThresholdSettings] = None
+    ) -> dict:
         """
         Process incoming vital data from Node-RED
         Creates/updates patient, checks thresholds, stores reading
@@ -117,7 +196,7 @@ class VitalService:
         patient_id = data.deviceId
 
         # Ensure patient exists
-        await patient_repo.upsert_by_patient_id(
+        doc_id = await patient_repo.upsert_by_patient_id(
             patient_id=patient_id,
             data={"patient_name": f"Patient {patient_id}"}
         )
@@ -127,11 +206,12 @@ class VitalService:
             patient_id=patient_id,
             heart_rate=data.heartRate,
             oxygen_level=data.oxygenLevel,
-            body_temp=data.bodyTemperature
+            body_temp=data.bodyTemperature,
+            thresholds=thresholds
         )
 
         # Update patient's latest vitals
-        await patient_repo.update_latest_vitals(
+        last_update = await patient_repo.update_latest_vitals(
             patient_id=patient_id,
             heart_rate=data.heartRate,
             oxygen_level=data.oxygenLevel,
@@ -139,6 +219,16 @@ class VitalService:
             steps=data.steps,
             status=patient_status
         )
+        patient_cache.apply_ingest(
+            patient_id=patient_id,
+            doc_id=doc_id,
+            heart_rate=data.heartRate,
+            oxygen_level=data.oxygenLevel,
+            body_temp=data.bodyTemperature,
+            steps=data.steps,
+            status=patient_status,
+            last_update=last_update
+        )
 
         # Store vital reading
         vital_doc = {
@@ -150,35 +240,185 @@ class VitalService:
             "timestamp": data.timestamp,
             "created_at": datetime.utcnow()
         }
-        await vital_repo.create(vital_doc)
+        reading_id = await vital_repo.create(vital_doc)
+        recent_readings.record(
+            patient_id=patient_id,
+            reading_id=reading_id,
+            timestamp=data.timestamp,
+            heart_rate=data.heartRate,
+            oxygen_level=data.oxygenLevel,
+            body_temperature=data.bodyTemperature,
+            steps=data.steps
+        )
 
         return {
             "patient_id": patient_id,
-            "patient_status": patient_status
+            "patient_status": patient_status,
+            "reading_id": reading_id,
+            "last_update": last_update
         }
 
+    async def ingest_vital_batch(self, readings: List[VitalDataInput]) -> List[dict]:
+        """
+        Process a batch of readings (gateways send several at once)
+        Thresholds are looked up once for the whole batch
+        """
+        thresholds = await self.get_thresholds()
+        results = []
+        for data in readings:
+            results.append(await self.ingest_vital_data(data, thresholds=thresholds))
+        return results
+
     async def get_patient_readings(
         self,
         patient_id: str,
-        limit: int = 10
+        limit: int = 10,
+        after: Optional[str] = None,
+        include_total: bool = True,
+        fields: Optional[Iterable[str]] = None
     ) -> VitalListResponse:
-        """Get recent readings for a patient"""
-        readings = await vital_repo.find_by_patient(patient_id, limit=limit)
-        total = await vital_repo.count_by_patient(patient_id)
-
-        items = []
-        for r in readings:
-            items.append(VitalResponse(
-                id=str(r["_id"]),
-                patient_id=r["patient_id"],
-                heart_rate=r["heart_rate"],
-                oxygen_level=r["oxygen_level"],
-                body_temperature=r["body_temperature"],
-                steps=r["steps"],
-                timestamp=r["timestamp"]
-            ))
-
-        return VitalListResponse(items=items, total=total)
+        """
+        Get recent readings for a patient // newest first
+        First pages with limit <= readings_buffer_size are answered from the
+        in-memory ring (seeded from Mongo on the patient's first read)
+        after = next_after token from the previous page (keyset, no skip)
+        fields = VitalResponse fields to read from Mongo (others come back empty)
+        Raises: InvalidCursorError
+        """
+        watermark = vital_archive.watermark
+        if after is None and limit <= recent_readings.capacity:
+            ring = recent_readings.get(patient_id)
+            if ring is None:
+                generation = recent_readings.generation(patient_id)
+                projection = to_projection(VITAL_FIELDS)
+                readings = await vital_repo.find_by_patient(
+                    patient_id,
+                    limit=recent_readings.capacity,
+                    projection=projection,
+                    not_before=watermark
+                )
+                readings = await self._with_archived(
+                    patient_id, readings, None, recent_readings.capacity, projection, watermark
+                )
+                total = await self._count_readings(patient_id, watermark)
+                ring = recent_readings.seed(patient_id, readings, total, generation)
+                if ring is None:  # an ingest raced the seed - serve what we read
+                    items = [_to_vital_response(r) for r in readings[:limit]]
+                    return _to_vital_page(items, total, has_more=total > len(items))
+            items = ring.latest(patient_id, limit)
+            return _to_vital_page(items, ring.total, has_more=ring.total > len(items))
+
+        position = decode_cursor(after) if after else None
+        projection = to_projection(fields or VITAL_FIELDS, always=("id", "timestamp"))
+        # One extra row tells us whether there's a next page
+        readings = await vital_repo.find_by_patient(
+            patient_id,
+            limit=limit + 1,
+            after_position=position,
+            projection=projection,
+            raw=True,  # rows are decoded one by one straight into the response
+            not_before=watermark
+        )
+        readings = await self._with_archived(patient_id, readings, position, limit + 1, projection, watermark)
+        has_more = len(readings) > limit
+        total = await self._count_readings(patient_id, watermark) if include_total else None
+
+        items = [_to_vital_response(r) for r in decode_rows(readings[:limit])]
+
+        return _to_vital_page(items, total, has_more)
+
+    async def count_patient_readings(self, patient_id: str) -> int:
+        """Readings stored for a patient // for GraphQL totalCount, only when selected"""
+        ring = recent_readings.get(patient_id)
+        if ring is not None:
+            return ring.total
+        return await self._count_readings(patient_id, vital_archive.watermark)
+
+    async def _with_archived(
+        self,
+        patient_id: str,
+        readings: list,
+        position,
+        limit: int,
+        projection: Optional[dict],
+        watermark: Optional[datetime]
+    ) -> list:
+        """
+        Page ran past the archive watermark -> top it up from the archive
+        (live rows are all >= watermark, archived ones older, so appending keeps the order)
+        """
+        if watermark is None or len(readings) >= limit:
+            return readings
+        archived = await asyncio.to_thread(
+            vital_archive.read_before, patient_id, position, limit - len(readings)
+        )
+        return readings + [_select_fields(r, projection) for r in archived]
+
+    async def _count_readings(self, patient_id: str, watermark: Optional[datetime]) -> int:
+        """Live readings from the watermark on + archived ones (counted from the in-memory directory)"""
+        total = await vital_repo.count_by_patient(patient_id, not_before=watermark)
+        if watermark is not None:
+            total += vital_archive.count(patient_id)
+        return total
+
+    async def get_patient_readings_since(
+        self,
+        patient_id: str,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100
+    ) -> VitalChangesResponse:
+        """
+        Readings stored after cursor (or since) // for delta polling
+        Late writes within DELTA_OVERLAP_SECONDS are still delivered (cursors.py)
+        Raises: InvalidCursorError
+        """
+        delta = start_delta(cursor, since)
+        readings = await vital_repo.find_by_patient_changed_since(
+            patient_id, delta.floor, limit=delta.fetch_limit(limit)
+        )
+        readings, has_more, delta = delta.advance(readings, "created_at", limit, delta_overlap())
+
+        return VitalChangesResponse.model_construct(
+            items=[_to_vital_response(r) for r in readings],
+            cursor=encode_delta_cursor(delta),
+            has_more=has_more
+        )
+
+    async def get_recent_readings_for_patients(
+        self,
+        patient_ids: List[str],
+        limit: int = 10,
+        fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[VitalResponse]]:
+        """
+        Recent readings for several patients at once // GraphQL DataLoader
+        Patients with a warm ring are answered from memory, the rest with one
+        batched query, topped up from the archive
+        """
+        result: Dict[str, List[VitalResponse]] = {}
+        cold = []
+        for patient_id in patient_ids:
+            ring = recent_readings.get(patient_id) if limit <= recent_readings.capacity else None
+            if ring is not None:
+                result[patient_id] = ring.latest(patient_id, limit)
+            else:
+                cold.append(patient_id)
+        if not cold:
+            return result
+
+        watermark = vital_archive.watermark
+        projection = to_projection(fields or VITAL_FIELDS)
+        grouped = await vital_repo.find_recent_by_patients(
+            cold,
+            limit=limit,
+            projection=projection,
+            not_before=watermark
+        )
+        for patient_id, readings in grouped.items():
+            readings = await self._with_archived(patient_id, readings, None, limit, projection, watermark)
+            result[patient_id] = [_to_vital_response(r) for r in readings]
+        return result
 
     async def update_thresholds(self, thresholds: ThresholdSettings) -> bool:
         """Update alert thresholds"""
@@ -195,32 +435,82 @@ class AlertService:
         self,
         status_filter: Optional[str] = None,
         skip: int = 0,
-        limit: int = 50
+        limit: int = 50,
+        after: Optional[str] = None,
+        include_total: bool = True,
+        fields: Optional[Iterable[str]] = None
     ) -> AlertListResponse:
-        """Get alerts, optionally filtered by status"""
+        """
+        Get alerts, optionally filtered by status // newest first
+        after = next_after token from the previous page (keyset, skip is ignored)
+        fields = AlertResponse fields to read from Mongo (others come back empty)
+        Raises: InvalidCursorError
+        """
+        position = decode_cursor(after) if after else None
+        projection = to_projection(fields or ALERT_FIELDS, always=("id", "created_at"))
         if status_filter:
-            alerts = await alert_repo.find_by_status(status_filter, skip=skip, limit=limit)
+            alerts = await alert_repo.find_by_status(
+                status_filter, skip=skip, limit=limit + 1,
+                after_position=position, projection=projection
+            )
         else:
-            alerts = await alert_repo.find_active(skip=skip, limit=limit)
-
-        total = await alert_repo.count_active()
-
-        items = []
-        for a in alerts:
-            items.append(AlertResponse(
-                id=str(a["_id"]),
-                alert_id=a["alert_id"],
-                patient_id=a["patient_id"],
-                metric=a["metric"],
-                type=a["type"],
-                value=a["value"],
-                threshold=a["threshold"],
-                status=a["status"],
-                created_at=a["created_at"],
-                acknowledged_at=a.get("acknowledged_at")
-            ))
-
-        return AlertListResponse(items=items, total=total)
+            alerts = await alert_repo.find_active(
+                skip=skip, limit=limit + 1,
+                after_position=position, projection=projection
+            )
+        has_more = len(alerts) > limit
+        alerts = alerts[:limit]
+
+        total = await alert_repo.count_active() if include_total else None
+
+        items = [_to_alert_response(a) for a in alerts]
+
+        return AlertListResponse.model_construct(
+            items=items,
+            total=total,
+            next_after=page_token(alerts[-1], "created_at") if has_more else None,
+            has_more=has_more
+        )
+
+    async def count_alerts(self, status_filter: Optional[str] = None) -> int:
+        """Alerts with this status (ACTIVE by default) // for GraphQL totalCount"""
+        return await alert_repo.count_by_status(status_filter or AlertStatus.ACTIVE)
+
+    async def get_alerts_since(
+        self,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: int = 100
+    ) -> AlertChangesResponse:
+        """
+        Alerts created or acknowledged after cursor (or since), any status
+        Late writes within DELTA_OVERLAP_SECONDS are still delivered (cursors.py)
+        Raises: InvalidCursorError
+        """
+        delta = start_delta(cursor, since)
+        alerts = await alert_repo.find_changed_since(delta.floor, limit=delta.fetch_limit(limit))
+        alerts, has_more, delta = delta.advance(alerts, "modified_at", limit, delta_overlap())
+
+        return AlertChangesResponse.model_construct(
+            items=[_to_alert_response(a) for a in alerts],
+            cursor=encode_delta_cursor(delta),
+            has_more=has_more
+        )
+
+    async def get_active_alerts_for_patients(
+        self,
+        patient_ids: List[str],
+        fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[AlertResponse]]:
+        """Active alerts for several patients at once // one DB query"""
+        grouped = await alert_repo.find_active_by_patients(
+            patient_ids,
+            projection=to_projection(fields or ALERT_FIELDS)
+        )
+        return {
+            pid: [_to_alert_response(a) for a in alerts]
+            for pid, alerts in grouped.items()
+        }
 
     async def acknowledge_alert(self, alert_id: str) -> dict:
         """
@@ -260,7 +550,10 @@ class ReportService:
 
     async def get_kpis(self, window_minutes: int = 5) -> dict:
         """Get dashboard KPIs"""
-        patients_monitored = await patient_repo.count_active()
+        if patient_cache.ready:
+            patients_monitored = patient_cache.count_active()
+        else:
+            patients_monitored = await patient_repo.count_active()
         active_alerts = await alert_repo.count_active()
         avg_hr = await vital_repo.get_avg_heart_rate(minutes=window_minutes)
 
@@ -276,9 +569,14 @@ class ReportService:
         window_minutes: int = 5,
         patient_id: Optional[str] = None
     ) -> dict:
-        """Get aggregated stats for time window"""
-        avg_hr = await vital_repo.get_avg_heart_rate(minutes=window_minutes)
-        min_o2 = await vital_repo.get_min_oxygen(minutes=window_minutes)
+        """Get aggregated stats for time window // windows reaching past the archive watermark merge archived stats"""
+        watermark = vital_archive.watermark
+        since = datetime.utcnow() - timedelta(minutes=window_minutes)
+        if watermark is not None and since < watermark:
+            avg_hr, min_o2 = await self._merged_window_stats(window_minutes, since, watermark)
+        else:
+            avg_hr = await vital_repo.get_avg_heart_rate(minutes=window_minutes)
+            min_o2 = await vital_repo.get_min_oxygen(minutes=window_minutes)
         alert_count = await alert_repo.count_in_window(minutes=window_minutes)
 
         return {
@@ -288,17 +586,87 @@ class ReportService:
             "window_minutes": window_minutes
         }
 
+    async def _merged_window_stats(
+        self,
+        window_minutes: int,
+        since: datetime,
+        watermark: datetime
+    ) -> Tuple[Optional[float], Optional[int]]:
+        """(avg HR, min SpO2) over live readings from the watermark on + archived ones from since on"""
+        live = await vital_repo.get_window_stats(minutes=window_minutes, not_before=watermark)
+        count, hr_sum, min_o2 = await asyncio.to_thread(vital_archive.window_stats, since)
+        if live:
+            count += live["count"]
+            hr_sum += live["heart_rate_sum"]
+            if live["min_o2"] is not None:
+                min_o2 = live["min_o2"] if min_o2 is None else min(min_o2, live["min_o2"])
+        avg_hr = round(hr_sum / count, 1) if count else None
+        return avg_hr, min_o2
+
     async def get_readings_for_export(
         self,
         window_minutes: int = 5,
-        patient_id: Optional[str] = None
-    ) -> List[dict]:
-        """Get readings for CSV export"""
-        return await vital_repo.get_readings_in_window(
+        patient_id: Optional[str] = None,
+        raw: bool = False
+    ) -> List[Union[dict, RawBSONDocument]]:
+        """
+        Get readings for CSV export // only the CSV columns leave Mongo
+        raw = undecoded rows for streaming writers (decode with decode_rows)
+        Windows reaching past the archive watermark end with archived rows (plain dicts)
+        """
+        watermark = vital_archive.watermark
+        readings = await vital_repo.get_readings_in_window(
             minutes=window_minutes,
-            patient_id=patient_id
+            patient_id=patient_id,
+            projection=EXPORT_PROJECTION,
+            raw=raw,
+            not_before=watermark
         )
+        since = datetime.utcnow() - timedelta(minutes=window_minutes)
+        room = WINDOW_READINGS_LIMIT - len(readings)
+        if watermark is None or since >= watermark or room <= 0:
+            return readings
+        archived = await asyncio.to_thread(vital_archive.read_window, since, room, patient_id)
+        return readings + [_select_fields(r, EXPORT_PROJECTION) for r in archived]
+
 
+    async def iter_readings_for_export(
+        self,
+        window_minutes: int,
+        patient_id: Optional[str] = None,
+        raw: bool = False,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Union[dict, RawBSONDocument]]]:
+        """
+        Every reading in the window, newest first, batch by batch // background export jobs
+        Live rows first, then archived ones - no row cap, one batch in memory at a time
+        """
+        since = datetime.utcnow() - timedelta(minutes=window_minutes)
+        # Read once: live rows from the watermark on, archived rows strictly before it,
+        # even if the archiver moves it while the export runs
+        watermark = vital_archive.watermark
+        async for batch in vital_repo.iter_readings_in_window(
+            since,
+            patient_id=patient_id,
+            projection=EXPORT_STREAM_PROJECTION,
+            raw=raw,
+            not_before=watermark,
+            batch_size=batch_size
+        ):
+            yield batch
+        if watermark is None or since >= watermark:
+            return
+
+        position = (watermark, MIN_OBJECT_ID)
+        while True:
+            archived = await asyncio.to_thread(
+                vital_archive.read_window, since, batch_size, patient_id, position
+            )
+            if archived:
+                yield [_select_fields(r, EXPORT_PROJECTION) for r in archived]
+            if len(archived) < batch_size:
+                return
+            position = (archived[-1]["timestamp"], archived[-1]["_id"])
 
 # Singleton instances
 vital_service = VitalService()
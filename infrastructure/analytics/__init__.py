@@ -0,0 +1,8 @@
+from infrastructure.analytics.snapshots import ParquetSnapshots, TABLES
+from infrastructure.analytics.engine import AnalyticsEngine
+
+__all__ = [
+    "ParquetSnapshots",
+    "TABLES",
+    "AnalyticsEngine",
+]
@@ -0,0 +1,150 @@
+import glob
+import os
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+import duckdb
+
+from domain.exceptions.custom_exceptions import AnalyticsQueryError, AnalyticsTimeoutError
+from infrastructure.analytics.snapshots import TABLES, _literal
+
+Params = Union[List[Any], Dict[str, Any]]
+
+
+def _json_value(value: Any) -> Any:
+    """DuckDB result value -> something orjson can write"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (timedelta, UUID)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, list):
+        return [_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _json_value(v) for k, v in value.items()}
+    return value
+
+
+class AnalyticsEngine:
+    """
+    Sandboxed, in-memory DuckDB over the Parquet snapshots (snapshots.py)
+
+    One view per table over its *.parquet files, nothing else:
+      - file access limited to the snapshot directory, config locked after setup
+        (no reading other files, no ATTACH, no installing extensions)
+      - exactly one SELECT per request (no COPY ... TO, no DDL)
+      - threads / memory capped so a heavy query can't starve the API process
+    Blocking // call through asyncio.to_thread
+    """
+
+    def __init__(self, root: str, threads: int = 2, memory_limit: str = "512MB"):
+        self.root = os.path.abspath(root)
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self._connection: Optional[duckdb.DuckDBPyConnection] = None
+        self._views: set = set()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> duckdb.DuckDBPyConnection:
+        connection = duckdb.connect(config={
+            "threads": self.threads,
+            "memory_limit": self.memory_limit,
+            "autoinstall_known_extensions": False,
+            "autoload_known_extensions": False,
+        })
+        connection.execute(f"SET allowed_directories = [{_literal(self.root + os.sep)}]")
+        connection.execute("SET enable_external_access = false")
+        connection.execute("SET lock_configuration = true")
+        return connection
+
+    def _files(self, table: str) -> List[str]:
+        return glob.glob(os.path.join(self.root, table, "day=*", "*.parquet"))
+
+    def _ensure_views(self) -> duckdb.DuckDBPyConnection:
+        """Connection + a view for every table that has files by now (read_parquet fails on an empty glob)"""
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            for table in TABLES:
+                if table in self._views or not self._files(table):
+                    continue
+                pattern = os.path.join(self.root, table, "*", "*.parquet")
+                self._connection.execute(
+                    f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM read_parquet("
+                    f"{_literal(pattern)}, hive_partitioning = true, union_by_name = true)"
+                )
+                self._views.add(table)
+            return self._connection
+
+    def tables(self) -> List[Dict[str, Any]]:
+        """Queryable tables with their columns and file counts"""
+        connection = self._ensure_views().cursor()
+        try:
+            return [
+                {
+                    "name": table,
+                    "columns": [
+                        {"name": name, "type": kind}
+                        for name, kind, *_ in connection.execute(f"DESCRIBE {table}").fetchall()
+                    ],
+                    "files": len(self._files(table)),
+                }
+                for table in TABLES if table in self._views
+            ]
+        finally:
+            connection.close()
+
+    def execute(
+        self,
+        sql: str,
+        params: Optional[Params],
+        max_rows: int,
+        timeout: float
+    ) -> Tuple[List[str], List[list], bool, float]:
+        """
+        Run one parameterized SELECT // (columns, rows, truncated, elapsed ms)
+        Raises: AnalyticsQueryError, AnalyticsTimeoutError
+        """
+        connection = self._ensure_views()
+        try:
+            statements = connection.extract_statements(sql)
+        except duckdb.Error as e:
+            raise AnalyticsQueryError(str(e))
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise AnalyticsQueryError("Only a single SELECT statement is allowed")
+
+        cursor = connection.cursor()
+        timer = threading.Timer(timeout, cursor.interrupt)
+        started = time.perf_counter()
+        timer.start()
+        try:
+            cursor.execute(sql, params or None)
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchmany(max_rows + 1)  # one extra tells us it was cut off
+        except duckdb.InterruptException:
+            raise AnalyticsTimeoutError(timeout)
+        except duckdb.Error as e:
+            raise AnalyticsQueryError(str(e))
+        finally:
+            timer.cancel()
+            cursor.close()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        truncated = len(rows) > max_rows
+        return (
+            columns,
+            [[_json_value(v) for v in row] for row in rows[:max_rows]],
+            truncated,
+            round(elapsed_ms, 1),
+        )
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+                self._views.clear()
@@ -0,0 +1,194 @@
+import csv
+import glob
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from itertools import count
+from typing import Dict, Iterable, List, Optional
+
+import duckdb
+
+
+# Parquet snapshots of the operational collections, Hive-partitioned by UTC day:
+#
+#   <root>/vitals/day=YYYY-MM-DD/part-<ms>-<n>.parquet   appended every pass
+#   <root>/alerts/day=YYYY-MM-DD/data.parquet            rewritten when a day's alerts change
+#   <root>/_state.json                                   where the last pass stopped
+#
+# Vitals never change once stored, so each pass only appends what's new; past
+# days get compacted into one file. Alerts do change (acknowledged), so their
+# days are rewritten whole. Files are written under a .tmp name and renamed,
+# readers (engine.py) only ever glob finished *.parquet files.
+
+# column -> DuckDB type, in file order // "id" is the Mongo _id as hex
+TABLES: Dict[str, Dict[str, str]] = {
+    "vitals": {
+        "id": "VARCHAR",
+        "patient_id": "VARCHAR",
+        "heart_rate": "INTEGER",
+        "oxygen_level": "INTEGER",
+        "body_temperature": "DOUBLE",
+        "steps": "BIGINT",
+        "timestamp": "TIMESTAMP",
+        "created_at": "TIMESTAMP",
+    },
+    "alerts": {
+        "id": "VARCHAR",
+        "alert_id": "VARCHAR",
+        "patient_id": "VARCHAR",
+        "metric": "VARCHAR",
+        "type": "VARCHAR",
+        "value": "DOUBLE",
+        "threshold": "DOUBLE",
+        "status": "VARCHAR",
+        "created_at": "TIMESTAMP",
+        "acknowledged_at": "TIMESTAMP",
+    },
+}
+
+# Partition key per table
+DAY_FIELDS = {"vitals": "timestamp", "alerts": "created_at"}
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _literal(path: str) -> str:
+    """Path -> SQL string literal (COPY ... TO takes no parameters)"""
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _csv_row(doc: dict, columns: Iterable[str]) -> list:
+    return [_csv_value(str(doc["_id"]) if c == "id" else doc.get(c)) for c in columns]
+
+
+class ParquetSnapshots:
+    """
+    Writes the Parquet tree // blocking (DuckDB does the encoding), call through asyncio.to_thread
+    Rows are staged as CSV and converted by DuckDB's COPY - binding Python values
+    one by one is ~1000x slower
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._names = count()
+        self._lock = threading.Lock()  # one DuckDB connection, one writer
+        self._connection: Optional[duckdb.DuckDBPyConnection] = None
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.root, "_state.json")
+
+    def table_dir(self, table: str) -> str:
+        return os.path.join(self.root, table)
+
+    def day_dir(self, table: str, day: date) -> str:
+        return os.path.join(self.table_dir(table), f"day={day.isoformat()}")
+
+    def _duckdb(self) -> duckdb.DuckDBPyConnection:
+        if self._connection is None:
+            self._connection = duckdb.connect(config={
+                "threads": 1,
+                "autoinstall_known_extensions": False,
+                "autoload_known_extensions": False,
+            })
+        return self._connection
+
+    # --- state ---
+
+    def load_state(self) -> dict:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_state(self, state: dict):
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    # --- writes ---
+
+    def _write(self, table: str, path: str, rows: List[dict]):
+        """rows -> one Parquet file at path (atomic rename)"""
+        columns = TABLES[table]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = f"{path}.{os.getpid()}.csv"
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(staging, "w", newline="") as f:
+                csv.writer(f).writerows(_csv_row(r, columns) for r in rows)
+            spec = ", ".join(f"'{name}': '{kind}'" for name, kind in columns.items())
+            with self._lock:
+                self._duckdb().execute(
+                    f"COPY (SELECT * FROM read_csv(?, header = false, columns = {{{spec}}}) "
+                    f"ORDER BY {DAY_FIELDS[table]}) "
+                    f"TO {_literal(tmp_path)} (FORMAT parquet, COMPRESSION zstd)",
+                    [staging]
+                )
+            os.replace(tmp_path, path)
+        finally:
+            for leftover in (staging, tmp_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def append_vitals(self, rows: List[dict]) -> int:
+        """New readings -> one new part file per day they fall on // returns files written"""
+        by_day: Dict[date, List[dict]] = {}
+        for row in rows:
+            by_day.setdefault(row["timestamp"].date(), []).append(row)
+        stamp = int(time.time() * 1000)
+        for day, day_rows in by_day.items():
+            name = f"part-{stamp}-{next(self._names)}.parquet"
+            self._write("vitals", os.path.join(self.day_dir("vitals", day), name), day_rows)
+        return len(by_day)
+
+    def write_alerts_day(self, day: date, rows: List[dict]):
+        """Replace one day of alerts"""
+        path = os.path.join(self.day_dir("alerts", day), "data.parquet")
+        if rows:
+            self._write("alerts", path, rows)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def compact_vitals(self, before: date) -> int:
+        """
+        Merge each past day's part files into one // returns days compacted
+        The merged file appears a moment before the parts go away, so a query
+        running right then can count that day twice - it's a snapshot for analytics
+        """
+        compacted = 0
+        for day_dir in glob.glob(os.path.join(self.table_dir("vitals"), "day=*")):
+            if date.fromisoformat(os.path.basename(day_dir)[len("day="):]) >= before:
+                continue
+            parts = sorted(glob.glob(os.path.join(day_dir, "*.parquet")))
+            if len(parts) < 2:
+                continue
+            path = os.path.join(day_dir, f"part-{int(time.time() * 1000)}-{next(self._names)}.parquet")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with self._lock:
+                self._duckdb().execute(
+                    f"COPY (SELECT * FROM read_parquet(?, hive_partitioning = false) ORDER BY timestamp) "
+                    f"TO {_literal(tmp_path)} (FORMAT parquet, COMPRESSION zstd)",
+                    [parts]
+                )
+            os.replace(tmp_path, path)
+            for part in parts:
+                os.remove(part)
+            compacted += 1
+        return compacted
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
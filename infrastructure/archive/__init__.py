@@ -0,0 +1,17 @@
+from infrastructure.archive.segments import (
+    vital_archive,
+    VitalArchive,
+    SegmentInfo,
+    BlockInfo,
+    encode_segment,
+    read_directory,
+)
+
+__all__ = [
+    "vital_archive",
+    "VitalArchive",
+    "SegmentInfo",
+    "BlockInfo",
+    "encode_segment",
+    "read_directory",
+]
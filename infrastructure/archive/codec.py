@@ -0,0 +1,196 @@
+import math
+import struct
+from typing import List, Sequence
+
+
+# Gorilla-style column codecs (Pelkonen et al., "Gorilla: A Fast, Scalable,
+# In-Memory Time Series Database", VLDB 2015)
+#
+#   timestamps  delta-of-delta, variable-width buckets - a steady 1 Hz device
+#               costs 1 bit per reading
+#   values      XOR with the previous value, only the meaningful bits are
+#               written (reusing the previous leading/trailing zero window when
+#               it fits) - repeated readings cost 1 bit
+#
+# Each column is its own bit stream, so readers decode only the columns they need.
+
+_DOUBLE = struct.Struct("<d")
+_UINT64 = struct.Struct("<Q")
+
+# delta-of-delta buckets: (prefix, prefix bits, value bits)
+_DOD_BUCKETS = (
+    (0b10, 2, 7),
+    (0b110, 3, 9),
+    (0b1110, 4, 12),
+)
+_DOD_FALLBACK = (0b1111, 4, 64)
+
+
+class BitWriter:
+    """Append-only bit stream, MSB first"""
+
+    __slots__ = ("_buffer", "_acc", "_bits")
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int):
+        self._acc = (self._acc << bits) | (value & ((1 << bits) - 1))
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self._buffer.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            return bytes(self._buffer) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self._buffer)
+
+
+class BitReader:
+    """Reads a BitWriter stream back // works on bytes, memoryview or an mmap slice"""
+
+    __slots__ = ("_data", "_pos", "_acc", "_bits")
+
+    def __init__(self, data: Sequence[int]):
+        self._data = data
+        self._pos = 0
+        self._acc = 0
+        self._bits = 0
+
+    def read(self, bits: int) -> int:
+        while self._bits < bits:
+            self._acc = (self._acc << 8) | self._data[self._pos]
+            self._pos += 1
+            self._bits += 8
+        self._bits -= bits
+        value = self._acc >> self._bits
+        self._acc &= (1 << self._bits) - 1
+        return value
+
+    def read_bit(self) -> int:
+        return self.read(1)
+
+
+def _signed(value: int, bits: int) -> int:
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+# --- timestamps ---
+
+def encode_timestamps(values: List[int]) -> bytes:
+    """Epoch ms (sorted) -> delta-of-delta stream"""
+    writer = BitWriter()
+    if not values:
+        return b""
+    writer.write(values[0], 64)
+    previous, previous_delta = values[0], 0
+    for value in values[1:]:
+        delta = value - previous
+        dod = delta - previous_delta
+        previous, previous_delta = value, delta
+        if dod == 0:
+            writer.write(0, 1)
+            continue
+        for prefix, prefix_bits, bits in _DOD_BUCKETS:
+            if -(1 << (bits - 1)) <= dod < (1 << (bits - 1)):
+                break
+        else:
+            prefix, prefix_bits, bits = _DOD_FALLBACK
+        writer.write(prefix, prefix_bits)
+        writer.write(dod, bits)
+    return writer.getvalue()
+
+
+def decode_timestamps(data: Sequence[int], count: int) -> List[int]:
+    if not count:
+        return []
+    reader = BitReader(data)
+    value = _signed(reader.read(64), 64)
+    values = [value]
+    delta = 0
+    for _ in range(count - 1):
+        if reader.read_bit():
+            # 10 / 110 / 1110 / 1111 -> 7 / 9 / 12 / 64 bit delta-of-delta
+            bits = _DOD_FALLBACK[2]
+            for _prefix, _prefix_bits, bucket_bits in _DOD_BUCKETS:
+                if not reader.read_bit():
+                    bits = bucket_bits
+                    break
+            delta += _signed(reader.read(bits), bits)
+        value += delta
+        values.append(value)
+    return values
+
+
+# --- XOR values ---
+
+def encode_xor(values: List[int], width: int) -> bytes:
+    """width-bit patterns (float64 bits, 96-bit ObjectIds) -> Gorilla XOR stream"""
+    writer = BitWriter()
+    if not values:
+        return b""
+    field_bits = (width - 1).bit_length()  # enough for 0..width-1
+    writer.write(values[0], width)
+    previous = values[0]
+    window_lead, window_trail = width + 1, 0  # no window yet
+    for value in values[1:]:
+        xor = value ^ previous
+        previous = value
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        lead = width - xor.bit_length()
+        trail = (xor & -xor).bit_length() - 1
+        if lead >= window_lead and trail >= window_trail:
+            writer.write(0b10, 2)  # same window as last time
+            writer.write(xor >> window_trail, width - window_lead - window_trail)
+            continue
+        meaningful = width - lead - trail
+        writer.write(0b11, 2)
+        writer.write(lead, field_bits)
+        writer.write(meaningful - 1, field_bits)
+        writer.write(xor >> trail, meaningful)
+        window_lead, window_trail = lead, trail
+    return writer.getvalue()
+
+
+def decode_xor(data: Sequence[int], count: int, width: int) -> List[int]:
+    if not count:
+        return []
+    field_bits = (width - 1).bit_length()
+    reader = BitReader(data)
+    value = reader.read(width)
+    values = [value]
+    lead = trail = 0
+    for _ in range(count - 1):
+        if reader.read_bit():
+            if reader.read_bit():
+                lead = reader.read(field_bits)
+                meaningful = reader.read(field_bits) + 1
+                trail = width - lead - meaningful
+            value ^= reader.read(width - lead - trail) << trail
+        values.append(value)
+    return values
+
+
+# --- float columns ---
+
+def float_bits(value) -> int:
+    """Number (None -> NaN) -> IEEE 754 bit pattern"""
+    return _UINT64.unpack(_DOUBLE.pack(math.nan if value is None else float(value)))[0]
+
+
+def bits_float(bits: int) -> float:
+    return _DOUBLE.unpack(_UINT64.pack(bits))[0]
+
+
+def encode_floats(values: List) -> bytes:
+    return encode_xor([float_bits(v) for v in values], 64)
+
+
+def decode_floats(data: Sequence[int], count: int) -> List[float]:
+    return [bits_float(bits) for bits in decode_xor(data, count, 64)]
@@ -0,0 +1,461 @@
+import heapq
+import math
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from bson import ObjectId
+
+from infrastructure.archive.codec import (
+    decode_floats,
+    decode_timestamps,
+    decode_xor,
+    encode_floats,
+    encode_timestamps,
+    encode_xor,
+)
+from infrastructure.locks import try_file_lock
+from config.settings import get_settings
+
+
+# Cold vitals on local disk: <root>/<patient_id>/<YYYY-MM-DD>.seg, one file per
+# patient per UTC day. Rows are sorted by (timestamp, _id) and cut into blocks of
+# BLOCK_ROWS; every column of a block is its own compressed stream (codec.py).
+#
+#   header     magic, version, block count, row count, patient id
+#   directory  per block: first/last timestamp, rows, heart_rate sum,
+#              oxygen_level min, offset + length of its data
+#   blocks     column lengths, then the column streams
+#
+# Files are read through mmap. The directory alone answers window stats for
+# blocks fully inside the window and lets readers skip blocks outside it, so a
+# readings page decodes one ~1k row block, not the whole day.
+
+MAGIC = b"VSEG"
+VERSION = 1
+BLOCK_ROWS = 1024
+
+FILE_HEADER = struct.Struct("<4sBxxxIIH")   # magic, version, blocks, rows, patient id length
+BLOCK_ENTRY = struct.Struct("<qqIqiQI")     # first_ts, last_ts, rows, hr_sum, o2_min (-1 = none), offset, length
+COLUMN_LENGTHS = struct.Struct("<7I")
+
+# created_at is stored as its lag behind timestamp (~constant -> ~1 bit/row)
+COLUMNS = ("timestamp", "created_lag", "_id", "heart_rate", "oxygen_level", "body_temperature", "steps")
+FLOAT_COLUMNS = ("heart_rate", "oxygen_level", "body_temperature", "steps")
+INT_FIELDS = ("heart_rate", "oxygen_level", "steps")
+
+EPOCH = datetime(1970, 1, 1)
+MS = timedelta(milliseconds=1)
+
+
+def to_ms(value: datetime) -> int:
+    """Naive UTC datetime -> epoch ms (BSON precision)"""
+    return (value - EPOCH) // MS
+
+
+def from_ms(value: int) -> datetime:
+    return EPOCH + value * MS
+
+
+def day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+@dataclass(frozen=True)
+class BlockInfo:
+    first_ts: int
+    last_ts: int
+    rows: int
+    hr_sum: int
+    o2_min: int  # -1 = no oxygen readings
+    offset: int
+    length: int
+
+
+@dataclass(frozen=True)
+class SegmentInfo:
+    patient_id: str
+    day: date
+    path: str
+    rows: int
+    first_ts: int
+    last_ts: int
+    blocks: Tuple[BlockInfo, ...]
+
+
+# --- file format ---
+
+def _number(value: float, field: str):
+    if math.isnan(value):
+        return None
+    return int(value) if field in INT_FIELDS else value
+
+
+def _encode_block(rows: List[dict]) -> Tuple[bytes, int, int]:
+    """Rows -> block bytes, heart_rate sum, oxygen_level min"""
+    timestamps = [to_ms(r["timestamp"]) for r in rows]
+    lags = [
+        (to_ms(r["created_at"]) - ts) if r.get("created_at") is not None else 0
+        for r, ts in zip(rows, timestamps)
+    ]
+    columns = [
+        encode_timestamps(timestamps),
+        encode_timestamps(lags),
+        encode_xor([int.from_bytes(r["_id"].binary, "big") for r in rows], 96),
+    ] + [encode_floats([r.get(field) for r in rows]) for field in FLOAT_COLUMNS]
+
+    heart_rates = [r["heart_rate"] for r in rows if r.get("heart_rate") is not None]
+    oxygen = [r["oxygen_level"] for r in rows if r.get("oxygen_level") is not None]
+    data = COLUMN_LENGTHS.pack(*(len(c) for c in columns)) + b"".join(columns)
+    return data, int(sum(heart_rates)), int(min(oxygen)) if oxygen else -1
+
+
+def encode_segment(patient_id: str, rows: List[dict]) -> bytes:
+    """Rows sorted by (timestamp, _id) -> segment file bytes"""
+    pid = patient_id.encode("utf-8")
+    chunks = [rows[i:i + BLOCK_ROWS] for i in range(0, len(rows), BLOCK_ROWS)]
+    offset = FILE_HEADER.size + len(pid) + BLOCK_ENTRY.size * len(chunks)
+
+    directory, blocks = [], []
+    for chunk in chunks:
+        data, hr_sum, o2_min = _encode_block(chunk)
+        directory.append(BLOCK_ENTRY.pack(
+            to_ms(chunk[0]["timestamp"]), to_ms(chunk[-1]["timestamp"]),
+            len(chunk), hr_sum, o2_min, offset, len(data)
+        ))
+        blocks.append(data)
+        offset += len(data)
+
+    header = FILE_HEADER.pack(MAGIC, VERSION, len(chunks), len(rows), len(pid)) + pid
+    return header + b"".join(directory) + b"".join(blocks)
+
+
+def read_directory(buffer: Sequence[int]) -> Tuple[str, int, Tuple[BlockInfo, ...]]:
+    """Segment bytes / mmap -> (patient id, rows, blocks)"""
+    magic, version, block_count, rows, pid_length = FILE_HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a v{VERSION} vitals segment")
+    offset = FILE_HEADER.size
+    patient_id = bytes(buffer[offset:offset + pid_length]).decode("utf-8")
+    offset += pid_length
+    blocks = tuple(
+        BlockInfo(*BLOCK_ENTRY.unpack_from(buffer, offset + i * BLOCK_ENTRY.size))
+        for i in range(block_count)
+    )
+    return patient_id, rows, blocks
+
+
+def decode_block(
+    buffer: Sequence[int],
+    block: BlockInfo,
+    columns: Sequence[str] = COLUMNS
+) -> Dict[str, list]:
+    """One block's wanted columns -> {column: values}"""
+    lengths = COLUMN_LENGTHS.unpack_from(buffer, block.offset)
+    offset = block.offset + COLUMN_LENGTHS.size
+    decoded: Dict[str, list] = {}
+    for name, length in zip(COLUMNS, lengths):
+        if name in columns:
+            data = buffer[offset:offset + length]
+            if name in ("timestamp", "created_lag"):
+                decoded[name] = decode_timestamps(data, block.rows)
+            elif name == "_id":
+                decoded[name] = decode_xor(data, block.rows, 96)
+            else:
+                decoded[name] = decode_floats(data, block.rows)
+        offset += length
+    return decoded
+
+
+def block_rows(patient_id: str, buffer: Sequence[int], block: BlockInfo) -> List[dict]:
+    """One block -> vital docs shaped like the Mongo ones, oldest first"""
+    c = decode_block(buffer, block)
+    return [
+        {
+            "_id": ObjectId(doc_id.to_bytes(12, "big")),
+            "patient_id": patient_id,
+            "heart_rate": _number(hr, "heart_rate"),
+            "oxygen_level": _number(o2, "oxygen_level"),
+            "body_temperature": _number(temp, "body_temperature"),
+            "steps": _number(steps, "steps"),
+            "timestamp": from_ms(ts),
+            "created_at": from_ms(ts + lag),
+        }
+        for ts, lag, doc_id, hr, o2, temp, steps in zip(
+            c["timestamp"], c["created_lag"], c["_id"],
+            c["heart_rate"], c["oxygen_level"], c["body_temperature"], c["steps"]
+        )
+    ]
+
+
+@contextmanager
+def open_segment(path: str):
+    """mmap of a segment + the directory read from that same mapping"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        patient_id, _, blocks = read_directory(mapped)
+        yield mapped, patient_id, blocks
+
+
+def _sort_key(row: dict) -> Tuple[datetime, bytes]:
+    return row["timestamp"], row["_id"].binary
+
+
+# --- store ---
+
+Position = Tuple[datetime, ObjectId]
+
+
+class VitalArchive:
+    """
+    Segment files + an in-memory directory of them (for pruning only - readers
+    always re-read the block directory from the file they mapped, so a segment
+    rewritten under them is never read with stale offsets)
+
+    The watermark splits history: readings before it are served from here,
+    readings from it on from the database. Only segments of days before the
+    watermark are visible, so a reader never sees a reading in both places.
+    Blocking // call through asyncio.to_thread
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.watermark: Optional[datetime] = None
+        self._watermark_mtime: Optional[int] = None
+        self._segments: Dict[str, Dict[date, SegmentInfo]] = {}
+        self._lock = threading.Lock()
+
+    # --- directory ---
+
+    @property
+    def _watermark_path(self) -> str:
+        return os.path.join(self.root, "WATERMARK")
+
+    def _patient_dir(self, patient_id: str) -> str:
+        # quote() leaves "." alone - escape it too so ids can't be "." / ".."
+        return os.path.join(self.root, quote(patient_id, safe="").replace(".", "%2E"))
+
+    def _info(self, path: str, day: date) -> SegmentInfo:
+        with open_segment(path) as (_, patient_id, blocks):
+            return SegmentInfo(
+                patient_id=patient_id,
+                day=day,
+                path=path,
+                rows=sum(b.rows for b in blocks),
+                first_ts=blocks[0].first_ts,
+                last_ts=blocks[-1].last_ts,
+                blocks=blocks,
+            )
+
+    def _stat_watermark(self) -> Optional[int]:
+        try:
+            return os.stat(self._watermark_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> int:
+        """(Re)build the directory from disk // returns the segment count"""
+        # Watermark first: segments written after it was published are for later days, hidden anyway
+        mtime = self._stat_watermark()
+        watermark = None
+        if mtime is not None:
+            with open(self._watermark_path) as f:
+                watermark = datetime.fromisoformat(f.read().strip())
+
+        segments: Dict[str, Dict[date, SegmentInfo]] = {}
+        if os.path.isdir(self.root):
+            for entry in os.scandir(self.root):
+                if not entry.is_dir():
+                    continue
+                for file in os.scandir(entry.path):
+                    if not file.name.endswith(".seg"):
+                        continue
+                    day = date.fromisoformat(file.name[:-len(".seg")])
+                    info = self._info(file.path, day)
+                    segments.setdefault(info.patient_id, {})[day] = info
+        with self._lock:
+            self._segments = segments
+            self.watermark = watermark
+            self._watermark_mtime = mtime
+        return sum(len(days) for days in segments.values())
+
+    def refresh(self) -> bool:
+        """Reload if another worker published since the last load // True if it did"""
+        if self._stat_watermark() == self._watermark_mtime:
+            return False
+        self.load()
+        return True
+
+    def _snapshot(self, patient_id: Optional[str] = None) -> List[SegmentInfo]:
+        with self._lock:
+            if self.watermark is None:
+                return []
+            last_day = self.watermark.date()
+            if patient_id is not None:
+                days = [self._segments.get(patient_id, {})]
+            else:
+                days = list(self._segments.values())
+            return [info for d in days for day, info in d.items() if day < last_day]
+
+    def writer_lock(self):
+        """
+        Cross-process lock for archiving passes // yields False if another worker
+        holds it (that worker does the pass, this one just refreshes)
+        """
+        return try_file_lock(os.path.join(self.root, ".lock"))
+
+    # --- writes ---
+
+    def write_day(self, patient_id: str, day: date, rows: List[dict]) -> SegmentInfo:
+        """
+        Merge rows into the patient's segment for that day (rows already there are
+        kept, by _id) // no rewrite if the segment already has every row
+        """
+        with self._lock:
+            existing = self._segments.get(patient_id, {}).get(day)
+        merged: Dict[ObjectId, dict] = {}
+        if existing is not None:
+            with open_segment(existing.path) as (mapped, pid, blocks):
+                for block in blocks:
+                    for row in block_rows(pid, mapped, block):
+                        merged[row["_id"]] = row
+            if all(row["_id"] in merged for row in rows):
+                return existing
+        for row in rows:
+            merged[row["_id"]] = row
+        ordered = sorted(merged.values(), key=_sort_key)
+
+        directory = self._patient_dir(patient_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{day.isoformat()}.seg")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode_segment(patient_id, ordered))
+            f.flush()
+            os.fsync(f.fileno())  # on disk before the caller deletes the live rows
+        os.replace(tmp_path, path)
+
+        info = self._info(path, day)
+        with self._lock:
+            self._segments.setdefault(patient_id, {})[day] = info
+        return info
+
+    def publish(self, watermark: datetime):
+        """Make days before watermark visible (here and, on their next refresh, in other workers)"""
+        if self.watermark is not None and watermark < self.watermark:
+            watermark = self.watermark  # never moves back
+        tmp_path = f"{self._watermark_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(watermark.isoformat())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._watermark_path)
+        with self._lock:
+            self.watermark = watermark
+            self._watermark_mtime = self._stat_watermark()
+
+    # --- reads ---
+
+    def count(self, patient_id: str) -> int:
+        return sum(info.rows for info in self._snapshot(patient_id))
+
+    def _iter_newest(
+        self,
+        info: SegmentInfo,
+        since_ms: Optional[int],
+        before: Optional[Tuple[datetime, bytes]]
+    ) -> Iterator[dict]:
+        """One segment's rows from since on and older than `before`, newest first, decoded block by block"""
+        with open_segment(info.path) as (mapped, patient_id, blocks):
+            for block in reversed(blocks):
+                if before is not None and block.first_ts > to_ms(before[0]):
+                    continue
+                if since_ms is not None and block.last_ts < since_ms:
+                    return
+                for row in reversed(block_rows(patient_id, mapped, block)):
+                    if before is not None and _sort_key(row) >= before:
+                        continue
+                    if since_ms is not None and to_ms(row["timestamp"]) < since_ms:
+                        return
+                    yield row
+
+    def _read(
+        self,
+        segments: List[SegmentInfo],
+        limit: int,
+        since: Optional[datetime] = None,
+        position: Optional[Position] = None
+    ) -> List[dict]:
+        since_ms = to_ms(since) if since is not None else None
+        before = (position[0], position[1].binary) if position is not None else None
+        segments = [
+            s for s in segments
+            if (since_ms is None or s.last_ts >= since_ms)
+            and (before is None or s.first_ts <= to_ms(before[0]))
+        ]
+        streams = [self._iter_newest(s, since_ms, before) for s in segments]
+        try:
+            return list(islice(heapq.merge(*streams, key=_sort_key, reverse=True), limit))
+        finally:
+            for stream in streams:
+                stream.close()  # unmaps segments the merge never finished
+
+    def iter_days(self) -> Iterator[Tuple[SegmentInfo, List[dict]]]:
+        """Every visible segment with its rows (oldest first) // bulk copies, one day in memory at a time"""
+        for info in sorted(self._snapshot(), key=lambda i: (i.day, i.patient_id)):
+            with open_segment(info.path) as (mapped, patient_id, blocks):
+                rows = [row for block in blocks for row in block_rows(patient_id, mapped, block)]
+            yield info, rows
+
+    def read_before(self, patient_id: str, position: Optional[Position], limit: int) -> List[dict]:
+        """A patient's newest `limit` archived readings older than position (keyset order), newest first"""
+        return self._read(self._snapshot(patient_id), limit, position=position)
+
+    def read_window(
+        self,
+        since: datetime,
+        limit: int,
+        patient_id: Optional[str] = None,
+        position: Optional[Position] = None
+    ) -> List[dict]:
+        """Newest `limit` archived readings from since on (and older than position), newest first"""
+        return self._read(self._snapshot(patient_id), limit, since=since, position=position)
+
+    def window_stats(self, since: datetime, patient_id: Optional[str] = None) -> Tuple[int, int, Optional[int]]:
+        """(readings, heart_rate sum, min oxygen_level) from since on // whole blocks straight from the directory"""
+        since_ms = to_ms(since)
+        count, hr_sum, o2_min = 0, 0, None
+        for info in self._snapshot(patient_id):
+            if info.last_ts < since_ms:
+                continue
+            with open_segment(info.path) as (mapped, _, blocks):
+                for block in blocks:
+                    if block.last_ts < since_ms:
+                        continue
+                    if block.first_ts >= since_ms:
+                        count += block.rows
+                        hr_sum += block.hr_sum
+                        if block.o2_min >= 0:
+                            o2_min = block.o2_min if o2_min is None else min(o2_min, block.o2_min)
+                        continue
+                    # Block straddles the window start - decode just the three columns needed
+                    c = decode_block(mapped, block, ("timestamp", "heart_rate", "oxygen_level"))
+                    for ts, hr, o2 in zip(c["timestamp"], c["heart_rate"], c["oxygen_level"]):
+                        if ts < since_ms:
+                            continue
+                        count += 1
+                        if not math.isnan(hr):
+                            hr_sum += int(hr)
+                        if not math.isnan(o2):
+                            o2_min = int(o2) if o2_min is None else min(o2_min, int(o2))
+        return count, hr_sum, o2_min
+
+
+# Singleton // segments live under Settings.archive_dir
+vital_archive = VitalArchive(get_settings().archive_dir)
@@ -2,10 +2,17 @@ from infrastructure.database.connection import (
     connect_db,
     close_db,
     get_db,
+    server_supports,
 )
+from infrastructure.database.indexes import ensure_indexes
+from infrastructure.database.versions import collection_versions, CollectionVersions
 
 __all__ = [
     "connect_db",
     "close_db",
     "get_db",
+    "server_supports",
+    "ensure_indexes",
+    "collection_versions",
+    "CollectionVersions",
 ]
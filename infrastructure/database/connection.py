@@ -1,8 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import Optional
+from typing import Optional, Tuple
 import logging
 
 from config.settings import get_settings
+from infrastructure.database.engines import create_client, engine_name
 
 # simple logger 
 logger = logging.getLogger("health_monitoring.database")
@@ -16,6 +17,7 @@ class MongoDB:
     """
     client: Optional[AsyncIOMotorClient] = None  # The MongoDB client
     db: Optional[AsyncIOMotorDatabase] = None    # Our specific database
+    server_version: Optional[Tuple[int, ...]] = None  # MongoDB only - None for in-process engines
 
 
 # Global instance - everyone will use this
@@ -26,20 +28,27 @@ async def connect_db():
     """Initialize MongoDB connection 
     """
     settings = get_settings()
+    engine = engine_name(settings.mongo_uri)
     logger.info("Attempting to connect to MongoDB", extra={
         "database": settings.mongo_db,
+        "engine": engine,
         "event": "db_connect_start"
     })
     
     try:
-        db_instance.client = AsyncIOMotorClient(settings.mongo_uri)
+        # Motor for mongodb:// URIs, in-process engines otherwise (see engines/)
+        db_instance.client = create_client(settings.mongo_uri)
         db_instance.db = db_instance.client[settings.mongo_db]
 
         # Quick health check - if this fails, we know something's wrong
         await db_instance.client.admin.command("ping")
+        if engine == "mongodb":
+            info = await db_instance.client.server_info()
+            db_instance.server_version = tuple(info["versionArray"][:2])
         
         logger.info("Successfully connected to MongoDB", extra={
             "database": settings.mongo_db,
+            "engine": engine,
             "event": "db_connect_success"
         })
     except Exception as e:
@@ -62,6 +71,11 @@ async def close_db():
         logger.warning("No MongoDB connection to close", extra={"event": "db_disconnect_no_connection"})
 
 
+def server_supports(*version: int) -> bool:
+    """Feature gate by server version // in-process engines implement every stage we use"""
+    return db_instance.server_version is None or db_instance.server_version >= version
+
+
 def get_db() -> AsyncIOMotorDatabase:
     """
     This is what repositories and services call to get the database.
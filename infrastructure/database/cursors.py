@@ -0,0 +1,193 @@
+import base64
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import FrozenSet, List, Optional, Tuple
+
+import orjson
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from domain.exceptions.custom_exceptions import InvalidCursorError
+from config.settings import get_settings
+
+
+# A position in a (timestamp, _id) ordered collection. _id breaks ties between
+# docs written in the same millisecond. Collections paged by _id alone use None.
+Position = Tuple[Optional[datetime], ObjectId]
+
+MIN_OBJECT_ID = ObjectId("000000000000000000000000")
+MAX_OBJECT_ID = ObjectId("ffffffffffffffffffffffff")
+
+
+def encode_cursor(position: Position) -> str:
+    """(datetime, _id) -> opaque url-safe token"""
+    value, doc_id = position
+    raw = orjson.dumps({"t": value.isoformat() if value is not None else None, "i": str(doc_id)})
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Position:
+    """
+    Opaque token -> (datetime, _id)
+    Raises: InvalidCursorError
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = orjson.loads(raw)
+        value = datetime.fromisoformat(data["t"]) if data["t"] is not None else None
+        return value, ObjectId(data["i"])
+    except (ValueError, TypeError, KeyError, InvalidId, orjson.JSONDecodeError):
+        raise InvalidCursorError()
+
+
+def start_position(cursor: Optional[str], since: Optional[datetime]) -> Position:
+    """Where a delta query starts // cursor wins over since"""
+    if cursor:
+        return decode_cursor(cursor)
+    if since is not None:
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)  # stored as naive UTC
+        return since, MIN_OBJECT_ID
+    return datetime.min, MIN_OBJECT_ID
+
+
+def after(field: str, position: Position) -> dict:
+    """Mongo filter: docs strictly after position in (field, _id) order"""
+    value, doc_id = position
+    return {"$or": [
+        {field: {"$gt": value}},
+        {field: value, "_id": {"$gt": doc_id}},
+    ]}
+
+
+def before(field: str, position: Position) -> dict:
+    """Mongo filter: docs strictly before position // next page of a (field, _id) descending sort"""
+    value, doc_id = position
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": doc_id}},
+    ]}
+
+
+def page_token(doc: dict, field: Optional[str] = None) -> str:
+    """Keyset page token for the last doc of a page // field=None for _id-only order"""
+    return encode_cursor((doc[field] if field else None, ObjectId(doc["_id"])))
+
+
+# --- Delta cursors ---
+#
+# Delta keys (created_at, last_update, modified_at) are stamped with the
+# writing worker's clock before the write lands, so a reader can see a key
+# newer than one another worker is still about to write. A plain "after the
+# last key" cursor would skip that late row for good.
+#
+# Guarantee: a row is delivered (once) as long as it is visible within
+# `overlap` of the newest key the cursor has delivered (clock skew + write
+# latency). Each poll re-scans from `floor` = newest delivered key - overlap and
+# drops rows the cursor already holds in `seen` ((key, _id), so a patient
+# updated again still comes through). Client cursors keep at most
+# DELTA_MAX_SEEN of those; past that the floor moves up to the oldest one kept.
+
+DELTA_MAX_SEEN = 50
+_SEEN_ENTRY = struct.Struct("<q12s")   # key as epoch ms + _id
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class DeltaCursor:
+    """Where a delta poll stands // see the note above"""
+    position: Position              # newest row delivered
+    floor: Position                 # the next scan starts after this
+    seen: FrozenSet[Position] = frozenset()   # delivered rows after floor
+
+    def fetch_limit(self, limit: int) -> int:
+        """Rows to read for a page of limit // already seen rows come back too, plus one for has_more"""
+        return limit + 1 + len(self.seen)
+
+    def advance(
+        self,
+        rows: List[dict],
+        field: str,
+        limit: int,
+        overlap: timedelta,
+        max_seen: Optional[int] = DELTA_MAX_SEEN
+    ) -> Tuple[List[dict], bool, "DeltaCursor"]:
+        """
+        Rows read after floor (ascending) -> (new rows, has_more, next cursor)
+        max_seen None = keep every seen row (server-side state, not a token)
+        """
+        fresh = [r for r in rows if (r[field], r["_id"]) not in self.seen]
+        has_more = len(fresh) > limit
+        fresh = fresh[:limit]
+        if not fresh:
+            return fresh, has_more, self
+
+        position = max(self.position, (fresh[-1][field], fresh[-1]["_id"]))
+        newest = position[0]
+        floor = self.floor
+        if newest - datetime.min > overlap:
+            floor = max(floor, (newest - overlap, MAX_OBJECT_ID))
+        seen = sorted(
+            p for p in self.seen.union((r[field], r["_id"]) for r in fresh) if p > floor
+        )
+        if max_seen is not None and len(seen) > max_seen:
+            floor = seen[-max_seen - 1]
+            seen = seen[-max_seen:]
+        return fresh, has_more, DeltaCursor(position, floor, frozenset(seen))
+
+
+def _to_ms(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(milliseconds=1)
+
+
+def encode_delta_cursor(cursor: DeltaCursor) -> str:
+    """DeltaCursor -> opaque url-safe token // a fresh cursor encodes like encode_cursor"""
+    if cursor.floor == cursor.position and not cursor.seen:
+        return encode_cursor(cursor.position)
+    value, doc_id = cursor.position
+    floor_value, floor_id = cursor.floor
+    seen = b"".join(_SEEN_ENTRY.pack(_to_ms(t), i.binary) for t, i in sorted(cursor.seen))
+    raw = orjson.dumps({
+        "t": value.isoformat(),
+        "i": str(doc_id),
+        "ft": floor_value.isoformat(),
+        "fi": str(floor_id),
+        "s": base64.urlsafe_b64encode(seen).decode(),
+    })
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_delta_cursor(token: str) -> DeltaCursor:
+    """
+    Opaque token -> DeltaCursor // plain encode_cursor tokens are accepted too
+    Raises: InvalidCursorError
+    """
+    position = decode_cursor(token)
+    if position[0] is None:
+        raise InvalidCursorError()
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if "ft" not in data:
+            return DeltaCursor(position, position)
+        floor = (datetime.fromisoformat(data["ft"]), ObjectId(data["fi"]))
+        packed = base64.urlsafe_b64decode(data["s"])
+        seen = frozenset(
+            (_EPOCH + timedelta(milliseconds=ms), ObjectId(raw_id))
+            for ms, raw_id in _SEEN_ENTRY.iter_unpack(packed)
+        )
+    except (ValueError, TypeError, KeyError, InvalidId, struct.error, orjson.JSONDecodeError):
+        raise InvalidCursorError()
+    return DeltaCursor(position, floor, seen)
+
+
+def delta_overlap() -> timedelta:
+    return timedelta(seconds=get_settings().delta_overlap_seconds)
+
+
+def start_delta(cursor: Optional[str], since: Optional[datetime]) -> DeltaCursor:
+    """Where a delta query starts // cursor wins over since"""
+    if cursor:
+        return decode_delta_cursor(cursor)
+    position = start_position(None, since)
+    return DeltaCursor(position, position)
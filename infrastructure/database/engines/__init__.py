@@ -0,0 +1,36 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from infrastructure.database.engines.memory import MemoryClient
+from infrastructure.database.engines.query import QueryError
+from infrastructure.database.engines.sqlite import SQLiteClient
+
+
+# Storage engine by Settings.mongo_uri scheme:
+#   mongodb:// / mongodb+srv://  MongoDB through Motor (default)
+#   memory://                    in-process engine (dev, demos, tests) - data lost on exit
+#   sqlite:///path/to/file.db    SQLite in WAL mode (edge boxes without Mongo)
+# Every engine exposes the Motor collection API the repositories already call,
+# so repositories stay engine-agnostic behind get_db().
+
+def engine_name(uri: str) -> str:
+    scheme = uri.split("://", 1)[0].lower()
+    return scheme if scheme in ("memory", "sqlite") else "mongodb"
+
+
+def create_client(uri: str):
+    """Client for the engine uri points at"""
+    engine = engine_name(uri)
+    if engine == "memory":
+        return MemoryClient(uri)
+    if engine == "sqlite":
+        return SQLiteClient(uri)
+    return AsyncIOMotorClient(uri)
+
+
+__all__ = [
+    "create_client",
+    "engine_name",
+    "MemoryClient",
+    "SQLiteClient",
+    "QueryError",
+]
@@ -0,0 +1,524 @@
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import bson
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
+
+from infrastructure.database.engines.query import (
+    QueryError,
+    RangeBounds,
+    SortSpec,
+    apply_update,
+    equality_fields,
+    field_bounds,
+    matches,
+    normalize,
+    project,
+    run_pipeline,
+    sort_docs,
+    sort_spec,
+    sort_value,
+)
+
+
+# In-process storage engine with the slice of the Motor API the repositories use.
+# Docs live in a dict keyed by _id; create_index() builds:
+#   SortedIndex  one field, kept as a sorted array of (value, _id) keys -> range scans
+#   HashIndex    equality field -> per-value SortedIndex on the next key of the
+#                compound index, e.g. vitals patient_id -> timestamp-ordered array
+# A query uses at most one index to pick candidates, then the full matcher runs.
+# Everything is synchronous under the hood, so every call is atomic on the loop.
+
+_ABOVE = (99,)  # sorts after any sort_value() key
+
+
+def _clone(value: Any) -> Any:
+    """Copy containers so callers can't mutate stored docs"""
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    return value
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class SortedIndex:
+    """Sorted array of (field value, _id) keys, parallel to the _ids themselves"""
+
+    __slots__ = ("field", "keys", "ids")
+
+    def __init__(self, field: str):
+        self.field = field
+        self.keys: List[Tuple] = []
+        self.ids: List[Any] = []
+
+    def _key(self, doc: dict) -> Tuple:
+        return sort_value(doc.get(self.field)), sort_value(doc["_id"])
+
+    def add(self, doc: dict):
+        key = self._key(doc)
+        if not self.keys or key > self.keys[-1]:
+            # Time-ordered writes land at the end
+            self.keys.append(key)
+            self.ids.append(doc["_id"])
+            return
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.ids.insert(i, doc["_id"])
+
+    def remove(self, doc: dict):
+        key = self._key(doc)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.ids[i]
+
+    def remove_many(self, ids: set):
+        """Drop several _ids in one pass (bulk deletes - one del per row would shift the lists each time)"""
+        kept = [(key, doc_id) for key, doc_id in zip(self.keys, self.ids) if doc_id not in ids]
+        self.keys = [key for key, _ in kept]
+        self.ids = [doc_id for _, doc_id in kept]
+
+    def range(self, bounds: Optional[RangeBounds]) -> List[Any]:
+        """_ids with field inside bounds, ascending // everything for None"""
+        if bounds is None:
+            return self.ids
+        low, low_inc, high, high_inc = bounds
+        start, stop = 0, len(self.keys)
+        if low is not None:
+            start = bisect_left(self.keys, (sort_value(low),) if low_inc else (sort_value(low), _ABOVE))
+        if high is not None:
+            stop = bisect_left(self.keys, (sort_value(high), _ABOVE) if high_inc else (sort_value(high),))
+        return self.ids[start:stop]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class HashIndex:
+    """field value -> SortedIndex on `order` (the next key of the compound index)"""
+
+    __slots__ = ("field", "order", "buckets")
+
+    def __init__(self, field: str, order: str = "_id"):
+        self.field = field
+        self.order = order
+        self.buckets: Dict[Any, SortedIndex] = {}
+
+    def add(self, doc: dict):
+        value = doc.get(self.field)
+        if not _hashable(value):
+            return
+        bucket = self.buckets.get(value)
+        if bucket is None:
+            bucket = self.buckets[value] = SortedIndex(self.order)
+        bucket.add(doc)
+
+    def remove(self, doc: dict):
+        value = doc.get(self.field)
+        bucket = self.buckets.get(value) if _hashable(value) else None
+        if bucket is not None:
+            bucket.remove(doc)
+            if not bucket:
+                del self.buckets[value]
+
+    def remove_many(self, docs: List[dict]):
+        groups: Dict[Any, set] = {}
+        for doc in docs:
+            value = doc.get(self.field)
+            if _hashable(value) and value in self.buckets:
+                groups.setdefault(value, set()).add(doc["_id"])
+        for value, ids in groups.items():
+            bucket = self.buckets[value]
+            bucket.remove_many(ids)
+            if not bucket:
+                del self.buckets[value]
+
+
+class _Plan:
+    """Candidate _ids for a query // ordered_by = they come ascending by (field, _id)"""
+
+    __slots__ = ("ids", "ordered_by")
+
+    def __init__(self, ids: Iterable[Any], ordered_by: Optional[str] = None):
+        self.ids = ids
+        self.ordered_by = ordered_by
+
+
+class MemoryStore:
+    """One collection's docs + indexes // shared by every view of the collection"""
+
+    def __init__(self):
+        self.docs: Dict[Any, dict] = {}
+        self.sorted: Dict[str, SortedIndex] = {"_id": SortedIndex("_id")}
+        self.hashed: Dict[str, List[HashIndex]] = {}
+        self.index_names: List[str] = ["_id_"]
+
+    def _indexes(self) -> Iterator:
+        yield from self.sorted.values()
+        for indexes in self.hashed.values():
+            yield from indexes
+
+    def insert(self, doc: dict):
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error _id: {doc['_id']}")
+        self.docs[doc["_id"]] = doc
+        for index in self._indexes():
+            index.add(doc)
+
+    def replace(self, old: dict, new: dict):
+        for index in self._indexes():
+            index.remove(old)
+            index.add(new)
+        self.docs[new["_id"]] = new
+
+    def delete(self, docs: List[dict]):
+        for doc in docs:
+            del self.docs[doc["_id"]]
+        if len(docs) < 64:
+            for index in self._indexes():
+                for doc in docs:
+                    index.remove(doc)
+            return
+        ids = {doc["_id"] for doc in docs}
+        for index in self.sorted.values():
+            index.remove_many(ids)
+        for indexes in self.hashed.values():
+            for index in indexes:
+                index.remove_many(docs)
+
+    def create_index(self, keys: SortSpec) -> str:
+        name = "_".join(f"{field}_{direction}" for field, direction in keys)
+        if name in self.index_names:
+            return name
+        self.index_names.append(name)
+
+        fields = [field for field, _ in keys]
+        new = []
+        if fields[0] != "_id":
+            if len(fields) > 1 and fields[1] != "_id":
+                # Equality prefix + ordered suffix (patient_id, timestamp, ...)
+                hashed = HashIndex(fields[0], order=fields[1])
+                self.hashed.setdefault(fields[0], []).append(hashed)
+                new.append(hashed)
+            elif fields[0] not in self.sorted:
+                self.sorted[fields[0]] = SortedIndex(fields[0])
+                new.append(self.sorted[fields[0]])
+        # Later keys double as standalone range indexes (time windows across patients)
+        for field in fields[1:]:
+            if field != "_id" and field not in self.sorted:
+                self.sorted[field] = SortedIndex(field)
+                new.append(self.sorted[field])
+
+        for index in new:
+            for doc in self.docs.values():
+                index.add(doc)
+        return name
+
+    # --- planning ---
+
+    def plan(self, query: Optional[dict], spec: Optional[SortSpec] = None) -> _Plan:
+        query = query or {}
+        sort_field = spec[0][0] if spec else None
+
+        doc_id = query.get("_id")
+        if doc_id is not None and not isinstance(doc_id, dict):
+            return _Plan([doc_id] if doc_id in self.docs else [])
+        if isinstance(doc_id, dict) and set(doc_id) == {"$in"}:
+            return _Plan([i for i in dict.fromkeys(doc_id["$in"]) if _hashable(i) and i in self.docs])
+
+        for field, indexes in self.hashed.items():
+            condition = query.get(field)
+            if condition is None:
+                continue
+            if isinstance(condition, dict):
+                if set(condition) != {"$in"}:
+                    continue
+                values = condition["$in"]
+            else:
+                values = [condition]
+            if not all(_hashable(v) for v in values):
+                continue
+            # Prefer the index whose bucket order narrows or matches the sort
+            index = next((i for i in indexes if field_bounds(query, i.order) is not None), None) \
+                or next((i for i in indexes if i.order == sort_field), indexes[0])
+            bounds = field_bounds(query, index.order)
+            buckets = [index.buckets[v] for v in dict.fromkeys(values) if v in index.buckets]
+            if len(buckets) == 1:
+                return _Plan(buckets[0].range(bounds), ordered_by=index.order)
+            return _Plan([doc_id for bucket in buckets for doc_id in bucket.range(bounds)])
+
+        ranged = [(field, field_bounds(query, field)) for field in self.sorted]
+        ranged = [(field, bounds) for field, bounds in ranged if bounds is not None]
+        if ranged:
+            # Prefer a range on the sort field (stream + stop at limit), else the first one
+            field, bounds = next(((f, b) for f, b in ranged if f == sort_field), ranged[0])
+            return _Plan(self.sorted[field].range(bounds), ordered_by=field)
+
+        branches = query.get("$or")
+        if branches and len(query) == 1:
+            plans = [self.plan(branch) for branch in branches]
+            if all(p.ids is not self.sorted["_id"].ids for p in plans):
+                return _Plan(dict.fromkeys(doc_id for p in plans for doc_id in p.ids))
+
+        if sort_field is not None and sort_field in self.sorted:
+            return _Plan(self.sorted[sort_field].ids, ordered_by=sort_field)
+        return _Plan(self.sorted["_id"].ids, ordered_by="_id")
+
+    def select(
+        self,
+        query: Optional[dict],
+        spec: Optional[SortSpec] = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[dict]:
+        """Matching stored docs, sorted, skip/limit applied"""
+        plan = self.plan(query, spec)
+        streaming = (
+            plan.ordered_by is not None and (
+                not spec or (
+                    spec[0][0] == plan.ordered_by
+                    and all(direction == spec[0][1] for _, direction in spec)
+                    and all(field == "_id" for field, _ in spec[1:])
+                )
+            )
+        )
+        if not streaming:
+            docs = [d for d in (self.docs.get(i) for i in plan.ids) if d is not None and matches(d, query)]
+            if spec:
+                sort_docs(docs, spec)
+            return docs[skip:skip + limit] if limit else docs[skip:]
+
+        # Index order already is the requested order - stop as soon as the page is full
+        ids = list(plan.ids)
+        if spec and spec[0][1] < 0:
+            ids.reverse()
+        docs = []
+        for doc_id in ids:
+            doc = self.docs.get(doc_id)
+            if doc is None or not matches(doc, query):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            docs.append(doc)
+            if limit and len(docs) >= limit:
+                break
+        return docs
+
+
+class MemoryCommandCursor:
+    """Results of an aggregate() // already computed"""
+
+    def __init__(self, docs: List[dict], raw: bool = False):
+        self._docs = docs
+        self._raw = raw
+
+    def _output(self, docs: List[dict]) -> list:
+        if self._raw:
+            return [RawBSONDocument(bson.encode(d)) for d in docs]
+        return docs
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        docs = self._docs if length is None else self._docs[:length]
+        return self._output(docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._output(self._docs):
+            yield doc
+
+
+class MemoryCursor:
+    """find() result // sort/skip/limit chain like Motor's, runs on to_list / iteration"""
+
+    def __init__(self, collection: "MemoryCollection", query: Optional[dict], projection: Optional[dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._spec: Optional[SortSpec] = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: Optional[int] = None) -> "MemoryCursor":
+        self._spec = sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, skip: int) -> "MemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "MemoryCursor":
+        self._limit = limit
+        return self
+
+    def _run(self, length: Optional[int] = None) -> list:
+        limit = self._limit
+        if length is not None:
+            limit = min(limit, length) if limit else length
+        docs = self._collection._store.select(self._query, self._spec, self._skip, limit)
+        return self._collection._output(docs, self._projection)
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        return self._run(length)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._run():
+            yield doc
+
+
+class MemoryCollection:
+    """Motor-style collection over a MemoryStore"""
+
+    def __init__(self, name: str, store: MemoryStore, raw: bool = False):
+        self.name = name
+        self._store = store
+        self._raw = raw
+
+    def with_options(self, codec_options=None, **_kwargs) -> "MemoryCollection":
+        raw = codec_options is not None and codec_options.document_class is RawBSONDocument
+        return MemoryCollection(self.name, self._store, raw=raw)
+
+    def _output(self, docs: Iterable[dict], projection: Optional[dict] = None) -> list:
+        if self._raw:
+            return [RawBSONDocument(bson.encode(project(d, projection))) for d in docs]
+        return [_clone(project(d, projection)) for d in docs]
+
+    # --- reads ---
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **_kwargs) -> MemoryCursor:
+        return MemoryCursor(self, filter, projection)
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **_kwargs):
+        docs = self._store.select(filter, limit=1)
+        return self._output(docs, projection)[0] if docs else None
+
+    async def count_documents(self, filter: dict, **_kwargs) -> int:
+        if not filter:
+            return len(self._store.docs)
+        return len(self._store.select(filter))
+
+    def aggregate(self, pipeline: List[dict], **_kwargs) -> MemoryCommandCursor:
+        stages = list(pipeline)
+        query = stages.pop(0)["$match"] if stages and "$match" in stages[0] else None
+        docs = self._store.select(query)
+        return MemoryCommandCursor(run_pipeline((_clone(d) for d in docs), stages), raw=self._raw)
+
+    # --- writes ---
+
+    async def insert_one(self, document: dict, **_kwargs) -> InsertOneResult:
+        if "_id" not in document:
+            document["_id"] = ObjectId()  # pymongo sets it on the caller's dict too
+        self._store.insert(normalize(document))
+        return InsertOneResult(document["_id"], True)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **_kwargs) -> UpdateResult:
+        docs = self._store.select(filter, limit=1)
+        if docs:
+            old = docs[0]
+            new = apply_update(old, update)
+            self._store.replace(old, new)
+            return UpdateResult({"n": 1, "nModified": int(new != old), "ok": 1.0, "updatedExisting": True}, True)
+        if not upsert:
+            return UpdateResult({"n": 0, "nModified": 0, "ok": 1.0, "updatedExisting": False}, True)
+        new = apply_update(normalize(equality_fields(filter)), update, inserting=True)
+        new.setdefault("_id", ObjectId())
+        self._store.insert(new)
+        return UpdateResult(
+            {"n": 1, "nModified": 0, "upserted": new["_id"], "ok": 1.0, "updatedExisting": False},
+            True
+        )
+
+    async def delete_many(self, filter: dict, **_kwargs) -> DeleteResult:
+        docs = self._store.select(filter)
+        self._store.delete(docs)
+        return DeleteResult({"n": len(docs), "ok": 1.0}, True)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        projection: Optional[dict] = None,
+        sort=None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        **_kwargs
+    ):
+        spec = sort_spec(sort) if sort else None
+        docs = self._store.select(filter, spec, limit=1)
+        if docs:
+            old = docs[0]
+            new = apply_update(old, update)
+            self._store.replace(old, new)
+        elif upsert:
+            old = None
+            new = apply_update(normalize(equality_fields(filter)), update, inserting=True)
+            new.setdefault("_id", ObjectId())
+            self._store.insert(new)
+        else:
+            return None
+        result = new if return_document == ReturnDocument.AFTER else old
+        return self._output([result], projection)[0] if result is not None else None
+
+    async def create_index(self, keys, **_kwargs) -> str:
+        return self._store.create_index(sort_spec(keys))
+
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = MemoryCollection(name, MemoryStore())
+        return collection
+
+    def get_collection(self, name: str) -> MemoryCollection:
+        return self[name]
+
+    async def command(self, command, **_kwargs) -> dict:
+        if command != "ping":
+            raise QueryError(f"Unsupported command {command}")
+        return {"ok": 1.0}
+
+
+class MemoryClient:
+    """memory:// // everything is gone when the process exits"""
+
+    def __init__(self, uri: str = "memory://"):
+        self.uri = uri
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = MemoryDatabase(name)
+        return database
+
+    def get_database(self, name: str) -> MemoryDatabase:
+        return self[name]
+
+    @property
+    def admin(self) -> MemoryDatabase:
+        return self["admin"]
+
+    def close(self):
+        pass
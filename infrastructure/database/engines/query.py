@@ -0,0 +1,345 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from bson import ObjectId
+
+
+# Mongo query language, the subset the repositories use - evaluated in Python
+# so non-Mongo engines answer the exact same calls:
+#   filters    equality, $eq $ne $gt $gte $lt $lte $in $nin $exists, $or $and
+#   updates    $set $setOnInsert $unset $inc
+#   projection inclusion / exclusion, _id on or off
+#   pipelines  $match $project $addFields $sort $skip $limit $group
+#   group      $sum $avg $min $max $first $last $push $topN
+#   expressions "$field", "$$ROOT", $max $min $ifNull
+
+
+class QueryError(ValueError):
+    """Operator the in-process engines don't implement"""
+
+
+# --- values ---
+
+def normalize(value: Any) -> Any:
+    """Store values the way Mongo hands them back: naive UTC datetimes, ms precision"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    return value
+
+
+# BSON comparison order across types
+_TYPE_RANKS = {
+    type(None): 1, int: 2, float: 2, str: 3, dict: 4, list: 5,
+    bytes: 6, ObjectId: 7, bool: 8, datetime: 9,
+}
+
+
+def _type_rank(value: Any) -> int:
+    rank = _TYPE_RANKS.get(type(value))
+    if rank is not None:
+        return rank
+    for cls, rank in _TYPE_RANKS.items():  # subclasses
+        if isinstance(value, cls) and cls is not type(None):
+            return rank
+    return 10
+
+
+def sort_value(value: Any) -> Tuple[int, Any]:
+    """Key for sorting / range comparisons in BSON order"""
+    rank = _type_rank(value)
+    if rank == 1:
+        return (rank, 0)
+    if rank in (4, 5):
+        return (rank, repr(value))
+    if rank == 7:
+        return (rank, value.binary)  # bytes compare in C, ObjectId.__lt__ doesn't
+    return (rank, value)
+
+
+def _compare(a: Any, b: Any) -> Optional[int]:
+    """-1 / 0 / 1, or None if the types don't compare (Mongo: no match)"""
+    if _type_rank(a) != _type_rank(b):
+        return None
+    ka, kb = sort_value(a), sort_value(b)
+    return (ka > kb) - (ka < kb)
+
+
+# --- filters ---
+
+def _match_operator(value: Any, op: str, arg: Any, present: bool) -> bool:
+    if op == "$eq":
+        return value == arg
+    if op == "$ne":
+        return value != arg
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        if not present:
+            return False
+        c = _compare(value, arg)
+        if c is None:
+            return False
+        return {"$gt": c > 0, "$gte": c >= 0, "$lt": c < 0, "$lte": c <= 0}[op]
+    if op == "$in":
+        return value in arg
+    if op == "$nin":
+        return value not in arg
+    if op == "$exists":
+        return present == bool(arg)
+    raise QueryError(f"Unsupported query operator {op}")
+
+
+def matches(doc: dict, query: Optional[dict]) -> bool:
+    """Does doc satisfy the filter"""
+    if not query:
+        return True
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+            continue
+        if key.startswith("$"):
+            raise QueryError(f"Unsupported query operator {key}")
+
+        present = key in doc
+        value = doc.get(key)
+        if isinstance(condition, dict) and condition and next(iter(condition)).startswith("$"):
+            for op, arg in condition.items():
+                if not _match_operator(value, op, arg, present):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def equality_fields(query: Optional[dict]) -> Dict[str, Any]:
+    """Plain `field: value` conditions (what an upsert copies into the new doc)"""
+    return {
+        k: v for k, v in (query or {}).items()
+        if not k.startswith("$") and not (isinstance(v, dict) and v and next(iter(v)).startswith("$"))
+    }
+
+
+# --- updates ---
+
+def apply_update(doc: dict, update: dict, inserting: bool = False) -> dict:
+    """Apply update operators to a copy of doc"""
+    doc = dict(doc)
+    for op, fields in update.items():
+        if op == "$set":
+            doc.update(normalize(fields))
+        elif op == "$setOnInsert":
+            if inserting:
+                doc.update(normalize(fields))
+        elif op == "$unset":
+            for field in fields:
+                doc.pop(field, None)
+        elif op == "$inc":
+            for field, amount in fields.items():
+                doc[field] = doc.get(field, 0) + amount
+        else:
+            raise QueryError(f"Unsupported update operator {op}")
+    return doc
+
+
+# --- projection ---
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(doc)
+    include_id = projection.get("_id", 1) != 0
+    inclusion = [k for k, v in projection.items() if k != "_id" and v]
+    if inclusion:
+        out = {k: doc[k] for k in inclusion if k in doc}
+    else:
+        excluded = {k for k, v in projection.items() if not v}
+        out = {k: v for k, v in doc.items() if k not in excluded}
+    if include_id and "_id" in doc:
+        out["_id"] = doc["_id"]
+    else:
+        out.pop("_id", None)
+    return out
+
+
+# --- sorting ---
+
+SortSpec = List[Tuple[str, int]]
+
+
+def sort_spec(key_or_list: Union[str, Sequence, Dict[str, int]], direction: Optional[int] = None) -> SortSpec:
+    """Cursor.sort() arguments / a $sort stage -> [(field, 1|-1)]"""
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [(k, d) for k, d in key_or_list]
+
+
+def sort_docs(docs: List[dict], spec: SortSpec) -> List[dict]:
+    """Stable multi-key sort, last key first"""
+    for field, direction in reversed(spec):
+        docs.sort(key=lambda d: sort_value(d.get(field)), reverse=direction < 0)
+    return docs
+
+
+# --- aggregation ---
+
+def evaluate(expression: Any, doc: dict) -> Any:
+    if isinstance(expression, str):
+        if expression == "$$ROOT":
+            return doc
+        if expression.startswith("$"):
+            return doc.get(expression[1:])
+        return expression
+    if isinstance(expression, dict) and len(expression) == 1:
+        op, args = next(iter(expression.items()))
+        if op == "$ifNull":
+            for arg in args:
+                value = evaluate(arg, doc)
+                if value is not None:
+                    return value
+            return None
+        if op in ("$max", "$min"):
+            values = [v for v in (evaluate(a, doc) for a in args) if v is not None]
+            if not values:
+                return None
+            pick = max if op == "$max" else min
+            return pick(values, key=sort_value)
+        if op.startswith("$"):
+            raise QueryError(f"Unsupported expression operator {op}")
+    return expression
+
+
+def _accumulate(op: str, arg: Any, docs: List[dict]) -> Any:
+    if op == "$topN":
+        ordered = sort_docs(list(docs), sort_spec(arg["sortBy"]))
+        return [evaluate(arg["output"], d) for d in ordered[:arg["n"]]]
+    values = [evaluate(arg, d) for d in docs]
+    if op == "$push":
+        return values
+    if op == "$first":
+        return values[0] if values else None
+    if op == "$last":
+        return values[-1] if values else None
+    numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    if op == "$sum":
+        return sum(numbers)
+    if op == "$avg":
+        return sum(numbers) / len(numbers) if numbers else None
+    present = [v for v in values if v is not None]
+    if op == "$min":
+        return min(present, key=sort_value) if present else None
+    if op == "$max":
+        return max(present, key=sort_value) if present else None
+    raise QueryError(f"Unsupported accumulator {op}")
+
+
+def _group(docs: List[dict], spec: dict) -> List[dict]:
+    groups: Dict[Any, List[dict]] = {}
+    for doc in docs:
+        key = evaluate(spec["_id"], doc)
+        groups.setdefault(key, []).append(doc)
+    results = []
+    for key, members in groups.items():
+        row = {"_id": key}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = accumulator.items()
+            row[field] = _accumulate(op, arg, members)
+        results.append(row)
+    return results
+
+
+def run_pipeline(docs: Iterable[dict], pipeline: List[dict]) -> List[dict]:
+    """Run aggregation stages over docs (the caller may have applied a leading $match already)"""
+    docs = list(docs)
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [d for d in docs if matches(d, spec)]
+        elif name == "$project":
+            docs = [project(d, spec) for d in docs]
+        elif name == "$addFields":
+            docs = [{**d, **{k: evaluate(e, d) for k, e in spec.items()}} for d in docs]
+        elif name == "$sort":
+            docs = sort_docs(docs, sort_spec(spec))
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$group":
+            docs = _group(docs, spec)
+        else:
+            raise QueryError(f"Unsupported pipeline stage {name}")
+    return docs
+
+
+# --- index planning helpers ---
+
+RangeBounds = Tuple[Optional[Any], bool, Optional[Any], bool]  # low, low_inclusive, high, high_inclusive
+
+
+def range_bounds(condition: Any) -> Optional[RangeBounds]:
+    """{"$gte": a, "$lt": b} -> bounds // None if the condition isn't a pure range"""
+    if not isinstance(condition, dict) or not condition:
+        return None
+    low = high = None
+    low_inc = high_inc = False
+    for op, arg in condition.items():
+        if op in ("$gt", "$gte"):
+            low, low_inc = arg, op == "$gte"
+        elif op in ("$lt", "$lte"):
+            high, high_inc = arg, op == "$lte"
+        else:
+            return None
+    return low, low_inc, high, high_inc
+
+
+def field_bounds(query: Optional[dict], field: str) -> Optional[RangeBounds]:
+    """
+    Range of `field` values any match can have // None if unbounded
+    Looks at the top-level condition and, failing that, every $or branch
+    (so keyset filters like cursors.before() still narrow the scan)
+    """
+    query = query or {}
+    if field in query:
+        condition = query[field]
+        bounds = range_bounds(condition)
+        if bounds is None and not isinstance(condition, dict):
+            bounds = (condition, True, condition, True)
+        return bounds
+
+    branches = query.get("$or")
+    if not branches:
+        return None
+    envelope = None
+    for branch in branches:
+        bounds = field_bounds(branch, field)
+        if bounds is None:
+            return None
+        if envelope is None:
+            envelope = bounds
+            continue
+        low, low_inc, high, high_inc = envelope
+        b_low, b_low_inc, b_high, b_high_inc = bounds
+        if low is None or b_low is None:
+            low, low_inc = None, False
+        elif sort_value(b_low) < sort_value(low) or (b_low == low and b_low_inc):
+            low, low_inc = b_low, b_low_inc
+        if high is None or b_high is None:
+            high, high_inc = None, False
+        elif sort_value(b_high) > sort_value(high) or (b_high == high and b_high_inc):
+            high, high_inc = b_high, b_high_inc
+        envelope = (low, low_inc, high, high_inc)
+    if envelope[0] is None and envelope[2] is None:
+        return None
+    return envelope
@@ -0,0 +1,647 @@
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import bson
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
+
+from config.constants import Collections
+from infrastructure.database.engines.query import (
+    QueryError,
+    SortSpec,
+    apply_update,
+    equality_fields,
+    field_bounds,
+    matches,
+    normalize,
+    project,
+    run_pipeline,
+    sort_spec,
+    sort_value,
+)
+
+
+# SQLite storage engine (edge boxes without Mongo) // sqlite:///path/to/file.db
+#
+# Each collection is a table: the whole document as a BSON blob + typed copies of
+# the fields the repositories filter / sort on, so those queries become indexed
+# SQL. Conditions on other fields run in Python (engines/query.py) over the rows
+# SQL narrowed down. Raw reads (raw_bson.py) hand the stored blob out untouched.
+#
+# sqlite3 is blocking: every call runs on ONE dedicated thread that owns the
+# connection, so the event loop never waits on disk and calls never interleave.
+
+TEXT, INTEGER, REAL, DATETIME, ID = "TEXT", "INTEGER", "REAL", "DATETIME", "ID"
+
+# collection -> column -> kind // DATETIME is stored as epoch ms, like BSON
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    Collections.VITALS: {
+        "patient_id": TEXT,
+        "timestamp": DATETIME,
+        "created_at": DATETIME,
+        "heart_rate": INTEGER,     # KPI aggregates run in SQL
+        "oxygen_level": INTEGER,
+    },
+    Collections.ALERTS: {
+        "alert_id": TEXT,
+        "patient_id": TEXT,
+        "status": TEXT,
+        "created_at": DATETIME,
+        "acknowledged_at": DATETIME,
+    },
+    Collections.PATIENTS: {"patient_id": TEXT, "last_update": DATETIME},
+    Collections.USERS: {"username": TEXT},
+    Collections.SETTINGS: {"type": TEXT},
+}
+
+# Lookups the repositories do that indexes.py (shared with Mongo) leaves to a scan
+EXTRA_INDEXES: Dict[str, List[SortSpec]] = {
+    Collections.ALERTS: [
+        [("alert_id", 1)],
+        [("patient_id", 1), ("status", 1), ("created_at", -1)],
+    ],
+    Collections.PATIENTS: [[("patient_id", 1)]],
+    Collections.USERS: [[("username", 1)]],
+    Collections.SETTINGS: [[("type", 1)]],
+}
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",       # readers don't block the writer (other workers)
+    "PRAGMA synchronous=NORMAL",     # durable at checkpoints, no fsync per commit in WAL
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # ~16MB page cache
+)
+
+SQL_ACCUMULATORS = {"$avg": "AVG({})", "$min": "MIN({})", "$max": "MAX({})", "$sum": "COALESCE(SUM({}), 0)"}
+SQL_OPERATORS = {"$eq": "=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+EPOCH = datetime(1970, 1, 1)
+_MISMATCH = object()  # value doesn't fit the column -> no SQL for that condition
+
+# (sql _id, stored blob, decoded doc or None)
+Row = Tuple[Any, bytes, Optional[dict]]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_sql(kind: str, value: Any) -> Any:
+    """Document value -> column value // _MISMATCH if the kind doesn't fit"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return _MISMATCH
+    if kind == DATETIME:
+        if isinstance(value, datetime):
+            return (normalize(value) - EPOCH) // timedelta(milliseconds=1)
+    elif kind == ID:
+        if isinstance(value, ObjectId):
+            return value.binary  # BLOB order == ObjectId order
+        if isinstance(value, (str, int)):
+            return value
+    elif kind == TEXT:
+        if isinstance(value, str):
+            return value
+    elif isinstance(value, (int, float)):
+        return value
+    return _MISMATCH
+
+
+def _column_values(columns: Dict[str, str], doc: dict) -> List[Any]:
+    values = []
+    for field, kind in columns.items():
+        value = _to_sql(kind, doc.get(field))
+        values.append(None if value is _MISMATCH else value)
+    return values
+
+
+def _condition(column: str, kind: str, condition: Any) -> Optional[Tuple[str, list]]:
+    """One field's condition -> SQL // None if it needs the Python matcher"""
+    col = _quote(column)
+    if not (isinstance(condition, dict) and condition and next(iter(condition)).startswith("$")):
+        condition = {"$eq": condition}
+
+    clauses, params = [], []
+    for op, arg in condition.items():
+        if op in ("$eq", "$ne") and arg is None:
+            clauses.append(f"{col} IS {'NOT ' if op == '$ne' else ''}NULL")
+            continue
+        if op == "$in":
+            values = [_to_sql(kind, v) for v in arg if v is not None]
+            if any(v is _MISMATCH for v in values):
+                return None
+            parts = []
+            if values:
+                parts.append(f"{col} IN ({', '.join('?' * len(values))})")
+                params += values
+            if any(v is None for v in arg):
+                parts.append(f"{col} IS NULL")
+            clauses.append("(" + " OR ".join(parts) + ")" if parts else "0")
+            continue
+        value = _to_sql(kind, arg)
+        if value is _MISMATCH or value is None:
+            return None
+        if op == "$ne":
+            clauses.append(f"({col} IS NULL OR {col} != ?)")
+        elif op in SQL_OPERATORS:
+            clauses.append(f"{col} {SQL_OPERATORS[op]} ?")
+        else:
+            return None
+        params.append(value)
+    return " AND ".join(clauses), params
+
+
+def translate(query: Optional[dict], columns: Dict[str, str]) -> Tuple[str, list, bool]:
+    """
+    Mongo filter -> (WHERE sql, params, complete)
+    Untranslatable conditions are left out, so the SQL always matches a superset;
+    complete = False means the Python matcher has to finish the job
+    """
+    clauses, params, complete = [], [], True
+    for key, condition in (query or {}).items():
+        if key in ("$or", "$and"):
+            parts = [translate(branch, columns) for branch in condition]
+            joiner = " OR " if key == "$or" else " AND "
+            clauses.append("(" + joiner.join(f"({sql})" for sql, _, _ in parts) + ")")
+            params += [p for _, branch_params, _ in parts for p in branch_params]
+            complete = complete and all(done for _, _, done in parts)
+            if key == "$or":
+                # Redundant envelope (keyset filters: ts < t OR (ts = t AND _id < i)
+                # -> also ts <= t) so the planner can seek the index instead of scanning it
+                for column, kind in columns.items():
+                    bounds = field_bounds({"$or": condition}, column)
+                    if bounds is None:
+                        continue
+                    low, _, high, _ = bounds
+                    for op, value in (("$gte", low), ("$lte", high)):
+                        value = _to_sql(kind, value) if value is not None else None
+                        if value is not None and value is not _MISMATCH:
+                            clauses.append(f"{_quote(column)} {SQL_OPERATORS[op]} ?")
+                            params.append(value)
+            continue
+        kind = columns.get(key)
+        translated = _condition(key, kind, condition) if kind else None
+        if translated is None:
+            complete = False
+            continue
+        clauses.append(translated[0])
+        params += translated[1]
+    return " AND ".join(clauses) or "1", params, complete
+
+
+def order_by(spec: Optional[SortSpec], columns: Dict[str, str]) -> Optional[str]:
+    """ORDER BY for a sort on columns only // None if Python has to sort"""
+    if not spec or any(field not in columns for field, _ in spec):
+        return None
+    return " ORDER BY " + ", ".join(
+        f"{_quote(field)} {'DESC' if direction < 0 else 'ASC'}" for field, direction in spec
+    )
+
+
+def _path(uri: str) -> str:
+    """sqlite:///relative.db, sqlite:////absolute.db, sqlite:///:memory:"""
+    path = uri.split("://", 1)[1]
+    return path[1:] if path.startswith("/") else path
+
+
+class SQLiteCursor:
+    """find() result // sort/skip/limit chain like Motor's, runs on to_list / iteration"""
+
+    def __init__(self, collection: "SQLiteCollection", query: Optional[dict], projection: Optional[dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._spec: Optional[SortSpec] = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: Optional[int] = None) -> "SQLiteCursor":
+        self._spec = sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, skip: int) -> "SQLiteCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "SQLiteCursor":
+        self._limit = limit
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        limit = self._limit
+        if length is not None:
+            limit = min(limit, length) if limit else length
+        return await self._collection._client.run(
+            self._collection._find, self._query, self._projection, self._spec, self._skip, limit
+        )
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in await self.to_list():
+            yield doc
+
+
+class SQLiteCommandCursor:
+    """aggregate() result // the pipeline runs on the first to_list / iteration"""
+
+    def __init__(self, collection: "SQLiteCollection", pipeline: List[dict]):
+        self._collection = collection
+        self._pipeline = pipeline
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        docs = await self._collection._client.run(self._collection._aggregate, self._pipeline)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in await self.to_list():
+            yield doc
+
+
+class SQLiteCollection:
+    """Motor-style collection over one table // the _underscore methods run on the SQLite thread"""
+
+    def __init__(self, client: "SQLiteClient", name: str, raw: bool = False):
+        self._client = client
+        self.name = name
+        self._raw = raw
+        self._columns = {"_id": ID, **SCHEMAS.get(name, {})}
+        self._table = _quote(name)
+
+        # Fixed statement text -> compiled once, then reused from the statement cache
+        names = ", ".join(_quote(c) for c in self._columns)
+        self._insert_sql = f"INSERT INTO {self._table} ({names}, doc) VALUES ({'?, ' * len(self._columns)}?)"
+        assignments = ", ".join(f"{_quote(c)} = ?" for c in self._columns if c != "_id")
+        self._update_sql = f"UPDATE {self._table} SET {assignments + ', ' if assignments else ''}doc = ? WHERE \"_id\" = ?"
+
+    def with_options(self, codec_options=None, **_kwargs) -> "SQLiteCollection":
+        raw = codec_options is not None and codec_options.document_class is RawBSONDocument
+        return SQLiteCollection(self._client, self.name, raw=raw)
+
+    # --- SQLite thread ---
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._client.table(self.name)
+
+    def _select(
+        self,
+        query: Optional[dict],
+        spec: Optional[SortSpec] = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[Row]:
+        where, params, complete = translate(query, self._columns)
+        order = order_by(spec, self._columns)
+        sql = f"SELECT \"_id\", doc FROM {self._table} WHERE {where}"
+        if order:
+            sql += order
+
+        if complete and (order or not spec):
+            if limit or skip:
+                # Whole query is SQL: let SQLite stop early
+                sql += " LIMIT ? OFFSET ?"
+                params = params + [limit or -1, skip]
+            return [(doc_id, blob, None) for doc_id, blob in self._connection().execute(sql, params)]
+
+        matched: List[Row] = []
+        for doc_id, blob in self._connection().execute(sql, params):
+            doc = bson.decode(blob)
+            if matches(doc, query):
+                matched.append((doc_id, blob, doc))
+                if order and limit and len(matched) >= skip + limit:
+                    break  # rows come in order - page is full
+        if spec and not order:
+            for field, direction in reversed(spec):  # stable, last key first
+                matched.sort(key=lambda row: sort_value(row[2].get(field)), reverse=direction < 0)
+        return matched[skip:skip + limit] if limit else matched[skip:]
+
+    def _output(self, rows: List[Row], projection: Optional[dict] = None) -> list:
+        out = []
+        for _, blob, doc in rows:
+            if self._raw and not projection:
+                out.append(RawBSONDocument(blob))
+                continue
+            doc = project(doc if doc is not None else bson.decode(blob), projection)
+            out.append(RawBSONDocument(bson.encode(doc)) if self._raw else doc)
+        return out
+
+    def _find(self, query, projection, spec, skip, limit) -> list:
+        return self._output(self._select(query, spec, skip, limit), projection)
+
+    def _count(self, query: Optional[dict]) -> int:
+        where, params, complete = translate(query, self._columns)
+        if complete:
+            sql = f"SELECT COUNT(*) FROM {self._table} WHERE {where}"
+            return self._connection().execute(sql, params).fetchone()[0]
+        return len(self._select(query))
+
+    def _insert(self, doc: dict):
+        try:
+            self._connection().execute(
+                self._insert_sql,
+                _column_values(self._columns, doc) + [bson.encode(doc)]
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"E11000 duplicate key error: {e}")
+
+    def _delete(self, query: dict) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [(doc_id,) for doc_id, _, _ in self._select(query)]
+            conn.executemany(f"DELETE FROM {self._table} WHERE \"_id\" = ?", ids)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(ids)
+
+    def _update(
+        self,
+        query: dict,
+        update: dict,
+        upsert: bool,
+        spec: Optional[SortSpec] = None
+    ) -> Tuple[Optional[dict], Optional[dict]]:
+        """Read-modify-write in one IMMEDIATE transaction // (old doc, new doc)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")  # write lock now - other workers can't interleave
+        try:
+            rows = self._select(query, spec, 0, 1)
+            if rows:
+                doc_id, blob, old = rows[0]
+                old = old if old is not None else bson.decode(blob)
+                new = apply_update(old, update)
+                if new != old:
+                    values = _column_values(self._columns, new)[1:]
+                    conn.execute(self._update_sql, values + [bson.encode(new), doc_id])
+            elif upsert:
+                old = None
+                new = apply_update(normalize(equality_fields(query)), update, inserting=True)
+                new.setdefault("_id", ObjectId())
+                self._insert(new)
+            else:
+                old = new = None
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return old, new
+
+    def _aggregate(self, pipeline: List[dict]) -> list:
+        stages = list(pipeline)
+        query = stages.pop(0)["$match"] if stages and "$match" in stages[0] else None
+        docs = self._group_in_sql(query, stages)
+        if docs is None:
+            docs = self._top_n_in_sql(query, stages)
+        if docs is None:
+            rows = self._select(query)
+            docs = run_pipeline((doc if doc is not None else bson.decode(blob) for _, blob, doc in rows), stages)
+        if self._raw:
+            return [RawBSONDocument(bson.encode(d)) for d in docs]
+        return docs
+
+    def _group_in_sql(self, query: Optional[dict], stages: List[dict]) -> Optional[List[dict]]:
+        """[$match, $group {_id: None, x: {$avg: "$column"}}] -> one SELECT AVG(...) // KPIs, reports"""
+        if len(stages) != 1 or "$group" not in stages[0]:
+            return None
+        group = stages[0]["$group"]
+        if group.get("_id") is not None:
+            return None
+        where, params, complete = translate(query, self._columns)
+        if not complete:
+            return None
+        names, expressions = [], []
+        for name, accumulator in group.items():
+            if name == "_id":
+                continue
+            (op, arg), = accumulator.items()
+            if op == "$sum" and isinstance(arg, (int, float)) and not isinstance(arg, bool):
+                names.append(name)  # {$sum: 1} = count
+                expressions.append(f"{arg!r} * COUNT(*)")
+                continue
+            column = arg[1:] if isinstance(arg, str) and arg.startswith("$") else None
+            if op not in SQL_ACCUMULATORS or self._columns.get(column) not in (INTEGER, REAL):
+                return None
+            names.append(name)
+            expressions.append(SQL_ACCUMULATORS[op].format(_quote(column)))
+        sql = f"SELECT COUNT(*){''.join(', ' + e for e in expressions)} FROM {self._table} WHERE {where}"
+        count, *values = self._connection().execute(sql, params).fetchone()
+        if not count:
+            return []  # Mongo returns no group at all for no input
+        return [{"_id": None, **dict(zip(names, values))}]
+
+    def _top_n_in_sql(self, query: Optional[dict], stages: List[dict]) -> Optional[List[dict]]:
+        """
+        [$match, $project?, $group {_id: "$column", x: {$topN: ... "$$ROOT"}}] -> ROW_NUMBER() window
+        Latest readings per patient without reading every reading
+        """
+        projection = None
+        if len(stages) == 2 and "$project" in stages[0]:
+            projection = stages[0]["$project"]
+            stages = stages[1:]
+        if len(stages) != 1 or "$group" not in stages[0]:
+            return None
+        group = dict(stages[0]["$group"])
+        key = group.pop("_id")
+        if len(group) != 1 or not isinstance(key, str) or not key.startswith("$"):
+            return None
+        (name, accumulator), = group.items()
+        top = accumulator.get("$topN")
+        key = key[1:]
+        if top is None or top.get("output") != "$$ROOT" or key not in self._columns:
+            return None
+        if projection is not None and project({key: True}, projection).get(key) is None:
+            return None  # $project drops the group key - Python groups on what's left
+        order = order_by(sort_spec(top["sortBy"]), self._columns)
+        where, params, complete = translate(query, self._columns)
+        if order is None or not complete:
+            return None
+
+        sql = (
+            f"SELECT doc FROM (SELECT doc, {_quote(key)} AS g, "
+            f"ROW_NUMBER() OVER (PARTITION BY {_quote(key)}{order}) AS rn "
+            f"FROM {self._table} WHERE {where}) WHERE rn <= ? ORDER BY g, rn"
+        )
+        groups: Dict[Any, List[dict]] = {}
+        for (blob,) in self._connection().execute(sql, params + [top["n"]]):
+            doc = bson.decode(blob)
+            groups.setdefault(doc.get(key), []).append(project(doc, projection))
+        return [{"_id": k, name: docs} for k, docs in groups.items()]
+
+    def _create_index(self, keys: SortSpec) -> str:
+        name = "_".join(f"{field}_{direction}" for field, direction in keys)
+        if all(field in self._columns for field, _ in keys):
+            self._client.create_sql_index(self.name, keys)
+        return name  # index on a field without a column: nothing to index, the scan still works
+
+    # --- Motor API ---
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **_kwargs) -> SQLiteCursor:
+        return SQLiteCursor(self, filter, projection)
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **_kwargs):
+        docs = await self._client.run(self._find, filter, projection, None, 0, 1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter: dict, **_kwargs) -> int:
+        return await self._client.run(self._count, filter)
+
+    def aggregate(self, pipeline: List[dict], **_kwargs) -> SQLiteCommandCursor:
+        return SQLiteCommandCursor(self, pipeline)
+
+    async def insert_one(self, document: dict, **_kwargs) -> InsertOneResult:
+        if "_id" not in document:
+            document["_id"] = ObjectId()  # pymongo sets it on the caller's dict too
+        await self._client.run(self._insert, normalize(document))
+        return InsertOneResult(document["_id"], True)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **_kwargs) -> UpdateResult:
+        old, new = await self._client.run(self._update, filter, update, upsert)
+        if old is not None:
+            return UpdateResult({"n": 1, "nModified": int(new != old), "ok": 1.0, "updatedExisting": True}, True)
+        if new is not None:
+            return UpdateResult(
+                {"n": 1, "nModified": 0, "upserted": new["_id"], "ok": 1.0, "updatedExisting": False},
+                True
+            )
+        return UpdateResult({"n": 0, "nModified": 0, "ok": 1.0, "updatedExisting": False}, True)
+
+    async def delete_many(self, filter: dict, **_kwargs) -> DeleteResult:
+        deleted = await self._client.run(self._delete, filter)
+        return DeleteResult({"n": deleted, "ok": 1.0}, True)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        projection: Optional[dict] = None,
+        sort=None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        **_kwargs
+    ):
+        spec = sort_spec(sort) if sort else None
+        old, new = await self._client.run(self._update, filter, update, upsert, spec)
+        result = new if return_document == ReturnDocument.AFTER else old
+        if result is None:
+            return None
+        result = project(result, projection)
+        return RawBSONDocument(bson.encode(result)) if self._raw else result
+
+    async def create_index(self, keys, **_kwargs) -> str:
+        return await self._client.run(self._create_index, sort_spec(keys))
+
+
+class SQLiteDatabase:
+    """All databases of a client share its file // the name only matters to Mongo"""
+
+    def __init__(self, client: "SQLiteClient", name: str):
+        self._client = client
+        self.name = name
+        self._collections: Dict[str, SQLiteCollection] = {}
+
+    def __getitem__(self, name: str) -> SQLiteCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = SQLiteCollection(self._client, name)
+        return collection
+
+    def get_collection(self, name: str) -> SQLiteCollection:
+        return self[name]
+
+    async def command(self, command, **_kwargs) -> dict:
+        if command != "ping":
+            raise QueryError(f"Unsupported command {command}")
+        await self._client.run(lambda: self._client.connection().execute("SELECT 1").fetchone())
+        return {"ok": 1.0}
+
+
+class SQLiteClient:
+    """sqlite:///path.db // one connection, owned by one worker thread"""
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self.path = _path(uri)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._tables: set = set()
+        self._databases: Dict[str, SQLiteDatabase] = {}
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the SQLite thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # --- SQLite thread ---
+
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ":memory:":
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit (isolation_level=None); multi-statement writes use BEGIN IMMEDIATE.
+            # Statements are parameterised with fixed text per query shape, so the
+            # statement cache keeps them compiled (prepared) across calls.
+            conn = sqlite3.connect(self.path, isolation_level=None, cached_statements=512)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._conn = conn
+        return self._conn
+
+    def table(self, name: str) -> sqlite3.Connection:
+        """Connection, with the collection's table created on first use"""
+        conn = self.connection()
+        if name not in self._tables:
+            columns = "".join(
+                f", {_quote(c)} {'INTEGER' if kind == DATETIME else kind}"
+                for c, kind in SCHEMAS.get(name, {}).items()
+            )
+            # _id without a declared type: ObjectIds stay BLOBs, string ids TEXT
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {_quote(name)} ("_id" PRIMARY KEY{columns}, doc BLOB NOT NULL)')
+            self._tables.add(name)
+            for keys in EXTRA_INDEXES.get(name, ()):
+                self.create_sql_index(name, keys)
+        return conn
+
+    def create_sql_index(self, table: str, keys: SortSpec):
+        name = _quote(f"ix_{table}_" + "_".join(f"{field}_{direction}" for field, direction in keys))
+        columns = ", ".join(f"{_quote(field)}{' DESC' if direction < 0 else ''}" for field, direction in keys)
+        self.table(table).execute(f"CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} ({columns})")
+
+    # --- Motor API ---
+
+    def __getitem__(self, name: str) -> SQLiteDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = SQLiteDatabase(self, name)
+        return database
+
+    def get_database(self, name: str) -> SQLiteDatabase:
+        return self[name]
+
+    @property
+    def admin(self) -> SQLiteDatabase:
+        return self["admin"]
+
+    def close(self):
+        def _close():
+            if self._conn is not None:
+                self._conn.execute("PRAGMA optimize")  # refresh planner stats on the way out
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
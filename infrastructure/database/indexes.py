@@ -0,0 +1,45 @@
+from pymongo import ASCENDING, DESCENDING
+
+from infrastructure.database.connection import get_db
+from config.constants import Collections
+from config.logging_config import get_logger
+
+logger = get_logger("database.indexes")
+
+
+# collection -> index key lists
+# create_index is a no-op when the index already exists, so this is safe on every startup
+INDEXES = {
+    # delta sync (?since= / ?cursor=)
+    Collections.PATIENTS: [
+        [("last_update", ASCENDING), ("_id", ASCENDING)],
+    ],
+    Collections.ALERTS: [
+        [("created_at", ASCENDING)],
+        [("acknowledged_at", ASCENDING)],
+        # keyset pages (?after=), newest first
+        [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    ],
+    Collections.VITALS: [
+        [("patient_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+        # keyset pages (?after=), newest first
+        [("patient_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+        # report / KPI windows across patients, archiver's oldest-reading scan
+        [("timestamp", ASCENDING)],
+        # analytics snapshots (readings stored since the last pass, every patient)
+        [("created_at", ASCENDING), ("_id", ASCENDING)],
+    ],
+}
+
+
+async def ensure_indexes():
+    """Create the indexes the repositories rely on // called on startup"""
+    db = get_db()
+    for collection, indexes in INDEXES.items():
+        for keys in indexes:
+            name = await db[collection].create_index(keys)
+            logger.debug(f"Index {collection}.{name} ready", extra={
+                "collection": collection,
+                "index": name,
+                "event": "index_ready"
+            })
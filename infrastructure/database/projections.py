@@ -0,0 +1,16 @@
+from typing import Iterable, Optional
+
+
+def to_projection(fields: Optional[Iterable[str]], always: Iterable[str] = ()) -> Optional[dict]:
+    """
+    Response field names -> Mongo inclusion projection
+    "id" is the doc's _id (left out unless asked for). fields=None -> whole doc.
+    always = fields the caller needs itself (sort keys for page tokens etc.)
+    """
+    if fields is None:
+        return None
+    wanted = set(fields) | set(always)
+    projection = {("_id" if f == "id" else f): 1 for f in wanted}
+    if "_id" not in projection:
+        projection["_id"] = 0
+    return projection
@@ -0,0 +1,20 @@
+from typing import Iterable, Iterator, Union
+
+from bson import decode
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+
+# Raw read path for bulk reads: Motor hands back each row as one undecoded bytes
+# object (no dict / datetime / ObjectId per field). Callers decode rows one at a
+# time right before writing them out, so only one decoded row is alive at once
+# instead of the whole result set.
+RAW_BSON = CodecOptions(document_class=RawBSONDocument)
+
+
+def decode_rows(docs: Iterable[Union[RawBSONDocument, dict]]) -> Iterator[dict]:
+    """Raw rows -> plain dicts, lazily // don't touch RawBSONDocument fields directly
+    (that inflates and caches the whole doc on the object)
+    Plain dicts (e.g. rows read back from the vitals archive) pass through"""
+    for doc in docs:
+        yield decode(doc.raw) if isinstance(doc, RawBSONDocument) else doc
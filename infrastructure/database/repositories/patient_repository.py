@@ -7,6 +7,8 @@ from bson import ObjectId
 from datetime import datetime
 
 from infrastructure.database.connection import get_db
+from infrastructure.database.cursors import Position, after
+from infrastructure.database.versions import collection_versions
 from config.constants import Collections
 from config.logging_config import get_logger
 
@@ -26,9 +28,16 @@ class PatientRepository:
         """Get the MongoDB collection - lazy loading"""
         return get_db()[self.collection_name]
 
-    async def find_all(self, skip: int = 0, limit: int = 20) -> List[dict]:
+    async def find_all(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        after_id: Optional[ObjectId] = None,
+        projection: Optional[dict] = None
+    ) -> List[dict]:
         """Skip and limit for pagination - because we shouldn't load
         10,000 patients at once (learned that lesson the hard way)
+        after_id = keyset page (patients after that _id) instead of skip
         """
         logger.debug(f"Finding patients with skip={skip}, limit={limit}", extra={
             "skip": skip,
@@ -37,7 +46,11 @@ class PatientRepository:
         })
         
         try:
-            cursor = self.collection.find({}).skip(skip).limit(limit)
+            if after_id is not None:
+                # _id index range scan - deep pages cost the same as the first
+                cursor = self.collection.find({"_id": {"$gt": after_id}}, projection).sort("_id", 1).limit(limit)
+            else:
+                cursor = self.collection.find({}, projection).sort("_id", 1).skip(skip).limit(limit)
             patients = await cursor.to_list(length=limit)
             
             logger.debug(f"Found {len(patients)} patients", extra={
@@ -57,6 +70,18 @@ class PatientRepository:
             }, exc_info=True)
             raise
 
+    async def find_changed_since(self, position: Position, limit: int = 100) -> List[dict]:
+        """Patients updated after position, oldest change first // uses the last_update index"""
+        cursor = self.collection.find(after("last_update", position)).sort(
+            [("last_update", 1), ("_id", 1)]
+        ).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def find_all_ordered(self) -> List[dict]:
+        """Every patient in _id (creation) order // warms the in-memory patient cache"""
+        cursor = self.collection.find({}).sort("_id", 1)
+        return await cursor.to_list(length=None)
+
     async def count_all(self) -> int:
         """Total patient count - needed for pagination math"""
         return await self.collection.count_documents({})  # Empty filter = count all
@@ -75,6 +100,7 @@ class PatientRepository:
     async def create(self, patient_data: dict) -> str:
         """Insert new patient // returns id"""
         result = await self.collection.insert_one(patient_data)
+        collection_versions.bump(self.collection_name)
         return str(result.inserted_id)
 
     async def upsert_by_patient_id(self, patient_id: str, data: dict) -> str:
@@ -85,6 +111,7 @@ class PatientRepository:
             {"$set": data, "$setOnInsert": {"created_at": datetime.utcnow()}},
             upsert=True
         )
+        collection_versions.bump(self.collection_name)
         if result.upserted_id:
             return str(result.upserted_id)
         # If updated, fetch the doc to return id
@@ -99,8 +126,13 @@ class PatientRepository:
         body_temp: float,
         steps: int,
         status: str
-    ):
-        """Update patient's latest vitals + status"""
+    ) -> datetime:
+        """
+        Update patient's latest vitals + status
+        Returns the last_update written (ms precision, exactly what Mongo stores)
+        """
+        now = datetime.utcnow()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
         await self.collection.update_one(
             {"patient_id": patient_id},
             {
@@ -110,10 +142,12 @@ class PatientRepository:
                     "last_body_temperature": body_temp,
                     "last_steps": steps,
                     "status": status,
-                    "last_update": datetime.utcnow()
+                    "last_update": now
                 }
             }
         )
+        collection_versions.bump(self.collection_name)
+        return now
 
     async def count_active(self) -> int:
         """Count patients with recent updates (monitored)"""
@@ -1,10 +1,21 @@
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Dict, Union
 from bson import ObjectId
 from datetime import datetime, timedelta
 import uuid
 
-from infrastructure.database.connection import get_db
-from config.constants import Collections, AlertStatus
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReturnDocument
+
+from infrastructure.database.connection import get_db, server_supports
+from infrastructure.database.cursors import Position, after, before
+from infrastructure.database.raw_bson import RAW_BSON
+from infrastructure.database.versions import collection_versions
+from infrastructure.pubsub.broadcaster import broadcast_alert_event
+from config.constants import Collections, AlertStatus, AlertEventKind
+
+
+# Report windows read at most this many readings
+WINDOW_READINGS_LIMIT = 1000
 
 
 class VitalRepository:
@@ -17,26 +28,115 @@ class VitalRepository:
     def collection(self):
         return get_db()[self.collection_name]
 
+    @property
+    def raw_collection(self):
+        """Same collection, rows come back as RawBSONDocument (see raw_bson.py)"""
+        return self.collection.with_options(codec_options=RAW_BSON)
+
     async def create(self, vital_data: dict) -> str:
         """Insert vital reading"""
         result = await self.collection.insert_one(vital_data)
+        collection_versions.bump(self.collection_name)
         return str(result.inserted_id)
 
     async def find_by_patient(
         self,
         patient_id: str,
         limit: int = 10,
-        skip: int = 0
+        skip: int = 0,
+        after_position: Optional[Position] = None,
+        projection: Optional[dict] = None,
+        raw: bool = False,
+        not_before: Optional[datetime] = None
+    ) -> List[Union[dict, RawBSONDocument]]:
+        """
+        Get readings for a patient // newest first
+        after_position = keyset page (older than that (timestamp, _id)) instead of skip
+        raw = undecoded rows, decode them with raw_bson.decode_rows
+        not_before = archive watermark, older readings are read from the archive
+        """
+        query = {"patient_id": patient_id}
+        if not_before is not None:
+            query["timestamp"] = {"$gte": not_before}
+        if after_position is not None:
+            query.update(before("timestamp", after_position))
+            skip = 0
+        collection = self.raw_collection if raw else self.collection
+        cursor = collection.find(query, projection).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def find_recent_by_patients(
+        self,
+        patient_ids: List[str],
+        limit: int = 10,
+        projection: Optional[dict] = None,
+        not_before: Optional[datetime] = None
+    ) -> Dict[str, List[dict]]:
+        """
+        Latest N readings for several patients in ONE query // newest first
+        $topN needs MongoDB 5.2+ (SQLite runs it as a ROW_NUMBER() window); older
+        servers sort, $push and $slice - still one round trip, but it reads the
+        patients' whole (post-watermark) history
+        not_before = archive watermark, older readings are read from the archive
+        """
+        match = {"patient_id": {"$in": patient_ids}}
+        if not_before is not None:
+            match["timestamp"] = {"$gte": not_before}
+        pipeline = [{"$match": match}]
+        if projection is not None:
+            # Trim before grouping copies $$ROOT - grouping/sort keys stay
+            pipeline.append({"$project": {**projection, "patient_id": 1, "timestamp": 1}})
+        newest = {"timestamp": -1, "_id": -1}
+        if server_supports(5, 2):
+            pipeline.append({"$group": {
+                "_id": "$patient_id",
+                "readings": {"$topN": {"n": limit, "sortBy": newest, "output": "$$ROOT"}}
+            }})
+        else:
+            pipeline += [
+                {"$sort": {"patient_id": 1, **newest}},
+                {"$group": {"_id": "$patient_id", "readings": {"$push": "$$ROOT"}}},
+                {"$project": {"readings": {"$slice": ["$readings", limit]}}},
+            ]
+        result = await self.collection.aggregate(pipeline).to_list(length=None)
+        grouped = {group["_id"]: group["readings"] for group in result}
+        return {patient_id: grouped.get(patient_id, []) for patient_id in patient_ids}
+
+    async def find_by_patient_changed_since(
+        self,
+        patient_id: str,
+        position: Position,
+        limit: int = 100
     ) -> List[dict]:
-        """Get readings for a patient // newest first"""
-        cursor = self.collection.find(
-            {"patient_id": patient_id}
-        ).sort("timestamp", -1).skip(skip).limit(limit)
+        """Readings stored after position, oldest first // (patient_id, created_at) index"""
+        query = {"patient_id": patient_id, **after("created_at", position)}
+        cursor = self.collection.find(query).sort([("created_at", 1), ("_id", 1)]).limit(limit)
         return await cursor.to_list(length=limit)
 
-    async def count_by_patient(self, patient_id: str) -> int:
-        """Count readings for patient"""
-        return await self.collection.count_documents({"patient_id": patient_id})
+    async def find_changed_since(
+        self,
+        position: Optional[Position],
+        limit: int = 5000,
+        not_before: Optional[datetime] = None
+    ) -> List[dict]:
+        """
+        Readings stored after position, every patient, oldest first // (created_at, _id) index
+        position None = from the start; not_before = archive watermark
+        """
+        query = after("created_at", position) if position is not None else {}
+        if not_before is not None:
+            query["timestamp"] = {"$gte": not_before}
+        cursor = self.collection.find(query).sort([("created_at", 1), ("_id", 1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def count_by_patient(self, patient_id: str, not_before: Optional[datetime] = None) -> int:
+        """Count readings for patient // not_before = archive watermark"""
+        query = {"patient_id": patient_id}
+        if not_before is not None:
+            query["timestamp"] = {"$gte": not_before}
+        return await self.collection.count_documents(query)
 
     async def get_avg_heart_rate(self, minutes: int = 5) -> Optional[float]:
         """Avg HR in last N minutes // for KPIs"""
@@ -65,15 +165,110 @@ class VitalRepository:
     async def get_readings_in_window(
         self,
         minutes: int = 5,
-        patient_id: Optional[str] = None
-    ) -> List[dict]:
-        """Get all readings in time window // for reports"""
+        patient_id: Optional[str] = None,
+        projection: Optional[dict] = None,
+        raw: bool = False,
+        not_before: Optional[datetime] = None
+    ) -> List[Union[dict, RawBSONDocument]]:
+        """
+        Get all readings in time window // for reports
+        raw = undecoded rows, decode them with raw_bson.decode_rows
+        not_before = archive watermark, older readings are read from the archive
+        """
         since = datetime.utcnow() - timedelta(minutes=minutes)
+        if not_before is not None:
+            since = max(since, not_before)
         query = {"timestamp": {"$gte": since}}
         if patient_id:
             query["patient_id"] = patient_id
-        cursor = self.collection.find(query).sort("timestamp", -1)
-        return await cursor.to_list(length=1000)  # cap at 1k
+        collection = self.raw_collection if raw else self.collection
+        cursor = collection.find(query, projection).sort("timestamp", -1)
+        return await cursor.to_list(length=WINDOW_READINGS_LIMIT)
+
+    async def iter_readings_in_window(
+        self,
+        since: datetime,
+        patient_id: Optional[str] = None,
+        projection: Optional[dict] = None,
+        raw: bool = False,
+        not_before: Optional[datetime] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Union[dict, RawBSONDocument]]]:
+        """
+        Every reading from since on, newest first, batch_size at a time // background exports
+        Keyset pages over (timestamp, _id), so no row cap and one batch in memory at a time.
+        The projection has to keep _id (it's half of the page position).
+        not_before = archive watermark, older readings are read from the archive
+        """
+        if not_before is not None:
+            since = max(since, not_before)
+        query = {"timestamp": {"$gte": since}}
+        if patient_id:
+            query["patient_id"] = patient_id
+        collection = self.raw_collection if raw else self.collection
+        position: Optional[Position] = None
+        while True:
+            page_query = query if position is None else {**query, **before("timestamp", position)}
+            cursor = collection.find(page_query, projection).sort(
+                [("timestamp", -1), ("_id", -1)]
+            ).limit(batch_size)
+            rows = await cursor.to_list(length=batch_size)
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            position = (rows[-1]["timestamp"], rows[-1]["_id"])
+
+    async def get_window_stats(self, minutes: int = 5, not_before: Optional[datetime] = None) -> Optional[dict]:
+        """
+        count / heart_rate sum / min SpO2 in last N minutes in one pass // merged with archived stats
+        not_before = archive watermark
+        """
+        since = datetime.utcnow() - timedelta(minutes=minutes)
+        if not_before is not None:
+            since = max(since, not_before)
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": since}}},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "heart_rate_sum": {"$sum": "$heart_rate"},
+                "min_o2": {"$min": "$oxygen_level"}
+            }}
+        ]
+        result = await self.collection.aggregate(pipeline).to_list(1)
+        return result[0] if result else None
+
+    async def find_patients_before(self, cutoff: datetime) -> Dict[str, datetime]:
+        """patient_id -> oldest reading timestamp, for patients with readings older than cutoff"""
+        pipeline = [
+            {"$match": {"timestamp": {"$lt": cutoff}}},
+            {"$group": {"_id": "$patient_id", "oldest": {"$min": "$timestamp"}}}
+        ]
+        result = await self.collection.aggregate(pipeline).to_list(length=None)
+        return {group["_id"]: group["oldest"] for group in result}
+
+    async def find_oldest_between(self, patient_id: str, start: datetime, end: datetime) -> Optional[datetime]:
+        """Timestamp of a patient's oldest reading with start <= timestamp < end"""
+        cursor = self.collection.find(
+            {"patient_id": patient_id, "timestamp": {"$gte": start, "$lt": end}}, {"timestamp": 1}
+        ).sort([("timestamp", 1), ("_id", 1)]).limit(1)
+        docs = await cursor.to_list(length=1)
+        return docs[0]["timestamp"] if docs else None
+
+    async def find_by_patient_between(self, patient_id: str, start: datetime, end: datetime) -> List[dict]:
+        """A patient's readings with start <= timestamp < end, oldest first"""
+        cursor = self.collection.find(
+            {"patient_id": patient_id, "timestamp": {"$gte": start, "$lt": end}}
+        ).sort([("timestamp", 1), ("_id", 1)])
+        return await cursor.to_list(length=None)
+
+    async def delete_by_ids(self, ids: List[ObjectId]) -> int:
+        """Drop readings by _id // after the archiver has them on disk"""
+        result = await self.collection.delete_many({"_id": {"$in": ids}})
+        if result.deleted_count:
+            collection_versions.bump(self.collection_name)
+        return result.deleted_count
 
 
 class AlertRepository:
@@ -93,14 +288,64 @@ class AlertRepository:
         alert_data["created_at"] = datetime.utcnow()
         alert_data["status"] = AlertStatus.ACTIVE
         result = await self.collection.insert_one(alert_data)
+        collection_versions.bump(self.collection_name)
+        # insert_one put the _id on alert_data - it's the full doc now
+        await broadcast_alert_event(AlertEventKind.CREATED, alert_data)
         return str(result.inserted_id)
 
-    async def find_active(self, skip: int = 0, limit: int = 50) -> List[dict]:
+    async def find_active(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        after_position: Optional[Position] = None,
+        projection: Optional[dict] = None
+    ) -> List[dict]:
         """Get active alerts"""
+        return await self.find_by_status(
+            AlertStatus.ACTIVE, skip=skip, limit=limit,
+            after_position=after_position, projection=projection
+        )
+
+    async def find_active_by_patients(
+        self,
+        patient_ids: List[str],
+        projection: Optional[dict] = None
+    ) -> Dict[str, List[dict]]:
+        """
+        Active alerts for several patients in ONE query // newest first
+        Used by the GraphQL DataLoader
+        """
+        if projection is not None:
+            projection = {**projection, "patient_id": 1}  # needed for grouping
         cursor = self.collection.find(
-            {"status": AlertStatus.ACTIVE}
-        ).sort("created_at", -1).skip(skip).limit(limit)
-        return await cursor.to_list(length=limit)
+            {"status": AlertStatus.ACTIVE, "patient_id": {"$in": patient_ids}},
+            projection
+        ).sort("created_at", -1)
+        grouped: Dict[str, List[dict]] = {}
+        async for doc in cursor:
+            grouped.setdefault(doc["patient_id"], []).append(doc)
+        return grouped
+
+    async def find_changed_since(self, position: Position, limit: int = 100) -> List[dict]:
+        """
+        Alerts created or acknowledged after position, oldest change first
+        Each doc gets modified_at = the later of created_at / acknowledged_at
+        """
+        since, _ = position
+        pipeline = [
+            # Coarse, index-backed prefilter (created_at + acknowledged_at indexes)
+            {"$match": {"$or": [
+                {"created_at": {"$gte": since}},
+                {"acknowledged_at": {"$gte": since}},
+            ]}},
+            {"$addFields": {"modified_at": {
+                "$max": ["$created_at", {"$ifNull": ["$acknowledged_at", "$created_at"]}]
+            }}},
+            {"$match": after("modified_at", position)},
+            {"$sort": {"modified_at": 1, "_id": 1}},
+            {"$limit": limit},
+        ]
+        return await self.collection.aggregate(pipeline).to_list(length=limit)
 
     async def count_active(self) -> int:
         """Count active alerts"""
@@ -110,26 +355,45 @@ class AlertRepository:
         self,
         status: str,
         skip: int = 0,
-        limit: int = 50
+        limit: int = 50,
+        after_position: Optional[Position] = None,
+        projection: Optional[dict] = None
     ) -> List[dict]:
-        """Find alerts by status"""
-        cursor = self.collection.find(
-            {"status": status}
-        ).sort("created_at", -1).skip(skip).limit(limit)
+        """
+        Find alerts by status // newest first
+        after_position = keyset page (older than that (created_at, _id)) instead of skip
+        """
+        query = {"status": status}
+        if after_position is not None:
+            query.update(before("created_at", after_position))
+            skip = 0
+        cursor = self.collection.find(query, projection).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).skip(skip).limit(limit)
         return await cursor.to_list(length=limit)
 
+    async def count_by_status(self, status: str) -> int:
+        """Count alerts with this status"""
+        return await self.collection.count_documents({"status": status})
+
     async def acknowledge(self, alert_id: str) -> bool:
         """Mark alert as acknowledged // by alert_id"""
-        result = await self.collection.update_one(
+        # find_one_and_update hands back the updated doc for the event - still one round trip
+        alert = await self.collection.find_one_and_update(
             {"alert_id": alert_id, "status": AlertStatus.ACTIVE},
             {
                 "$set": {
                     "status": AlertStatus.ACKNOWLEDGED,
                     "acknowledged_at": datetime.utcnow()
                 }
-            }
+            },
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
+        if alert is None:
+            return False
+        collection_versions.bump(self.collection_name)
+        await broadcast_alert_event(AlertEventKind.ACKNOWLEDGED, alert)
+        return True
 
     async def find_by_alert_id(self, alert_id: str) -> Optional[dict]:
         """Find alert by friendly alert_id"""
@@ -140,6 +404,13 @@ class AlertRepository:
         since = datetime.utcnow() - timedelta(minutes=minutes)
         return await self.collection.count_documents({"created_at": {"$gte": since}})
 
+    async def find_created_between(self, start: datetime, end: datetime) -> List[dict]:
+        """Alerts with start <= created_at < end, oldest first"""
+        cursor = self.collection.find({"created_at": {"$gte": start, "$lt": end}}).sort(
+            [("created_at", 1), ("_id", 1)]
+        )
+        return await cursor.to_list(length=None)
+
 
 class SettingsRepository:
     """Settings/thresholds collection ops"""
@@ -162,6 +433,7 @@ class SettingsRepository:
             {"$set": {**thresholds, "updated_at": datetime.utcnow()}},
             upsert=True
         )
+        await collection_versions.publish_change(self.collection_name)
         return result.acknowledged
 
 
@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from domain.exceptions.custom_exceptions import SubscriberLaggingError
+from infrastructure.pubsub.backends import register_message_type
+from infrastructure.pubsub.broadcaster import (
+    broadcaster, ALERTS_CHANNEL, VITALS_CHANNEL
+)
+from config.constants import Collections
+from config.logging_config import get_logger
+
+logger = get_logger("database.versions")
+
+
+VERSIONS_CHANNEL = "collection_versions"
+
+
+@register_message_type
+@dataclass(frozen=True)
+class CollectionChanged:
+    """A write other workers can't infer from the vitals / alerts channels"""
+    collection: str
+    origin: str
+
+
+class CollectionVersions:
+    """
+    Per-collection version counters // cheap ETag validators
+
+    Repositories bump the counter on every write. Other workers learn about
+    writes from messages they already get: a VitalUpdate means patients + vitals
+    changed, an AlertEvent means alerts changed, and the rest (thresholds) send
+    an explicit CollectionChanged. Writes made outside this API (mongo shell,
+    scripts) aren't seen - restart the app after bulk edits.
+
+    The epoch is random per process, so validators never survive a restart.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def get(self, collection: str) -> int:
+        return self._versions.get(collection, 0)
+
+    def bump(self, *collections: str):
+        """Local write happened // call right after the write"""
+        for collection in collections:
+            self._versions[collection] = self._versions.get(collection, 0) + 1
+
+    async def publish_change(self, collection: str):
+        """Bump + tell the other workers // for writes with no vitals/alert message"""
+        self.bump(collection)
+        await broadcaster.publish(VERSIONS_CHANNEL, CollectionChanged(collection, self.epoch))
+
+    def etag(self, *collections: str, extra: Optional[str] = None) -> str:
+        """Weak ETag over the given collections' versions"""
+        parts = [self.epoch] + [str(self.get(c)) for c in collections]
+        if extra:
+            parts.append(extra)
+        return 'W/"' + "-".join(parts) + '"'
+
+    async def start(self):
+        """Follow other workers' writes // call on app startup"""
+        self._tasks = [
+            asyncio.create_task(self._follow(VITALS_CHANNEL)),
+            asyncio.create_task(self._follow(ALERTS_CHANNEL)),
+            asyncio.create_task(self._follow(VERSIONS_CHANNEL)),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _follow(self, channel: str):
+        while True:
+            try:
+                async for message in broadcaster.subscribe(channel, maxsize=0):
+                    if channel == VITALS_CHANNEL:
+                        self.bump(Collections.PATIENTS, Collections.VITALS)
+                    elif channel == ALERTS_CHANNEL:
+                        self.bump(Collections.ALERTS)
+                    elif isinstance(message, CollectionChanged) and message.origin != self.epoch:
+                        self.bump(message.collection)
+            except SubscriberLaggingError:
+                logger.warning(f"Collection versions resubscribing to {channel}", extra={
+                    "channel": channel,
+                    "event": "versions_resubscribe"
+                })
+
+
+# Singleton instance
+collection_versions = CollectionVersions()
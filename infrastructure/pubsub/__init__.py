@@ -1,13 +1,41 @@
 from infrastructure.pubsub.broadcaster import (
     broadcaster,
     Broadcaster,
+    SubscriberQueue,
+    OverflowPolicy,
     VitalUpdate,
+    AlertEvent,
     broadcast_vital,
+    broadcast_alert_event,
+    patient_channel,
+    VITALS_CHANNEL,
+    ALERTS_CHANNEL,
+    LIVE_VITALS_FIELDS,
+)
+from infrastructure.pubsub.backends import (
+    BroadcastBackend,
+    InMemoryBackend,
+    UnixSocketBackend,
+    create_backend,
+    register_message_type,
 )
 
 __all__ = [
     "broadcaster",
     "Broadcaster",
+    "SubscriberQueue",
+    "OverflowPolicy",
     "VitalUpdate",
+    "AlertEvent",
     "broadcast_vital",
+    "broadcast_alert_event",
+    "patient_channel",
+    "VITALS_CHANNEL",
+    "ALERTS_CHANNEL",
+    "LIVE_VITALS_FIELDS",
+    "BroadcastBackend",
+    "InMemoryBackend",
+    "UnixSocketBackend",
+    "create_backend",
+    "register_message_type",
 ]
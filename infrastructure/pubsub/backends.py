@@ -0,0 +1,328 @@
+import asyncio
+import dataclasses
+import fcntl
+import os
+import struct
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+
+import orjson
+
+from config.logging_config import get_logger
+
+logger = get_logger("pubsub.backend")
+
+
+# Local delivery callback: (channel, message) -> None
+Deliver = Callable[[str, Any], None]
+
+
+# --- Message codec ---
+# Messages cross process boundaries as JSON envelopes. Dataclass messages are
+# registered by name so the receiving worker can rebuild the same object.
+
+_MESSAGE_TYPES: Dict[str, type] = {}
+
+
+def register_message_type(cls: type) -> type:
+    """Class decorator // lets a dataclass message travel between workers"""
+    _MESSAGE_TYPES[cls.__name__] = cls
+    return cls
+
+
+def encode_message(channel: str, message: Any) -> bytes:
+    if dataclasses.is_dataclass(message) and type(message).__name__ in _MESSAGE_TYPES:
+        # Derived (init=False) fields are rebuilt by the receiver
+        data = {f.name: getattr(message, f.name) for f in dataclasses.fields(message) if f.init}
+        envelope = {"c": channel, "t": type(message).__name__, "d": data}
+    else:
+        envelope = {"c": channel, "t": None, "d": message}
+    return orjson.dumps(envelope)
+
+
+def decode_message(payload: bytes) -> tuple:
+    envelope = orjson.loads(payload)
+    data = envelope["d"]
+    cls = _MESSAGE_TYPES.get(envelope["t"]) if envelope["t"] else None
+    if cls is not None:
+        for field in dataclasses.fields(cls):
+            if field.type in (datetime, Optional[datetime]) and isinstance(data.get(field.name), str):
+                data[field.name] = datetime.fromisoformat(data[field.name])
+        data = cls(**data)
+    return envelope["c"], data
+
+
+# --- Backends ---
+
+class BroadcastBackend:
+    """
+    Transport between publishers and the local fan-out
+    publish() must eventually call the bound deliver callback in every process
+    that should see the message (just this one for the in-memory backend)
+    """
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def bind(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: Any):
+        raise NotImplementedError
+
+
+class InMemoryBackend(BroadcastBackend):
+    """Default // single process, delivers straight to local subscribers"""
+
+    async def publish(self, channel: str, message: Any):
+        self._deliver(channel, message)
+
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 1024 * 1024
+MAX_CLIENT_BUFFER_BYTES = 4 * 1024 * 1024
+PUBLISH_DRAIN_TIMEOUT = 5.0
+
+
+class UnixSocketBackend(BroadcastBackend):
+    """
+    Cross-process pub/sub for several workers on one host (gunicorn + uvicorn workers)
+
+    One worker holds an flock on <socket>.lock and runs the fan-out hub on a
+    Unix-domain socket. Every worker (hub included) connects to it as a client:
+    published frames go to the hub, the hub writes them to all clients, and
+    each client delivers them to its local subscribers. If the hub worker dies
+    the lock is released and another worker takes over on reconnect.
+    Frames are length-prefixed JSON envelopes.
+
+    Failure handling: any error on a client connection is logged and the client
+    reconnects (a frame that can't be decoded is logged and skipped). Publishers
+    wait for the socket to drain; one stuck for PUBLISH_DRAIN_TIMEOUT drops the
+    connection. The hub disconnects a client that falls MAX_CLIENT_BUFFER_BYTES
+    behind (logged) rather than buffer for it without limit - that worker's
+    subscribers miss what was published until it reconnects.
+    """
+
+    def __init__(self, socket_path: str, reconnect_delay: float = 0.5):
+        super().__init__()
+        self.socket_path = socket_path
+        self.lock_path = f"{socket_path}.lock"
+        self.reconnect_delay = reconnect_delay
+
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._hub_clients: Set[asyncio.StreamWriter] = set()
+        self._hub_tasks: Set[asyncio.Task] = set()
+
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_hub(self) -> bool:
+        return self._server is not None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        # Give the first connection a moment so early publishes go cross-process
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=2)
+        except asyncio.TimeoutError:
+            logger.warning("Pub/sub hub not reachable yet, publishing locally until it is", extra={
+                "socket_path": self.socket_path,
+                "event": "pubsub_connect_pending"
+            })
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._writer:
+            self._writer.close()
+        if self._server:
+            self._server.close()
+            for writer in list(self._hub_clients):
+                writer.close()
+            # Let client handlers see EOF and finish on their own
+            if self._hub_tasks:
+                await asyncio.wait(self._hub_tasks, timeout=1)
+            await self._server.wait_closed()
+            self._server = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # releases the flock
+            self._lock_fd = None
+
+    async def publish(self, channel: str, message: Any):
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            # Hub unreachable - at least our own subscribers get it
+            self._deliver(channel, message)
+            return
+        payload = encode_message(channel, message)
+        try:
+            writer.write(FRAME_HEADER.pack(len(payload)) + payload)
+            await asyncio.wait_for(writer.drain(), timeout=PUBLISH_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Pub/sub hub not reading, dropping the connection", extra={
+                "channel": channel,
+                "event": "pubsub_publish_stalled"
+            })
+            writer.close()  # _run reconnects
+            # The echo would have come back on this connection - deliver our copy here
+            self._deliver(channel, message)
+        except ConnectionError as e:
+            logger.warning(f"Publish to pub/sub hub failed: {e}", extra={
+                "channel": channel,
+                "event": "pubsub_publish_failed"
+            })
+            self._deliver(channel, message)
+
+    # --- client side ---
+
+    async def _run(self):
+        while True:
+            try:
+                await self._try_become_hub()
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            except asyncio.CancelledError:
+                raise
+            except OSError as e:
+                logger.debug(f"Pub/sub hub not available: {e}", extra={"event": "pubsub_connect_retry"})
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            except Exception as e:
+                logger.error(f"Pub/sub connect failed: {e}", extra={
+                    "error": str(e),
+                    "event": "pubsub_connect_error"
+                }, exc_info=True)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            self._connected.set()
+            logger.info("Connected to pub/sub hub", extra={
+                "socket_path": self.socket_path,
+                "is_hub": self.is_hub,
+                "event": "pubsub_connected"
+            })
+            try:
+                while True:
+                    payload = await self._read_frame(reader)
+                    self._deliver_frame(payload)
+            except asyncio.CancelledError:
+                raise
+            except (asyncio.IncompleteReadError, ConnectionError):
+                logger.warning("Lost connection to pub/sub hub", extra={"event": "pubsub_disconnected"})
+            except Exception as e:
+                # Anything else - reconnect rather than leave this worker publishing locally for good
+                logger.error(f"Pub/sub connection failed: {e}", extra={
+                    "error": str(e),
+                    "event": "pubsub_disconnected"
+                }, exc_info=True)
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _deliver_frame(self, payload: bytes):
+        """One frame to local subscribers // a bad frame is logged and skipped, the stream stays in sync"""
+        try:
+            channel, message = decode_message(payload)
+        except Exception as e:
+            logger.error(f"Undecodable pub/sub frame dropped: {e}", extra={
+                "error": str(e),
+                "frame_bytes": len(payload),
+                "event": "pubsub_frame_dropped"
+            })
+            return
+        try:
+            self._deliver(channel, message)
+        except Exception as e:
+            logger.error(f"Pub/sub delivery failed on '{channel}': {e}", extra={
+                "channel": channel,
+                "error": str(e),
+                "event": "pubsub_deliver_error"
+            }, exc_info=True)
+
+    @staticmethod
+    async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+        header = await reader.readexactly(FRAME_HEADER.size)
+        (length,) = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_BYTES:
+            raise ConnectionError(f"Frame too large ({length} bytes)")
+        return await reader.readexactly(length)
+
+    # --- hub side ---
+
+    async def _try_become_hub(self):
+        """Whoever holds the lock file runs the hub"""
+        if self._server is not None:
+            return
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)  # another worker is the hub
+            return
+
+        self._lock_fd = fd
+        # start_unix_server removes a stale socket file left by a dead hub
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logger.info("Pub/sub hub started", extra={
+            "socket_path": self.socket_path,
+            "pid": os.getpid(),
+            "event": "pubsub_hub_started"
+        })
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._hub_tasks.add(task)
+        self._hub_clients.add(writer)
+        try:
+            while True:
+                payload = await self._read_frame(reader)
+                frame = FRAME_HEADER.pack(len(payload)) + payload
+                for client in list(self._hub_clients):
+                    if client.is_closing():
+                        continue
+                    if client.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER_BYTES:
+                        # That worker is stuck - cut it off (it reconnects) instead of
+                        # buffering for it without limit or silently skipping its frames
+                        logger.warning("Pub/sub client too slow, disconnecting it", extra={
+                            "buffered_bytes": client.transport.get_write_buffer_size(),
+                            "event": "pubsub_client_lagging"
+                        })
+                        self._hub_clients.discard(client)
+                        client.transport.abort()
+                        continue
+                    client.write(frame)
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Pub/sub hub client failed: {e}", extra={
+                "error": str(e),
+                "event": "pubsub_hub_client_error"
+            }, exc_info=True)
+        finally:
+            self._hub_clients.discard(writer)
+            self._hub_tasks.discard(task)
+            writer.close()
+
+
+def create_backend(name: str, socket_path: str) -> BroadcastBackend:
+    """Backend from Settings.pubsub_backend // memory (default) or unix"""
+    if name == "unix":
+        return UnixSocketBackend(socket_path)
+    if name != "memory":
+        raise ValueError(f"Unknown pub/sub backend '{name}' (expected 'memory' or 'unix')")
+    return InMemoryBackend()
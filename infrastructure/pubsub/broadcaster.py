@@ -1,81 +1,425 @@
 import asyncio
-from typing import AsyncGenerator, Dict, Set, Any
-from dataclasses import dataclass
+import itertools
+import uuid
+from collections import OrderedDict
+from typing import AsyncGenerator, Awaitable, Callable, Dict, FrozenSet, Any, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 
+import orjson
 
-@dataclass
+from domain.exceptions.custom_exceptions import SubscriberLaggingError
+from infrastructure.pubsub.backends import (
+    BroadcastBackend, InMemoryBackend, create_backend, register_message_type
+)
+from config.settings import get_settings
+from config.logging_config import get_logger
+
+logger = get_logger("pubsub")
+
+
+# Canonical liveVitals / patientVitals selection, in response order
+LIVE_VITALS_FIELDS = ("id", "heartRate", "oxygenLevel", "bodyTemperature", "steps", "timestamp")
+
+
+@register_message_type
+@dataclass(frozen=True)
 class VitalUpdate:
-    """Vital update message for subscriptions"""
+    """
+    Vital update message for subscriptions
+    Immutable - the same instance sits in every subscriber queue
+    """
     patient_id: str
     heart_rate: int
     oxygen_level: int
     body_temperature: float
     steps: int
     timestamp: datetime
+    patient_status: Optional[str] = None  # OK / ALERT after threshold checks (SSE patient rows)
+    reading_id: Optional[str] = None      # stored vitals _id (recent readings buffers de-dup on it)
+    last_update: Optional[datetime] = None  # patients.last_update written with this reading
+    # LIVE_VITALS_FIELDS as JSON, encoded once per process when the update is built
+    payload: str = field(init=False, repr=False, compare=False)
+    # Other selections of LIVE_VITALS_FIELDS (e.g. the Node-RED flow's), encoded on first use
+    _shapes: Dict[Tuple[str, ...], str] = field(init=False, repr=False, compare=False, default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, "payload", self._encode(LIVE_VITALS_FIELDS))
+
+    def _encode(self, fields: Tuple[str, ...]) -> str:
+        values = {
+            "id": self.patient_id,
+            "heartRate": self.heart_rate,
+            "oxygenLevel": self.oxygen_level,
+            "bodyTemperature": float(self.body_temperature),  # GraphQL Float
+            "steps": self.steps,
+            "timestamp": self.timestamp,
+        }
+        return orjson.dumps({name: values[name] for name in fields}).decode()
+
+    def payload_for(self, fields: Tuple[str, ...]) -> str:
+        """JSON for one selection shape // once per shape, shared by every socket selecting it"""
+        if fields == LIVE_VITALS_FIELDS:
+            return self.payload
+        encoded = self._shapes.get(fields)
+        if encoded is None:
+            encoded = self._shapes[fields] = self._encode(fields)
+        return encoded
+
+    @property
+    def conflation_key(self) -> str:
+        """A newer reading for the same patient may replace a queued one"""
+        return self.patient_id
+
+
+@register_message_type
+@dataclass(frozen=True)
+class AlertEvent:
+    """Alert lifecycle message // kind is an AlertEventKind, the rest mirrors the alert doc"""
+    kind: str
+    id: str
+    alert_id: str
+    patient_id: str
+    metric: str
+    type: str
+    value: float
+    threshold: float
+    status: str
+    created_at: datetime
+    acknowledged_at: Optional[datetime] = None
+    # no conflation_key - every alert event must arrive
+
+
+# Channels
+VITALS_CHANNEL = "vitals"  # firehose - every reading
+ALERTS_CHANNEL = "alerts"  # alert created / acknowledged
+
+
+def patient_channel(patient_id: str) -> str:
+    """Per-patient topic // vitals:P-101"""
+    return f"{VITALS_CHANNEL}:{patient_id}"
+
+
+class OverflowPolicy:
+    """What a full subscriber queue does with the next message"""
+    DROP_OLDEST = "drop_oldest"    # make room by dropping the oldest queued message
+    DROP_NEWEST = "drop_newest"    # drop the incoming message
+    CONFLATE = "conflate"          # replace that patient's queued message with the newer one
+    ALL = (DROP_OLDEST, DROP_NEWEST, CONFLATE)
+
+
+class SubscriberQueue:
+    """
+    Bounded per-subscriber queue
+    - maxsize <= 0 means unbounded
+    - the overflow policy only kicks in once the queue is full
+    - conflation keys on message.conflation_key (messages without one are never conflated)
+    - counts delivered / dropped / conflated messages and tracks lag (queue depth)
+    - a subscriber that drops disconnect_after_drops messages without ever
+      catching up (emptying its queue) gets disconnected
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        maxsize: int,
+        policy: str,
+        disconnect_after_drops: int = 0
+    ):
+        if policy not in OverflowPolicy.ALL:
+            raise ValueError(f"Unknown overflow policy '{policy}' (use {', '.join(OverflowPolicy.ALL)})")
+        self.id = uuid.uuid4().hex[:8]
+        self.channel = channel
+        self.maxsize = maxsize
+        self.policy = policy
+        self.disconnect_after_drops = disconnect_after_drops
+        self.created_at = datetime.utcnow()
+
+        # seq -> message, oldest first
+        self._items: "OrderedDict[int, Any]" = OrderedDict()
+        self._seq = itertools.count()
+        # conflation key (patient_id) -> seq of its newest queued message
+        self._latest: Dict[Any, int] = {}
+        self._ready = asyncio.Event()
+        self._drops_since_caught_up = 0
+        self.closed = False
+
+        # Counters
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_lag = 0
+
+    @property
+    def lag(self) -> int:
+        """Messages waiting for this subscriber"""
+        return len(self._items)
+
+    def put_nowait(self, message: Any):
+        """Enqueue without blocking // applies the overflow policy when full"""
+        if self.closed:
+            return
+
+        key = getattr(message, "conflation_key", None)
+
+        if 0 < self.maxsize <= len(self._items):
+            if self.policy == OverflowPolicy.CONFLATE and key in self._latest:
+                # Newer reading replaces the queued one, keeps its place in line
+                self._items[self._latest[key]] = message
+                self.conflated += 1
+                return
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                self._record_drop()
+                return
+            # DROP_OLDEST (and CONFLATE with nothing to merge into)
+            self._pop_oldest()
+            self._record_drop()
+            if self.closed:
+                return
+
+        seq = next(self._seq)
+        self._items[seq] = message
+        if key is not None:
+            self._latest[key] = seq
+        self.max_lag = max(self.max_lag, len(self._items))
+        self._ready.set()
+
+    def _pop_oldest(self) -> Any:
+        seq, message = self._items.popitem(last=False)
+        key = getattr(message, "conflation_key", None)
+        if self._latest.get(key) == seq:
+            del self._latest[key]
+        return message
+
+    def _record_drop(self):
+        self.dropped += 1
+        self._drops_since_caught_up += 1
+        if 0 < self.disconnect_after_drops <= self._drops_since_caught_up:
+            self.close()
+            logger.warning("Disconnecting lagging subscriber", extra={
+                "subscriber_id": self.id,
+                "channel": self.channel,
+                "dropped": self.dropped,
+                "lag": self.lag,
+                "event": "subscriber_lagging"
+            })
+
+    def close(self):
+        self.closed = True
+        self._ready.set()  # wake the consumer so it sees it's closed
+
+    async def get(self) -> Any:
+        """
+        Wait for the next message
+        Raises: SubscriberLaggingError if we were disconnected for lagging
+        """
+        while True:
+            if self.closed:
+                raise SubscriberLaggingError(self.channel)
+            if self._items:
+                break
+            self._ready.clear()
+            await self._ready.wait()
+
+        message = self._pop_oldest()
+        self.delivered += 1
+        if not self._items:
+            self._drops_since_caught_up = 0  # caught up
+        return message
+
+    def drain(self) -> List[Any]:
+        """
+        Take everything queued right now, oldest first (never waits)
+        Raises: SubscriberLaggingError if we were disconnected for lagging
+        """
+        if self.closed:
+            raise SubscriberLaggingError(self.channel)
+        messages = list(self._items.values())
+        self._items.clear()
+        self._latest.clear()
+        self.delivered += len(messages)
+        self._drops_since_caught_up = 0
+        return messages
+
+    def stats(self) -> dict:
+        return {
+            "subscriber_id": self.id,
+            "channel": self.channel,
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "connected_since": self.created_at,
+        }
 
 
 class Broadcaster:
     """
-    Simple in-memory broadcaster for real-time updates
+    Broadcaster for real-time updates
     Used by GraphQL subscriptions to stream live data
+
+    Publishing goes through a backend (in-memory by default, or a Unix-socket hub
+    shared by all workers on the host); every process then fans messages out to
+    its own subscribers.
+
+    Subscriber sets are copy-on-write frozensets: subscribe/unsubscribe swap in a
+    new set, delivery just grabs the current one. Everything runs on the event loop
+    with no await in between, so delivery needs no lock.
     """
 
-    def __init__(self):
-        # Subscribers: channel -> set of queues
-        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
-        self._lock = asyncio.Lock()
+    def __init__(self, backend: Optional[BroadcastBackend] = None):
+        # Subscribers: channel -> immutable set of queues
+        self._subscribers: Dict[str, FrozenSet[SubscriberQueue]] = {}
+        self._backend = backend or InMemoryBackend()
+        self._backend.bind(self._deliver)
+
+    async def start(self):
+        """Start the backend // call on app startup"""
+        await self._backend.start()
+
+    async def stop(self):
+        """Stop the backend // call on app shutdown"""
+        await self._backend.stop()
 
-    async def subscribe(self, channel: str) -> AsyncGenerator[Any, None]:
+    def _add(self, channel: str, queue: SubscriberQueue):
+        self._subscribers[channel] = self._subscribers.get(channel, frozenset()) | {queue}
+
+    def _remove(self, channel: str, queue: SubscriberQueue):
+        remaining = self._subscribers.get(channel, frozenset()) - {queue}
+        if remaining:
+            self._subscribers[channel] = remaining
+        else:
+            self._subscribers.pop(channel, None)
+
+    async def subscribe(
+        self,
+        channel: str,
+        maxsize: Optional[int] = None,
+        policy: Optional[str] = None,
+        snapshot: Optional[Callable[[], Awaitable[Iterable[Any]]]] = None
+    ) -> AsyncGenerator[Any, None]:
         """
         Subscribe to a channel and yield messages
         Usage: async for msg in broadcaster.subscribe("vitals"): ...
+               async for msg in broadcaster.subscribe(patient_channel("P-101")): ...
+        Queue bound / overflow policy default to Settings (BROADCASTER_*)
+        snapshot() results are yielded first; it runs after the queue is registered,
+        so anything published meanwhile is queued, not lost (it may repeat snapshot items)
+        Raises: SubscriberLaggingError when dropped for not keeping up
         """
-        queue: asyncio.Queue = asyncio.Queue()
-
-        async with self._lock:
-            if channel not in self._subscribers:
-                self._subscribers[channel] = set()
-            self._subscribers[channel].add(queue)
+        settings = get_settings()
+        queue = SubscriberQueue(
+            channel=channel,
+            maxsize=settings.broadcaster_queue_maxsize if maxsize is None else maxsize,
+            policy=policy or settings.broadcaster_overflow_policy,
+            disconnect_after_drops=settings.broadcaster_disconnect_after_drops
+        )
+        self._add(channel, queue)
 
         try:
+            if snapshot is not None:
+                for message in await snapshot():
+                    yield message
             while True:
                 message = await queue.get()
                 yield message
         finally:
             # Cleanup on disconnect
-            async with self._lock:
-                self._subscribers[channel].discard(queue)
-                if not self._subscribers[channel]:
-                    del self._subscribers[channel]
+            queue.close()
+            self._remove(channel, queue)
+
+    async def subscribe_batched(
+        self,
+        channel: str,
+        interval: float,
+        max_items: int
+    ) -> AsyncGenerator[List[Any], None]:
+        """
+        Subscribe to a channel and yield batches, one per interval (seconds)
+        Only the newest message per patient is kept inside a window; patients past
+        max_items wait for the next window (still newest-wins). Empty windows yield nothing.
+        Raises: SubscriberLaggingError when dropped for not keeping up
+        """
+        settings = get_settings()
+        queue = SubscriberQueue(
+            channel=channel,
+            maxsize=settings.broadcaster_queue_maxsize,
+            policy=settings.broadcaster_overflow_policy,
+            disconnect_after_drops=settings.broadcaster_disconnect_after_drops
+        )
+        self._add(channel, queue)
+        # patient_id -> newest message not sent yet (oldest pending first)
+        pending: Dict[Any, Any] = {}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+
+        try:
+            while True:
+                deadline += interval
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+                if loop.time() - deadline > interval:
+                    deadline = loop.time()  # consumer stalled - don't burst to catch up
+
+                for message in queue.drain():
+                    # Existing key keeps its place, so nobody waits more than a few windows
+                    pending[getattr(message, "patient_id", None)] = message
+                if not pending:
+                    continue
+
+                keys = list(itertools.islice(pending, max_items))
+                yield [pending.pop(key) for key in keys]
+        finally:
+            queue.close()
+            self._remove(channel, queue)
 
     async def publish(self, channel: str, message: Any):
         """
-        Publish message to all subscribers on a channel
+        Publish message to all subscribers on a channel (in every worker)
         """
-        async with self._lock:
-            if channel in self._subscribers:
-                for queue in self._subscribers[channel]:
-                    try:
-                        queue.put_nowait(message)
-                    except asyncio.QueueFull:
-                        # Skip if queue is full (slow consumer)
-                        pass
+        await self._backend.publish(channel, message)
+
+    def _deliver(self, channel: str, message: Any):
+        """
+        Fan out to this process's subscribers // called by the backend
+        Cost is O(subscribers of this channel) - no lock, no scan of other channels
+        Never blocks: full queues apply their overflow policy
+        """
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
 
     async def publish_vital_update(self, update: VitalUpdate):
         """
-        Publish vital update to the vitals channel
+        Publish vital update to the firehose + that patient's channel
         Called after ingesting new vital data
         """
-        await self.publish("vitals", update)
+        await self.publish(VITALS_CHANNEL, update)
+        await self.publish(patient_channel(update.patient_id), update)
+
+    async def publish_alert_event(self, event: AlertEvent):
+        """Publish alert lifecycle event // called by AlertRepository"""
+        await self.publish(ALERTS_CHANNEL, event)
 
     def get_subscriber_count(self, channel: str) -> int:
         """Get number of active subscribers on a channel"""
-        return len(self._subscribers.get(channel, set()))
+        return len(self._subscribers.get(channel, ()))
+
+    def get_stats(self) -> List[dict]:
+        """Per-subscriber lag + drop counters // for sizing the queue limits"""
+        return [
+            queue.stats()
+            for queues in self._subscribers.values()
+            for queue in queues
+        ]
 
 
-# Singleton broadcaster instance
-broadcaster = Broadcaster()
+# Singleton broadcaster instance // backend picked by PUBSUB_BACKEND
+_settings = get_settings()
+broadcaster = Broadcaster(
+    backend=create_backend(_settings.pubsub_backend, _settings.pubsub_socket_path)
+)
 
 
 # Helper function to publish vitals (used by vital_service)
@@ -85,7 +429,10 @@ async def broadcast_vital(
     oxygen_level: int,
     body_temperature: float,
     steps: int,
-    timestamp: datetime
+    timestamp: datetime,
+    patient_status: Optional[str] = None,
+    reading_id: Optional[str] = None,
+    last_update: Optional[datetime] = None
 ):
     """Convenience function to broadcast vital update"""
     update = VitalUpdate(
@@ -94,6 +441,27 @@ async def broadcast_vital(
         oxygen_level=oxygen_level,
         body_temperature=body_temperature,
         steps=steps,
-        timestamp=timestamp
+        timestamp=timestamp,
+        patient_status=patient_status,
+        reading_id=reading_id,
+        last_update=last_update
     )
     await broadcaster.publish_vital_update(update)
+
+
+async def broadcast_alert_event(kind: str, alert: dict):
+    """Convenience function to broadcast an alert event from its Mongo doc"""
+    event = AlertEvent(
+        kind=kind,
+        id=str(alert["_id"]),
+        alert_id=alert["alert_id"],
+        patient_id=alert["patient_id"],
+        metric=alert["metric"],
+        type=alert["type"],
+        value=float(alert["value"]),
+        threshold=float(alert["threshold"]),
+        status=alert["status"],
+        created_at=alert["created_at"],
+        acknowledged_at=alert.get("acknowledged_at")
+    )
+    await broadcaster.publish_alert_event(event)
@@ -12,7 +12,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from config.settings import get_settings
 from config.logging_config import setup_logging, get_logger
 from infrastructure.database.connection import connect_db, close_db
+from infrastructure.database.indexes import ensure_indexes
+from infrastructure.database.versions import collection_versions
 from api.middleware.logging_middleware import log_requests_middleware
+from api.middleware.compression import CompressionMiddleware
+from api.rest.responses import FastJSONResponse
+from domain.services.export_service import export_service
+from domain.services.patient_stream_service import patient_feed
+from domain.services.patient_cache import patient_cache
+from domain.services.reading_buffer import recent_readings
+from domain.services.archive_service import vital_archiver
+from domain.services.analytics_service import analytics_service, analytics_snapshotter
+from infrastructure.pubsub.broadcaster import broadcaster
 
 # Import REST routers
 from api.rest.health import router as health_router
@@ -38,6 +49,17 @@ async def lifespan(app: FastAPI):
     try:
         await connect_db()
         app_logger.info("Database connected successfully", extra={"event": "db_connected"})
+        await ensure_indexes()
+        await patient_cache.warm()
+        await broadcaster.start()
+        app_logger.info("Pub/sub broadcaster started", extra={"event": "pubsub_ready"})
+        await collection_versions.start()
+        await patient_cache.start()
+        await recent_readings.start()
+        await vital_archiver.start()
+        await analytics_snapshotter.start()
+        await patient_feed.start()
+        app_logger.info("Patient SSE stream at /api/patients/stream", extra={"event": "sse_ready"})
         app_logger.info("GraphQL endpoint available at /graphql", extra={"event": "graphql_ready"})
         app_logger.info("GraphQL subscriptions via WebSocket at /graphql", extra={"event": "websocket_ready"})
         app_logger.info("Application startup complete", extra={"event": "app_ready"})
@@ -50,6 +72,15 @@ async def lifespan(app: FastAPI):
     # Shutdown
     app_logger.info("Starting application shutdown...", extra={"event": "app_shutdown_start"})
     try:
+        await export_service.shutdown()
+        await patient_feed.stop()
+        await collection_versions.stop()
+        await patient_cache.stop()
+        await recent_readings.stop()
+        await vital_archiver.stop()
+        await analytics_snapshotter.stop()
+        await analytics_service.shutdown()
+        await broadcaster.stop()
         await close_db()
         app_logger.info("Database disconnected successfully", extra={"event": "db_disconnected"})
     except Exception as e:
@@ -65,6 +96,7 @@ app = FastAPI(
     version=settings.app_version,
     description="REST + GraphQL API for Smart Health Monitoring System // SIS4415 Final Project",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,  # orjson for every JSON route
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -86,6 +118,17 @@ app.add_middleware(
 async def logging_middleware(request: Request, call_next):
     return await log_requests_middleware(request, call_next)
 
+# Compression - outermost, so everything above gets compressed on the way out
+# zstd/br/gzip responses by Accept-Encoding, gzip request bodies on ingest (gateways batching readings)
+app.add_middleware(
+    CompressionMiddleware,
+    encodings=settings.compression_encodings.split(","),
+    minimum_size=settings.compression_min_size,
+    media_types=settings.compression_media_types.split(","),
+    decompress_paths=("/api/patients/data", "/api/patients/data/batch"),
+    max_decompressed_size=settings.request_max_decompressed_bytes,
+)
+
 
 # Routes
 app.include_router(health_router, prefix="/api")      # Health checks (am I alive?) I hope so
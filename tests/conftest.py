@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read once (lru_cache) - point everything at throwaway places
+# before the app is imported
+_scratch = tempfile.mkdtemp(prefix="health-monitoring-tests-")
+os.environ.update(
+    MONGO_URI="memory://",
+    ANALYTICS_DIR=os.path.join(_scratch, "analytics"),
+    ANALYTICS_SNAPSHOT_INTERVAL_SECONDS="0",
+    ARCHIVE_DIR=os.path.join(_scratch, "archive"),
+    EXPORT_DIR=os.path.join(_scratch, "exports"),
+    PUBSUB_BACKEND="memory",
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="module")
+def client():
+    """App on the memory:// engine, auth bypassed // one app (and database) per test module"""
+    from fastapi.testclient import TestClient
+
+    import main
+    from api.middleware.jwt_auth import get_current_user
+
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "test-user", "username": "test"}
+    with TestClient(main.app) as test_client:
+        yield test_client
+    main.app.dependency_overrides.clear()
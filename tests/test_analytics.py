@@ -0,0 +1,104 @@
+import os
+from datetime import datetime, timedelta
+
+import duckdb
+import pytest
+from bson import ObjectId
+
+from domain.exceptions.custom_exceptions import AnalyticsQueryError, AnalyticsTimeoutError
+from infrastructure.analytics.engine import AnalyticsEngine
+from infrastructure.analytics.snapshots import ParquetSnapshots
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+SLOW = "SELECT sum(hash(a.range * b.range)) FROM range(100000) a, range(100000) b"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A Parquet file right next to the snapshot directory - must stay unreadable
+    duckdb.connect().execute(f"COPY (SELECT 'secret' AS s) TO '{tmp_path / 'secret.parquet'}' (FORMAT parquet)")
+    root = str(tmp_path / "snapshots")
+    snapshots = ParquetSnapshots(root)
+    snapshots.append_vitals([
+        {
+            "_id": ObjectId(),
+            "patient_id": f"p{i % 2}",
+            "heart_rate": 60 + i,
+            "oxygen_level": 97,
+            "body_temperature": 36.6,
+            "steps": i,
+            "timestamp": T0 + timedelta(minutes=i),
+            "created_at": T0 + timedelta(minutes=i),
+        }
+        for i in range(10)
+    ])
+    snapshots.close()
+    engine = AnalyticsEngine(root, threads=1)
+    yield engine
+    engine.close()
+
+
+def test_parameterized_select(engine):
+    columns, rows, truncated, _ = engine.execute(
+        "SELECT patient_id, count(*) AS n, max(heart_rate) AS hr FROM vitals "
+        "WHERE patient_id = ? GROUP BY patient_id",
+        ["p1"], 100, 5
+    )
+    assert columns == ["patient_id", "n", "hr"]
+    assert rows == [["p1", 5, 69]] and not truncated
+
+
+def test_rows_are_capped(engine):
+    _, rows, truncated, _ = engine.execute("SELECT * FROM vitals", None, 3, 5)
+    assert len(rows) == 3 and truncated
+
+
+def test_tables_lists_the_snapshot_views(engine):
+    tables = {t["name"]: t for t in engine.tables()}
+    assert "vitals" in tables and tables["vitals"]["files"] == 1
+    assert "heart_rate" in {c["name"] for c in tables["vitals"]["columns"]}
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; SELECT 2",
+    "COPY (SELECT * FROM vitals) TO '/tmp/out.csv'",
+    "CREATE TABLE t AS SELECT 1",
+    "ATTACH '/tmp/other.db'",
+    "SET enable_external_access = true",
+    "INSTALL httpfs",
+    "SELEC oops",
+])
+def test_only_one_select_is_allowed(engine, sql):
+    with pytest.raises(AnalyticsQueryError):
+        engine.execute(sql, None, 10, 5)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM read_parquet('{root}/../secret.parquet')",
+    "SELECT * FROM read_parquet('{parent}/secret.parquet')",
+    "SELECT * FROM read_csv('/etc/passwd')",
+])
+def test_files_outside_the_snapshots_are_off_limits(engine, sql):
+    sql = sql.format(root=engine.root, parent=os.path.dirname(engine.root))
+    with pytest.raises(AnalyticsQueryError, match="(?i)permission|access"):
+        engine.execute(sql, None, 10, 5)
+
+
+def test_slow_query_is_interrupted(engine):
+    with pytest.raises(AnalyticsTimeoutError):
+        engine.execute(SLOW, None, 10, 0.05)
+    # The connection is still usable afterwards
+    assert engine.execute("SELECT 1", None, 10, 5)[1] == [[1]]
+
+
+# --- through the API ---
+
+def test_query_endpoint_errors(client, monkeypatch):
+    from config.settings import get_settings
+
+    url = "/api/reports/analytics/query"
+    assert client.post(url, json={"sql": "DROP TABLE vitals"}).status_code == 400
+    assert client.post(url, json={"sql": "SELECT 42 AS answer"}).json()["rows"] == [[42]]
+
+    monkeypatch.setattr(get_settings(), "analytics_query_timeout_seconds", 0.05)
+    assert client.post(url, json={"sql": SLOW}).status_code == 504
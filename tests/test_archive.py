@@ -0,0 +1,130 @@
+import math
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from infrastructure.archive.codec import (
+    decode_floats,
+    decode_timestamps,
+    decode_xor,
+    encode_floats,
+    encode_timestamps,
+    encode_xor,
+)
+from infrastructure.archive.segments import (
+    BLOCK_ROWS,
+    VitalArchive,
+    block_rows,
+    encode_segment,
+    read_directory,
+)
+
+DAY = date(2026, 1, 1)
+T0 = datetime(2026, 1, 1, 0, 0, 0)
+
+
+def _rows(count: int, start: int = 0, patient_id: str = "p1"):
+    return [
+        {
+            "_id": ObjectId(f"{i + 1:024x}"),
+            "patient_id": patient_id,
+            "heart_rate": 60 + i % 40,
+            "oxygen_level": 95 if i % 7 else None,
+            "body_temperature": 36.5 + (i % 3) / 10,
+            "steps": i * 3,
+            "timestamp": T0 + timedelta(seconds=i),
+            "created_at": T0 + timedelta(seconds=i, milliseconds=250),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+# --- codec ---
+
+@pytest.mark.parametrize("values", [
+    [],
+    [1_700_000_000_000],
+    [1_700_000_000_000 + 1000 * i for i in range(100)],           # steady 1 Hz
+    [0, 1, 3, 100, 101, 50_000, 49_999, 2 ** 40, -5, 2 ** 62],    # every delta-of-delta bucket + fallback
+])
+def test_timestamps_round_trip(values):
+    assert decode_timestamps(encode_timestamps(values), len(values)) == values
+
+
+def test_steady_timestamps_cost_about_a_bit_each():
+    values = [1_700_000_000_000 + 1000 * i for i in range(1000)]
+    assert len(encode_timestamps(values)) < 1000 // 8 + 32
+
+
+@pytest.mark.parametrize("values", [
+    [72.0] * 10,
+    [36.6, 36.7, 36.6, 37.9, -1.5, 0.0, 1e300, 5e-324],
+    [None, 98.0, None, float("inf")],
+])
+def test_floats_round_trip(values):
+    decoded = decode_floats(encode_floats(values), len(values))
+    for original, value in zip(values, decoded):
+        if original is None:
+            assert math.isnan(value)
+        else:
+            assert value == original
+
+
+def test_ids_round_trip():
+    ids = [int.from_bytes(ObjectId().binary, "big") for _ in range(50)]
+    assert decode_xor(encode_xor(ids, 96), len(ids), 96) == ids
+
+
+# --- segments ---
+
+def test_segment_round_trip_across_blocks():
+    rows = _rows(BLOCK_ROWS + 10)
+    data = encode_segment("p1", rows)
+    patient_id, count, blocks = read_directory(data)
+    assert (patient_id, count, len(blocks)) == ("p1", len(rows), 2)
+    assert blocks[0].rows == BLOCK_ROWS
+    assert blocks[0].hr_sum == sum(r["heart_rate"] for r in rows[:BLOCK_ROWS])
+
+    decoded = [row for block in blocks for row in block_rows(patient_id, data, block)]
+    assert decoded == rows
+
+
+def test_write_day_merges_and_skips_unchanged(tmp_path):
+    archive = VitalArchive(str(tmp_path))
+    first = archive.write_day("p1", DAY, _rows(20))
+    # Overlapping batch (a retried archiving pass) + new rows -> merged by _id
+    merged = archive.write_day("p1", DAY, _rows(15, start=10))
+    assert merged.rows == 25
+
+    mtime = os.stat(merged.path).st_mtime_ns
+    unchanged = archive.write_day("p1", DAY, _rows(5, start=3))
+    assert unchanged == merged and os.stat(merged.path).st_mtime_ns == mtime
+    assert first.path == merged.path
+
+
+def test_reads_only_after_publish_and_in_keyset_order(tmp_path):
+    archive = VitalArchive(str(tmp_path))
+    rows = _rows(30)
+    archive.write_day("p1", DAY, rows)
+    assert archive.read_before("p1", None, 10) == []  # no watermark yet - nothing visible
+
+    archive.publish(datetime(2026, 1, 2))
+    newest = archive.read_before("p1", None, 10)
+    assert newest == rows[::-1][:10]
+    position = (newest[-1]["timestamp"], newest[-1]["_id"])
+    assert archive.read_before("p1", position, 10) == rows[::-1][10:20]
+    assert archive.count("p1") == 30
+
+    # Another worker's view, rebuilt from disk
+    other = VitalArchive(str(tmp_path))
+    assert other.load() == 1
+    assert other.read_window(T0 + timedelta(seconds=25), 100, patient_id="p1") == rows[::-1][:5]
+
+
+def test_watermark_never_moves_back(tmp_path):
+    archive = VitalArchive(str(tmp_path))
+    archive.publish(datetime(2026, 1, 3))
+    archive.publish(datetime(2026, 1, 2))
+    assert archive.watermark == datetime(2026, 1, 3)
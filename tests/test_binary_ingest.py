@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+
+import msgpack
+import pytest
+from pydantic import ValidationError
+
+from domain.exceptions.custom_exceptions import IngestBatchTooLargeError, ValidationException
+from domain.models.vital import (
+    VITAL_FRAME,
+    VITAL_FRAME_MEDIA_TYPE,
+    parse_vital_batch_msgpack,
+    parse_vital_frame,
+    parse_vital_frames,
+    parse_vital_msgpack,
+)
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+T0_MS = int((T0 - datetime(1970, 1, 1)) / timedelta(milliseconds=1))
+EXPECTED = {
+    "deviceId": "P-1",
+    "heartRate": 72,
+    "oxygenLevel": 97,
+    "bodyTemperature": 36.6,
+    "steps": 10,
+    "timestamp": T0,
+}
+
+
+def _frame(device_id: str = "P-1", ts_ms: int = T0_MS, heart_rate: int = 72, temperature: int = 3660) -> bytes:
+    return VITAL_FRAME.pack(device_id.encode(), ts_ms, heart_rate, 97, temperature, 10)
+
+
+# --- msgpack ---
+
+@pytest.mark.parametrize("reading", [
+    {**EXPECTED, "timestamp": T0_MS},                                          # map, epoch ms
+    {**EXPECTED, "timestamp": T0.isoformat()},                                 # map, ISO string
+    {**EXPECTED, "timestamp": msgpack.Timestamp.from_datetime(T0.replace(tzinfo=timezone.utc))},
+    ["P-1", T0_MS, 72, 97, 36.6, 10],                                          # positional
+])
+def test_msgpack_reading(reading):
+    assert parse_vital_msgpack(msgpack.packb(reading)).model_dump() == EXPECTED
+
+
+def test_msgpack_batch():
+    raw = msgpack.packb([["P-1", T0_MS, 72, 97, 36.6, 10], {**EXPECTED, "timestamp": T0_MS}])
+    assert [r.model_dump() for r in parse_vital_batch_msgpack(raw)] == [EXPECTED, EXPECTED]
+    with pytest.raises(IngestBatchTooLargeError):
+        parse_vital_batch_msgpack(raw, max_items=1)
+
+
+@pytest.mark.parametrize("raw,error", [
+    (b"\xc1", ValidationException),                                  # never-used byte
+    (msgpack.packb({**EXPECTED, "timestamp": T0_MS})[:-3], ValidationException),  # truncated
+    (msgpack.packb(["P-1", T0_MS, 72, 97, 36.6]), ValidationError),  # positional, a field short
+    (msgpack.packb({**EXPECTED, "timestamp": T0_MS, "heartRate": 999}), ValidationError),
+    (msgpack.packb({**EXPECTED, "timestamp": 2 ** 62}), ValidationException),  # out of range
+])
+def test_bad_msgpack(raw, error):
+    with pytest.raises(error):
+        parse_vital_msgpack(raw)
+
+
+def test_msgpack_batch_must_be_an_array():
+    with pytest.raises(ValidationException):
+        parse_vital_batch_msgpack(msgpack.packb({**EXPECTED, "timestamp": T0_MS}))
+
+
+# --- frames ---
+
+def test_frame_layout():
+    assert VITAL_FRAME.size == 32
+    assert parse_vital_frame(_frame()).model_dump() == EXPECTED
+    readings = parse_vital_frames(_frame() + _frame("P-2", T0_MS + 1000, heart_rate=80))
+    assert [(r.deviceId, r.heartRate, r.timestamp) for r in readings] == [
+        ("P-1", 72, T0), ("P-2", 80, T0 + timedelta(seconds=1))
+    ]
+
+
+@pytest.mark.parametrize("raw", [
+    b"",
+    _frame()[:-1],
+    _frame() + _frame(),                    # two frames on the single-reading route
+    b"\xff" * 16 + _frame()[16:],           # device id isn't UTF-8
+])
+def test_bad_frame(raw):
+    with pytest.raises(ValidationException):
+        parse_vital_frame(raw)
+
+
+def test_frame_values_are_validated():
+    with pytest.raises(ValidationError):
+        parse_vital_frame(_frame(temperature=9000))  # 90.00 C
+    with pytest.raises(IngestBatchTooLargeError):
+        parse_vital_frames(_frame() * 3, max_items=2)
+
+
+# --- through the API ---
+
+def test_binary_bodies_are_ingested(client):
+    reading = msgpack.packb(["bin-msgpack", T0_MS, 72, 97, 36.6, 1])
+    response = client.post("/api/patients/data", content=reading, headers={"Content-Type": "application/msgpack"})
+    assert response.status_code == 201, response.text
+
+    frames = _frame("bin-frame") + _frame("bin-frame", T0_MS + 1000)
+    response = client.post(
+        "/api/patients/data/batch", content=frames, headers={"Content-Type": VITAL_FRAME_MEDIA_TYPE}
+    )
+    assert response.status_code == 201, response.text
+    assert client.get("/api/patients/bin-frame/readings").json()["total"] == 2
+
+
+def test_unsupported_content_type_is_415(client):
+    response = client.post("/api/patients/data", content=b"<vitals/>", headers={"Content-Type": "application/xml"})
+    assert response.status_code == 415
+    assert "application/msgpack" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("url,content_type,body", [
+    ("/api/patients/data", "application/msgpack", b"\xc1"),
+    ("/api/patients/data", VITAL_FRAME_MEDIA_TYPE, b"\x00" * 31),
+    ("/api/patients/data/batch", VITAL_FRAME_MEDIA_TYPE, b"\x00" * 33),
+    ("/api/patients/data", "application/msgpack", msgpack.packb(["P-1", T0_MS, 999, 97, 36.6, 1])),
+])
+def test_undecodable_or_invalid_bodies_are_422(client, url, content_type, body):
+    response = client.post(url, content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][0] == "body"
@@ -0,0 +1,171 @@
+import gzip
+import zlib
+
+import brotli
+import orjson
+import pytest
+import zstandard
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.middleware.compression import CompressionMiddleware, negotiate_encoding
+
+BIG = {"items": [{"id": i, "heartRate": 72} for i in range(500)]}
+DECODERS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+@pytest.fixture(scope="module")
+def app_client():
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return JSONResponse(BIG, headers={"ETag": '"v1"'})
+
+    @app.get("/download")
+    async def download():
+        return PlainTextResponse("0,72,97\n" * 500, media_type="text/csv", headers={"Accept-Ranges": "bytes"})
+
+    @app.get("/small")
+    async def small():
+        return JSONResponse({"ok": True})
+
+    @app.get("/text")
+    async def text():
+        return PlainTextResponse("x" * 5000, media_type="image/svg+xml")
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for i in range(200):
+                yield f"{i},72,97\n".encode()
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    @app.post("/ingest")
+    async def ingest(request: Request):
+        return {"received": len(await request.body())}
+
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=("zstd", "br", "gzip"),
+        minimum_size=1024,
+        media_types=("application/json", "text/csv"),
+        decompress_paths=("/ingest",),
+        max_decompressed_size=64 * 1024,
+    )
+    with TestClient(app) as client:
+        yield client
+
+
+# --- negotiation ---
+
+@pytest.mark.parametrize("header,expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0, *", "zstd"),
+    ("identity", None),
+    ("*;q=0", None),
+    ("gzip;q=oops", None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header, ("zstd", "br", "gzip")) == expected
+
+
+# --- responses ---
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_response_is_compressed(app_client, encoding):
+    response = app_client.get("/big", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.headers["etag"] == 'W/"v1"'
+    # httpx already undid gzip / br - check the wire bytes where it didn't
+    body = response.content
+    if encoding == "zstd":
+        body = DECODERS["zstd"](body)
+    assert orjson.loads(body) == BIG
+
+
+def test_small_and_unlisted_responses_stay_identity(app_client):
+    for path in ("/small", "/text"):
+        response = app_client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+def test_range_requests_get_identity(app_client):
+    response = app_client.get("/big", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-10"})
+    assert "content-encoding" not in response.headers
+
+
+def test_resumable_downloads_stay_identity(app_client):
+    # A later Range request resumes at an offset into these bytes - they can't be compressed
+    response = app_client.get("/download", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["accept-ranges"] == "bytes"
+    assert int(response.headers["content-length"]) == len(response.content)
+
+
+def test_streaming_response_is_compressed_incrementally(app_client):
+    response = app_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines()[199] == "199,72,97"
+
+
+# --- gzip request bodies ---
+
+def test_gzip_body_is_inflated(app_client):
+    payload = b"[" + b"1," * 1000 + b"1]"
+    response = app_client.post("/ingest", content=gzip.compress(payload), headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.json() == {"received": len(payload)}
+
+
+def test_gzip_body_over_the_cap_is_413(app_client):
+    bomb = gzip.compress(b"0" * (64 * 1024 + 1))
+    response = app_client.post("/ingest", content=bomb, headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("body", [
+    b"definitely not gzip",
+    gzip.compress(b"[1, 2, 3]")[:-6],                     # truncated
+    gzip.compress(b"[1]") + b"trailing",                   # data after the stream
+    zlib.compress(b"[1]"),                                # zlib, not gzip
+])
+def test_invalid_gzip_body_is_400(app_client, body):
+    response = app_client.post("/ingest", content=body, headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
+
+
+def test_other_request_encodings_are_415(app_client):
+    response = app_client.post("/ingest", content=brotli.compress(b"[1]"), headers={"Content-Encoding": "br"})
+    assert response.status_code == 415
+    assert response.headers["accept-encoding"] == "gzip"
+
+
+# --- the real ingest route ---
+
+def test_gzip_ingest_through_the_app(client):
+    reading = {
+        "deviceId": "gzip-ingest",
+        "heartRate": 72,
+        "oxygenLevel": 97,
+        "bodyTemperature": 36.6,
+        "steps": 1,
+        "timestamp": "2026-01-01T12:00:00",
+    }
+    headers = {"Content-Encoding": "gzip", "Content-Type": "application/json"}
+    response = client.post("/api/patients/data/batch", content=gzip.compress(orjson.dumps([reading] * 3)), headers=headers)
+    assert response.status_code == 201, response.text
+
+    assert client.post("/api/patients/data", content=b"\x1f\x8bnope", headers=headers).status_code == 400
+    too_large = gzip.compress(b" " * (10 * 1024 * 1024 + 1))
+    assert client.post("/api/patients/data", content=too_large, headers=headers).status_code == 413
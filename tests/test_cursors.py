@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from domain.exceptions.custom_exceptions import InvalidCursorError
+from infrastructure.database.cursors import (
+    MIN_OBJECT_ID,
+    DeltaCursor,
+    decode_cursor,
+    decode_delta_cursor,
+    encode_cursor,
+    encode_delta_cursor,
+    start_delta,
+)
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+OVERLAP = timedelta(seconds=5)
+
+
+def _row(seconds: float, n: int) -> dict:
+    return {"created_at": T0 + timedelta(seconds=seconds), "_id": ObjectId(f"{n:024x}")}
+
+
+def test_cursor_round_trip():
+    position = (T0, ObjectId())
+    assert decode_cursor(encode_cursor(position)) == position
+    assert decode_cursor(encode_cursor((None, position[1]))) == (None, position[1])
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", encode_cursor((T0, MIN_OBJECT_ID))[:-3]])
+def test_bad_cursor(token):
+    with pytest.raises(InvalidCursorError):
+        decode_delta_cursor(token)
+
+
+# --- delta cursors ---
+
+def test_late_row_inside_the_overlap_is_delivered_once():
+    delta = start_delta(None, T0)
+    rows, has_more, delta = delta.advance([_row(1, 1), _row(2, 2), _row(3, 3)], "created_at", 10, OVERLAP)
+    assert len(rows) == 3 and not has_more
+
+    # Re-scan from the floor returns what we had + a row another worker stamped earlier
+    rescan = sorted([_row(1, 1), _row(1.5, 4), _row(2, 2), _row(3, 3)], key=lambda r: (r["created_at"], r["_id"]))
+    assert all(r["created_at"] > delta.floor[0] for r in rescan)
+    rows, _, delta = delta.advance(rescan, "created_at", 10, OVERLAP)
+    assert rows == [_row(1.5, 4)]
+
+    rows, _, same = delta.advance(rescan, "created_at", 10, OVERLAP)
+    assert rows == [] and same == delta
+
+
+def test_changed_doc_with_a_new_key_is_not_deduped():
+    delta = start_delta(None, T0)
+    _, _, delta = delta.advance([_row(1, 1)], "created_at", 10, OVERLAP)
+    rows, _, _ = delta.advance([_row(1, 1), _row(2, 1)], "created_at", 10, OVERLAP)
+    assert rows == [_row(2, 1)]  # same _id, later last_update -> a new change
+
+
+def test_floor_trails_the_newest_key():
+    delta = start_delta(None, T0)
+    _, _, delta = delta.advance([_row(1, 1), _row(20, 2)], "created_at", 10, OVERLAP)
+    assert delta.floor[0] == T0 + timedelta(seconds=15)
+    assert delta.seen == frozenset({(T0 + timedelta(seconds=20), ObjectId(f"{2:024x}"))})
+
+
+def test_seen_rows_are_capped():
+    rows = [_row(i / 1000, i + 1) for i in range(80)]
+    _, has_more, delta = start_delta(None, T0).advance(rows, "created_at", 70, OVERLAP, max_seen=50)
+    assert has_more and len(delta.seen) == 50
+    # The floor moved up to the oldest row kept - nothing at or below it is "seen"
+    assert delta.floor == (rows[19]["created_at"], rows[19]["_id"])
+    assert decode_delta_cursor(encode_delta_cursor(delta)) == delta
+
+
+def test_plain_cursor_decodes_as_a_fresh_delta_cursor():
+    position = (T0, ObjectId())
+    assert decode_delta_cursor(encode_cursor(position)) == DeltaCursor(position, position)
+    assert encode_delta_cursor(DeltaCursor(position, position)) == encode_cursor(position)
+
+
+# --- through the API ---
+
+def _ingest(client, patient_id: str, count: int, timestamp: datetime):
+    body = [
+        {
+            "deviceId": patient_id,
+            "heartRate": 60 + i,
+            "oxygenLevel": 97,
+            "bodyTemperature": 36.6,
+            "steps": i,
+            "timestamp": timestamp.isoformat(),
+        }
+        for i in range(count)
+    ]
+    response = client.post("/api/patients/data/batch", json=body)
+    assert response.status_code == 201, response.text
+
+
+def test_pages_across_equal_timestamps(client):
+    # Every reading has the same timestamp - only _id orders them
+    _ingest(client, "cursor-ties", 25, T0)
+    seen, after = [], None
+    while True:
+        params = {"limit": 4, **({"after": after} if after else {})}
+        page = client.get("/api/patients/cursor-ties/readings", params=params).json()
+        seen += [item["id"] for item in page["items"]]
+        after = page["next_after"]
+        if not page["has_more"]:
+            break
+    assert len(seen) == 25 and len(set(seen)) == 25
+    assert seen == sorted(seen, reverse=True)  # (timestamp, _id) descending
+
+
+def test_delta_pages_across_equal_keys(client):
+    from infrastructure.database.repositories.vital_repository import vital_repo
+
+    created_at = datetime.utcnow().replace(microsecond=0)
+    for i in range(9):
+        client.portal.call(vital_repo.create, {
+            "patient_id": "cursor-delta",
+            "heart_rate": 70,
+            "oxygen_level": 97,
+            "body_temperature": 36.6,
+            "steps": i,
+            "timestamp": T0,
+            "created_at": created_at,
+        })
+
+    seen, cursor = [], None
+    params = {"since": (created_at - timedelta(seconds=1)).isoformat()}
+    while True:
+        page = client.get("/api/patients/cursor-delta/readings", params={"limit": 2, **params}).json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["cursor"]
+        params = {"cursor": cursor}
+        if not page["has_more"]:
+            break
+    assert len(seen) == 9 and len(set(seen)) == 9
+
+    # Nothing new: same cursor back, no repeats from the overlap re-scan
+    page = client.get("/api/patients/cursor-delta/readings", params={"cursor": cursor}).json()
+    assert page["items"] == [] and page["cursor"] == cursor
+
+
+def test_invalid_cursor_is_a_400(client):
+    response = client.get("/api/patients/cursor-ties/readings", params={"cursor": "garbage"})
+    assert response.status_code == 400
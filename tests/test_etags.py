@@ -0,0 +1,72 @@
+import pytest
+
+from api.rest.responses import _etag_matches
+from infrastructure.database.versions import CollectionVersions
+from config.constants import Collections
+
+
+@pytest.mark.parametrize("if_none_match,matches", [
+    ('W/"a-1"', True),
+    ('"a-1"', True),                 # weak comparison ignores W/
+    ('W/"a-0", W/"a-1"', True),
+    ("*", True),
+    ('W/"a-2"', False),
+    ('W/"b-1"', False),              # another process' epoch
+])
+def test_etag_matching(if_none_match, matches):
+    assert _etag_matches(if_none_match, 'W/"a-1"') is matches
+
+
+def test_etag_follows_the_collection_versions():
+    versions = CollectionVersions()
+    before = versions.etag(Collections.PATIENTS)
+    versions.bump(Collections.ALERTS)
+    assert versions.etag(Collections.PATIENTS) == before
+    versions.bump(Collections.PATIENTS)
+    assert versions.etag(Collections.PATIENTS) != before
+    assert CollectionVersions().etag(Collections.PATIENTS) != versions.etag(Collections.PATIENTS)
+
+
+def _revalidate(client, url: str):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+    return etag
+
+
+def test_unchanged_patients_are_304_until_a_reading_comes_in(client):
+    etag = _revalidate(client, "/api/patients")
+
+    reading = {
+        "deviceId": "etag-patient",
+        "heartRate": 72,
+        "oxygenLevel": 97,
+        "bodyTemperature": 36.6,
+        "steps": 1,
+        "timestamp": "2026-01-01T12:00:00",
+    }
+    assert client.post("/api/patients/data", json=reading).status_code == 201
+
+    changed = client.get("/api/patients", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert "etag-patient" in {p["patient_id"] for p in changed.json()["items"]}
+
+
+def test_thresholds_revalidate_after_an_update(client):
+    etag = _revalidate(client, "/api/settings/thresholds")
+    thresholds = client.get("/api/settings/thresholds").json()
+    assert client.put("/api/settings/thresholds", json=thresholds).status_code == 200
+    assert client.get("/api/settings/thresholds", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_alerts_and_kpis_support_if_none_match(client, monkeypatch):
+    from api.rest import overview
+
+    monkeypatch.setattr(overview, "KPI_ETAG_SECONDS", 10 ** 9)  # no rollover mid-test
+    _revalidate(client, "/api/alerts")
+    _revalidate(client, "/api/overview/kpis")
@@ -0,0 +1,90 @@
+import csv
+import io
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.rest.reports import _parse_range
+
+PATIENT = "export-range"
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=50-500", (50, 99)),
+    ("bytes=100-", None),      # starts past the end
+    ("bytes=9-3", None),
+    ("bytes=0-1,5-6", None),   # multi-range
+    ("items=0-9", None),
+    ("bytes=a-b", None),
+    ("bytes=-0", None),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.fixture(scope="module")
+def job_id(client):
+    now = datetime.utcnow()
+    body = [
+        {
+            "deviceId": PATIENT,
+            "heartRate": 60 + i,
+            "oxygenLevel": 97,
+            "bodyTemperature": 36.6,
+            "steps": i,
+            "timestamp": (now - timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(40)
+    ]
+    assert client.post("/api/patients/data/batch", json=body).status_code == 201
+
+    response = client.post("/api/reports/export/jobs", json={"window_minutes": 5, "patient_id": PATIENT})
+    assert response.status_code == 202, response.text
+    job = response.json()
+    deadline = time.monotonic() + 10
+    while job["status"] not in ("COMPLETED", "FAILED") and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/reports/export/jobs/{job['job_id']}").json()
+    assert job["status"] == "COMPLETED", job
+    return job["job_id"]
+
+
+def test_full_download(client, job_id):
+    response = client.get(f"/api/reports/export/jobs/{job_id}/download")
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    assert int(response.headers["content-length"]) == len(response.content)
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert len(rows) == 41 and all(PATIENT in row for row in rows[1:])
+
+
+def test_dropped_download_resumes_with_range(client, job_id):
+    url = f"/api/reports/export/jobs/{job_id}/download"
+    full = client.get(url).content
+
+    # The connection dropped after 100 bytes - ask for the rest
+    rest = client.get(url, headers={"Range": "bytes=100-"})
+    assert rest.status_code == 206
+    assert rest.headers["content-range"] == f"bytes 100-{len(full) - 1}/{len(full)}"
+    assert full[:100] + rest.content == full
+
+    tail = client.get(url, headers={"Range": "bytes=-16"})
+    assert tail.status_code == 206 and tail.content == full[-16:]
+
+
+def test_unsatisfiable_range_is_416(client, job_id):
+    response = client.get(
+        f"/api/reports/export/jobs/{job_id}/download", headers={"Range": "bytes=999999999-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"].startswith("bytes */")
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/reports/export/jobs/nope").status_code == 404
+    assert client.get("/api/reports/export/jobs/nope/download").status_code == 404
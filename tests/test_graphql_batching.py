@@ -0,0 +1,46 @@
+from collections import Counter
+
+from infrastructure.database.engines.memory import MemoryCollection
+
+QUERY = """
+{ patients(pageSize: 500) { patientId readings(limit: 2) { heartRate } activeAlerts { alertId } } }
+"""
+
+
+def test_nested_readings_and_alerts_are_two_queries(client, monkeypatch):
+    # Nothing has read these patients' readings yet - no warm rings, all go to the store
+    body = [
+        {
+            "deviceId": f"batched-{p}",
+            "heartRate": 60 + i,
+            "oxygenLevel": 97,
+            "bodyTemperature": 36.6,
+            "steps": i,
+            "timestamp": f"2026-01-01T12:00:0{i}",
+        }
+        for p in range(3)
+        for i in range(3)
+    ]
+    assert client.post("/api/patients/data/batch", json=body).status_code == 201
+
+    queries = Counter()
+    find, aggregate = MemoryCollection.find, MemoryCollection.aggregate
+
+    def counting_find(self, *args, **kwargs):
+        queries[self.name] += 1
+        return find(self, *args, **kwargs)
+
+    def counting_aggregate(self, *args, **kwargs):
+        queries[self.name] += 1
+        return aggregate(self, *args, **kwargs)
+
+    monkeypatch.setattr(MemoryCollection, "find", counting_find)
+    monkeypatch.setattr(MemoryCollection, "aggregate", counting_aggregate)
+
+    response = client.post("/graphql", json={"query": QUERY})
+    assert response.status_code == 200 and "errors" not in response.json(), response.text
+
+    assert queries["vitals"] == 1 and queries["alerts"] == 1
+    patients = {p["patientId"]: p for p in response.json()["data"]["patients"]}
+    for p in range(3):
+        assert patients[f"batched-{p}"]["readings"] == [{"heartRate": 62}, {"heartRate": 61}]
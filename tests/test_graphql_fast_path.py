@@ -0,0 +1,110 @@
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+import pytest
+from graphql import parse
+
+from api.graphql.schema import PersistedQueryTransportWSHandler
+from api.graphql.fast_path import match_canonical_subscription
+from infrastructure.pubsub.broadcaster import LIVE_VITALS_FIELDS, VITALS_CHANNEL, VitalUpdate, patient_channel
+
+FLOW = Path(__file__).resolve().parent.parent / "flows" / "health_monitoring.json"
+
+
+def _flow_query() -> str:
+    """The subscription the Node-RED dashboard sends, verbatim"""
+    for node in json.loads(FLOW.read_text()):
+        match = re.search(r"query: `(subscription \{.*?\})`", node.get("func", ""), re.S)
+        if match:
+            return match.group(1)
+    raise AssertionError("no subscription in the flow")
+
+
+def _update(patient_id: str = "p1") -> VitalUpdate:
+    return VitalUpdate(patient_id, 72, 97, 36.6, 10, datetime(2026, 1, 1, 12, 0, 0))
+
+
+# --- matching ---
+
+def test_flow_query_takes_the_fast_path():
+    canonical = match_canonical_subscription(parse(_flow_query()))
+    assert canonical is not None
+    assert canonical.channel == VITALS_CHANNEL
+    assert canonical.fields == ("heartRate", "oxygenLevel", "bodyTemperature", "timestamp")
+
+
+def test_patient_vitals_with_a_variable():
+    document = parse(
+        "subscription ($p: String!) { patientVitals(patientId: $p) { timestamp heartRate } }"
+    )
+    canonical = match_canonical_subscription(document, {"p": "P-1"})
+    assert canonical.channel == patient_channel("P-1")
+    assert canonical.fields == ("timestamp", "heartRate")
+
+
+@pytest.mark.parametrize("query", [
+    "subscription { liveVitals { heartRate heartRate } }",
+    "subscription { liveVitals { __typename heartRate } }",
+    "subscription { liveVitals { hr: heartRate } }",
+    "subscription { liveVitals { heartRate @include(if: true) } }",
+    "subscription { liveVitals { ...F } } fragment F on LiveVitalsType { heartRate }",
+    "subscription { liveVitals { patientStatus } }",
+    "query { liveVitals { heartRate } }",
+])
+def test_other_shapes_go_through_execution(query):
+    assert match_canonical_subscription(parse(query)) is None
+
+
+# --- payloads ---
+
+def test_payload_for_follows_the_selection_and_is_cached():
+    update = _update()
+    assert update.payload_for(LIVE_VITALS_FIELDS) is update.payload
+    shape = ("timestamp", "heartRate")
+    encoded = update.payload_for(shape)
+    assert list(orjson.loads(encoded).items()) == [("timestamp", "2026-01-01T12:00:00"), ("heartRate", 72)]
+    assert update.payload_for(shape) is encoded
+
+
+# --- over the socket ---
+
+def test_flow_subscription_streams_from_the_fast_path(client, monkeypatch):
+    streamed = []
+    original = PersistedQueryTransportWSHandler._canonical_operation_task
+
+    async def spy(self, canonical, operation):
+        streamed.append(canonical)
+        await original(self, canonical, operation)
+
+    monkeypatch.setattr(PersistedQueryTransportWSHandler, "_canonical_operation_task", spy)
+
+    with client.websocket_connect("/graphql", subprotocols=["graphql-transport-ws"]) as ws:
+        ws.send_json({"type": "connection_init", "payload": {}})
+        assert ws.receive_json()["type"] == "connection_ack"
+        ws.send_json({"id": "1", "type": "subscribe", "payload": {"query": _flow_query()}})
+
+        reading = {
+            "deviceId": "fast-path-flow",
+            "heartRate": 81,
+            "oxygenLevel": 96,
+            "bodyTemperature": 36.9,
+            "steps": 5,
+            "timestamp": "2026-01-01T12:00:00",
+        }
+        response = client.post("/api/patients/data", json=reading)
+        assert response.status_code == 201, response.text
+
+        frame = ws.receive_json()
+        ws.send_json({"id": "1", "type": "complete"})
+
+    assert [c.fields for c in streamed] == [("heartRate", "oxygenLevel", "bodyTemperature", "timestamp")]
+    assert frame == {
+        "id": "1",
+        "type": "next",
+        "payload": {"data": {"liveVitals": {
+            "heartRate": 81, "oxygenLevel": 96, "bodyTemperature": 36.9, "timestamp": "2026-01-01T12:00:00",
+        }}},
+    }
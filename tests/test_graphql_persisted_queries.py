@@ -0,0 +1,87 @@
+import hashlib
+import json
+
+import pytest
+
+from api.graphql.extensions import PersistedQueryStore
+from domain.exceptions.custom_exceptions import PersistedQueryMismatchError, PersistedQueryNotFoundError
+
+QUERY = "{ alerts(limit: 1) { alertId } }"
+SHA = hashlib.sha256(QUERY.encode()).hexdigest()
+EXTENSIONS = {"persistedQuery": {"version": 1, "sha256Hash": SHA}}
+
+
+def _sha(query: str) -> dict:
+    return {"persistedQuery": {"version": 1, "sha256Hash": hashlib.sha256(query.encode()).hexdigest()}}
+
+
+# --- store ---
+
+def test_store_is_a_bounded_lru():
+    store = PersistedQueryStore(maxsize=2)
+    queries = ["{ a }", "{ b }", "{ c }"]
+    store.resolve(queries[0], _sha(queries[0]))
+    store.resolve(queries[1], _sha(queries[1]))
+    assert store.resolve(None, _sha(queries[0])) == queries[0]  # now the most recent
+    store.resolve(queries[2], _sha(queries[2]))
+
+    assert len(store) == 2
+    assert store.resolve(None, _sha(queries[0])) == queries[0]
+    with pytest.raises(PersistedQueryNotFoundError):
+        store.resolve(None, _sha(queries[1]))
+
+
+@pytest.mark.parametrize("extensions", [
+    {"persistedQuery": "not an object"},
+    {"persistedQuery": {"version": 2, "sha256Hash": SHA}},
+    {"persistedQuery": {"version": 1}},
+])
+def test_store_rejects_unsupported_requests(extensions):
+    with pytest.raises(PersistedQueryNotFoundError):
+        PersistedQueryStore().resolve(QUERY, extensions)
+
+
+def test_store_rejects_a_hash_that_does_not_match():
+    with pytest.raises(PersistedQueryMismatchError):
+        PersistedQueryStore().resolve("{ other }", EXTENSIONS)
+
+
+def test_no_extension_passes_the_query_through():
+    assert PersistedQueryStore().resolve(QUERY, None) == QUERY
+
+
+# --- over HTTP ---
+
+def _error_code(response) -> str:
+    assert response.status_code == 200  # Apollo clients read APQ errors from the body
+    return response.json()["errors"][0]["extensions"]["code"]
+
+
+def test_apq_round_trip(client):
+    first = client.post("/graphql", json={"extensions": EXTENSIONS})
+    assert _error_code(first) == "PERSISTED_QUERY_NOT_FOUND"
+
+    registered = client.post("/graphql", json={"query": QUERY, "extensions": EXTENSIONS})
+    assert registered.status_code == 200 and "errors" not in registered.json()
+
+    by_hash = client.get("/graphql", params={"extensions": json.dumps(EXTENSIONS)})
+    assert by_hash.status_code == 200 and by_hash.json() == registered.json()
+
+
+def test_hash_mismatch_is_reported(client):
+    response = client.post("/graphql", json={"query": "{ alerts { status } }", "extensions": EXTENSIONS})
+    assert _error_code(response) == "PERSISTED_QUERY_HASH_MISMATCH"
+
+
+@pytest.mark.parametrize("send", [
+    lambda client: client.get("/graphql", params={"query": QUERY, "extensions": "{not json"}),
+    lambda client: client.post("/graphql", json={"query": QUERY, "extensions": ["persistedQuery"]}),
+])
+def test_malformed_extensions_are_400(client, send):
+    assert send(client).status_code == 400
+
+
+def test_expensive_operations_are_rejected_before_execution(client):
+    query = "{ patients(pageSize: 1000) { readings(limit: 100) { heartRate timestamp } } }"
+    errors = client.post("/graphql", json={"query": query}).json()["errors"]
+    assert "maximum operation complexity" in errors[0]["message"]
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from config.constants import Collections
+from infrastructure.database.cursors import after, before
+from infrastructure.database.engines import MemoryClient, QueryError
+from infrastructure.database.engines.query import field_bounds, matches, normalize, run_pipeline
+from infrastructure.database.indexes import INDEXES
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _vitals():
+    """Three patients, duplicate timestamps (keyset ties), a missing field and a null"""
+    docs = []
+    for i in range(60):
+        docs.append({
+            "_id": ObjectId(f"{i + 1:024x}"),
+            "patient_id": f"p{i % 3}",
+            "heart_rate": 60 + (i * 7) % 50,
+            "oxygen_level": 90 + i % 10,
+            "body_temperature": 36.0 + (i % 5) / 10,
+            "steps": i,
+            "timestamp": T0 + timedelta(seconds=i // 2),
+            "created_at": T0 + timedelta(seconds=i // 2, microseconds=1500),
+        })
+    del docs[7]["oxygen_level"]
+    docs[8]["heart_rate"] = None
+    return docs
+
+
+@pytest.fixture
+async def vitals():
+    """Vitals in the memory engine, with the production indexes"""
+    db = MemoryClient()["test"]
+    for keys in INDEXES[Collections.VITALS]:
+        await db[Collections.VITALS].create_index(keys)
+    for doc in _vitals():
+        await db[Collections.VITALS].insert_one(dict(doc))
+    return db[Collections.VITALS]
+
+
+KEYSET = (T0 + timedelta(seconds=10), ObjectId(f"{22:024x}"))
+
+
+async def test_find_matches_python_matcher(vitals):
+    query = {"patient_id": "p2", **after("timestamp", KEYSET)}
+    expected = sorted((d for d in map(normalize, _vitals()) if matches(d, query)), key=lambda d: d["_id"])
+    assert await vitals.find(query).sort("_id", 1).to_list(None) == expected
+
+
+async def test_indexed_keyset_page_matches_a_full_sort(vitals):
+    # (patient_id, timestamp desc) bucket, streamed and cut at the limit
+    query = {"patient_id": "p1", **before("timestamp", KEYSET)}
+    page = await vitals.find(query).sort([("timestamp", -1), ("_id", -1)]).limit(4).to_list(None)
+    expected = sorted(
+        (d for d in map(normalize, _vitals()) if matches(d, query)),
+        key=lambda d: (d["timestamp"], d["_id"]),
+        reverse=True
+    )[:4]
+    assert page == expected
+
+
+async def test_top_n_returns_newest_per_group(vitals):
+    pipeline = [
+        {"$match": {"patient_id": {"$in": ["p0", "p1"]}}},
+        {"$group": {"_id": "$patient_id", "latest": {"$topN": {
+            "n": 3, "sortBy": {"timestamp": -1, "_id": -1}, "output": "$$ROOT"
+        }}}},
+        {"$sort": {"_id": 1}},
+    ]
+    rows = await vitals.aggregate(pipeline).to_list(None)
+    assert [r["_id"] for r in rows] == ["p0", "p1"]
+    for row in rows:
+        keys = [(d["timestamp"], d["_id"]) for d in row["latest"]]
+        assert keys == sorted(keys, reverse=True) and len(keys) == 3
+
+
+async def test_upsert_keeps_set_on_insert_from_the_first_write(vitals):
+    await vitals.update_one({"patient_id": "p9"}, {"$set": {"steps": 1}, "$setOnInsert": {"n": 0}}, upsert=True)
+    await vitals.update_one({"patient_id": "p9"}, {"$set": {"steps": 2}, "$setOnInsert": {"n": 1}}, upsert=True)
+    assert await vitals.find_one({"patient_id": "p9"}, {"_id": 0}) == {"patient_id": "p9", "steps": 2, "n": 0}
+
+
+async def test_unsupported_operator_raises(vitals):
+    with pytest.raises(QueryError):
+        await vitals.find({"heart_rate": {"$regex": "1"}}).to_list(None)
+
+
+# --- query.py ---
+
+def test_normalize_truncates_to_ms_naive_utc():
+    from datetime import timezone
+    value = datetime(2026, 1, 1, 13, 0, 0, 123456, tzinfo=timezone(timedelta(hours=1)))
+    assert normalize(value) == datetime(2026, 1, 1, 12, 0, 0, 123000)
+
+
+def test_range_comparisons_need_matching_types():
+    # BSON: $gt across types never matches, missing fields don't either
+    assert not matches({"x": "5"}, {"x": {"$gt": 1}})
+    assert not matches({}, {"x": {"$lt": 1}})
+    assert matches({}, {"x": None})
+    assert matches({"x": 2}, {"x": {"$gt": 1, "$lt": 3}})
+
+
+def test_field_bounds_narrow_keyset_or():
+    bounds = field_bounds(before("timestamp", KEYSET), "timestamp")
+    assert bounds is not None
+    low, _, high, high_inclusive = bounds
+    assert low is None and high == KEYSET[0] and high_inclusive
+    assert field_bounds({"$or": [{"timestamp": {"$lt": T0}}, {"steps": 1}]}, "timestamp") is None
+
+
+def test_run_pipeline_rejects_unknown_stage():
+    with pytest.raises(QueryError):
+        run_pipeline([{"a": 1}], [{"$lookup": {}}])
+
+
+async def test_unsupported_command_raises_query_error():
+    db = MemoryClient()["test"]
+    assert await db.command("ping") == {"ok": 1.0}
+    with pytest.raises(QueryError):
+        await db.command("serverStatus")
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime
+
+import orjson
+
+from api.rest.patients import _patient_events
+from domain.services.patient_stream_service import PatientChangeFeed, patient_feed
+from infrastructure.pubsub.broadcaster import VitalUpdate
+
+
+def _update(patient_id: str, heart_rate: int = 72) -> VitalUpdate:
+    return VitalUpdate(patient_id, heart_rate, 97, 36.6, 0, datetime(2026, 1, 1), patient_status="OK")
+
+
+def _parse(chunk: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+    return {"event": fields["event"], "id": fields["id"], "data": orjson.loads(fields["data"])}
+
+
+async def _events(last_event_id, count: int) -> list:
+    """First count events of a stream (after the retry line), then hang up"""
+    stream = _patient_events(last_event_id)
+    try:
+        assert (await stream.__anext__()).startswith(b"retry: ")
+        return [_parse(await asyncio.wait_for(stream.__anext__(), 5)) for _ in range(count)]
+    finally:
+        await stream.aclose()
+
+
+# --- feed ---
+
+def test_changes_since_replays_what_was_missed():
+    feed = PatientChangeFeed(buffer_size=3)
+    for heart_rate in (70, 71, 72):
+        feed._append(_update("p1", heart_rate))
+    assert [c.row["last_heart_rate"] for c in feed.changes_since(1)] == [71, 72]
+    assert feed.changes_since(3) == []
+
+    feed._append(_update("p1", 73))
+    assert feed.changes_since(0) is None  # fell out of the buffer - resync
+    assert [c.seq for c in feed.changes_since(1)] == [2, 3, 4]
+
+
+def test_event_ids_are_scoped_to_the_feed():
+    feed = PatientChangeFeed(buffer_size=3)
+    assert feed.parse_event_id(feed.event_id(7)) == 7
+    restarted = PatientChangeFeed(buffer_size=3)
+    for event_id in (feed.event_id(7), "", None, f"{restarted.feed_id}-x"):
+        assert restarted.parse_event_id(event_id) is None
+
+
+# --- stream ---
+
+def _ingest(client, patient_id: str, heart_rates):
+    body = [
+        {
+            "deviceId": patient_id,
+            "heartRate": hr,
+            "oxygenLevel": 97,
+            "bodyTemperature": 36.6,
+            "steps": i,
+            "timestamp": f"2026-01-01T12:00:0{i}",
+        }
+        for i, hr in enumerate(heart_rates)
+    ]
+    assert client.post("/api/patients/data/batch", json=body).status_code == 201
+
+
+def test_reconnect_with_last_event_id_replays_only_the_missed_rows(client):
+    _ingest(client, "sse-replay", [70])
+    snapshot, = client.portal.call(_events, None, 1)
+    assert snapshot["event"] == "snapshot"
+    assert "sse-replay" in {row["patient_id"] for row in snapshot["data"]["items"]}
+
+    # Disconnected - two readings go by
+    _ingest(client, "sse-replay", [80, 81])
+
+    def replay(count):
+        events = client.portal.call(_events, snapshot["id"], count)
+        return events, {row["patient_id"]: row for e in events for row in e["data"]["items"]}
+
+    events, rows = replay(1)
+    if rows.get("sse-replay", {}).get("last_heart_rate") != 81:
+        events, rows = replay(2)  # the feed hadn't seen the last reading yet - next update has it
+    assert [e["event"] for e in events] == ["update"] * len(events)  # no new snapshot
+    assert rows["sse-replay"]["last_heart_rate"] == 81  # newest row per patient
+    assert patient_feed.parse_event_id(events[-1]["id"]) > patient_feed.parse_event_id(snapshot["id"])
+
+
+def test_unknown_last_event_id_gets_a_snapshot(client):
+    first, = client.portal.call(_events, "00000000-1", 1)
+    assert first["event"] == "snapshot"
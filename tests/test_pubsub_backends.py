@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from infrastructure.pubsub.backends import decode_message, encode_message
+from infrastructure.pubsub.broadcaster import VitalUpdate
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def test_vital_update_survives_the_unix_codec():
+    update = VitalUpdate(
+        patient_id="a",
+        heart_rate=70,
+        oxygen_level=97,
+        body_temperature=36.6,
+        steps=3,
+        timestamp=T0,
+        patient_status="OK",
+        reading_id="r1",
+        last_update=datetime(2026, 1, 1, 12, 0, 1, 123000),
+    )
+    channel, decoded = decode_message(encode_message("vitals", update))
+    assert channel == "vitals"
+    assert decoded == update and decoded.payload == update.payload
+
+
+class _StalledWriter:
+    """A hub connection whose peer stopped reading"""
+
+    def __init__(self):
+        self.closed = False
+
+    def is_closing(self) -> bool:
+        return self.closed
+
+    def write(self, data: bytes):
+        pass
+
+    async def drain(self):
+        await asyncio.sleep(3600)
+
+    def close(self):
+        self.closed = True
+
+
+async def test_stalled_publish_still_reaches_local_subscribers(monkeypatch, tmp_path):
+    from infrastructure.pubsub import backends
+
+    monkeypatch.setattr(backends, "PUBLISH_DRAIN_TIMEOUT", 0.01)
+    backend = backends.UnixSocketBackend(str(tmp_path / "pubsub.sock"))
+    delivered = []
+    backend.bind(lambda channel, message: delivered.append((channel, message)))
+    writer = backend._writer = _StalledWriter()
+
+    await backend.publish("vitals", "reading")
+    assert writer.closed  # dropped so _run reconnects
+    assert delivered == [("vitals", "reading")]
+
+
+async def test_publish_without_a_hub_delivers_locally(tmp_path):
+    from infrastructure.pubsub.backends import UnixSocketBackend
+
+    backend = UnixSocketBackend(str(tmp_path / "pubsub.sock"))
+    delivered = []
+    backend.bind(lambda channel, message: delivered.append(message))
+    await backend.publish("vitals", "reading")
+    assert delivered == ["reading"]
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from domain.services.reading_buffer import ReadingRing, RecentReadingsCache, _from_epoch_ms, _to_epoch_ms
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(f"{i + 1:024x}"),
+        "timestamp": T0 + timedelta(seconds=i),
+        "heart_rate": 60 + i,
+        "oxygen_level": 95,
+        "body_temperature": 36.5,
+        "steps": i,
+    }
+
+
+def test_epoch_ms_round_trip():
+    moment = datetime(2026, 1, 1, 12, 0, 0, 123000)
+    assert _from_epoch_ms(_to_epoch_ms(moment)) == moment
+    aware = datetime(2026, 1, 1, 13, 0, tzinfo=timezone(timedelta(hours=1)))
+    assert _to_epoch_ms(aware) == _to_epoch_ms(datetime(2026, 1, 1, 12, 0))
+
+
+def test_ring_keeps_the_newest_readings():
+    ring = ReadingRing(capacity=4)
+    for i in range(6):
+        d = _doc(i)
+        ring.append(d["_id"], _to_epoch_ms(d["timestamp"]), d["heart_rate"],
+                    d["oxygen_level"], d["body_temperature"], d["steps"])
+
+    latest = ring.latest("p1", 10)
+    assert [r.heart_rate for r in latest] == [65, 64, 63, 62]  # newest first, wrapped
+    assert latest[0].id == str(_doc(5)["_id"]) and latest[0].timestamp == T0 + timedelta(seconds=5)
+    assert ring.contains(_doc(2)["_id"]) and not ring.contains(_doc(1)["_id"])
+    assert ring.newest_ts == _to_epoch_ms(T0 + timedelta(seconds=5))
+
+
+def test_seed_then_record():
+    cache = RecentReadingsCache(capacity=3)
+    ring = cache.seed("p1", [_doc(i) for i in (4, 3, 2, 1)], total=5, generation=0)
+    assert [r.steps for r in ring.latest("p1", 3)] == [4, 3, 2]
+
+    d = _doc(5)
+    cache.record("p1", str(d["_id"]), d["timestamp"], 99, 95, 36.5, 5)
+    cache.record("p1", str(d["_id"]), d["timestamp"], 99, 95, 36.5, 5)  # our ingest echoed back
+    assert [r.steps for r in ring.latest("p1", 3)] == [5, 4, 3]
+    assert ring.total == 6
+
+
+def test_an_ingest_during_the_seed_read_wins():
+    cache = RecentReadingsCache(capacity=3)
+    generation = cache.generation("p1")
+    cache.record("p1", str(ObjectId()), T0, 70, 95, 36.5, 0)  # no ring yet, just counted
+    assert cache.seed("p1", [_doc(0)], total=1, generation=generation) is None
+    assert cache.get("p1") is None
+
+
+def test_out_of_order_reading_drops_the_ring():
+    cache = RecentReadingsCache(capacity=3)
+    cache.seed("p1", [_doc(2), _doc(1)], total=2, generation=0)
+    cache.record("p1", str(ObjectId()), T0, 70, 95, 36.5, 0)  # older than the newest buffered
+    assert cache.get("p1") is None
+
+
+# --- through the API ---
+
+def _ingest(client, patient_id: str, start: int, count: int):
+    body = [
+        {
+            "deviceId": patient_id,
+            "heartRate": 60 + i,
+            "oxygenLevel": 97,
+            "bodyTemperature": 36.6,
+            "steps": i,
+            "timestamp": (T0 + timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(start, start + count)
+    ]
+    assert client.post("/api/patients/data/batch", json=body).status_code == 201
+
+
+def test_ring_answers_match_the_store(client):
+    from domain.services.reading_buffer import recent_readings
+    from infrastructure.database.repositories.vital_repository import vital_repo
+
+    _ingest(client, "ring-api", 0, 5)
+    url = "/api/patients/ring-api/readings"
+    first = client.get(url, params={"limit": 3}).json()
+    ring = recent_readings.get("ring-api")
+    assert ring is not None  # seeded by that read
+    assert [r["steps"] for r in first["items"]] == [4, 3, 2] and first["total"] == 5
+
+    # Later ingests keep the ring current - no reseed
+    _ingest(client, "ring-api", 5, 2)
+    from_ring = client.get(url, params={"limit": 4}).json()
+    assert recent_readings.get("ring-api") is ring
+    assert from_ring["total"] == 7 and from_ring["has_more"]
+
+    stored = client.portal.call(lambda: vital_repo.find_by_patient("ring-api", limit=4))
+    assert [r["id"] for r in from_ring["items"]] == [str(d["_id"]) for d in stored]
+    assert [r["heart_rate"] for r in from_ring["items"]] == [d["heart_rate"] for d in stored]
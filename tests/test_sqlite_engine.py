@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from config.constants import Collections
+from infrastructure.database.cursors import after, before
+from infrastructure.database.engines import MemoryClient, QueryError, SQLiteClient
+from infrastructure.database.engines.sqlite import ID, SCHEMAS, order_by, translate
+from infrastructure.database.indexes import INDEXES
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _vitals():
+    """Three patients, duplicate timestamps (keyset ties), a missing field and a null"""
+    docs = []
+    for i in range(60):
+        docs.append({
+            "_id": ObjectId(f"{i + 1:024x}"),
+            "patient_id": f"p{i % 3}",
+            "heart_rate": 60 + (i * 7) % 50,
+            "oxygen_level": 90 + i % 10,
+            "body_temperature": 36.0 + (i % 5) / 10,
+            "steps": i,
+            "timestamp": T0 + timedelta(seconds=i // 2),
+            "created_at": T0 + timedelta(seconds=i // 2, microseconds=1500),
+        })
+    del docs[7]["oxygen_level"]
+    docs[8]["heart_rate"] = None
+    return docs
+
+
+@pytest.fixture
+async def engines(tmp_path):
+    """The same vitals in both in-process engines, with the production indexes"""
+    memory = MemoryClient()["test"]
+    sqlite_client = SQLiteClient(f"sqlite:///{tmp_path / 'parity.db'}")
+    sqlite = sqlite_client["test"]
+    for db in (memory, sqlite):
+        for keys in INDEXES[Collections.VITALS]:
+            await db[Collections.VITALS].create_index(keys)
+        for doc in _vitals():
+            await db[Collections.VITALS].insert_one(dict(doc))
+    yield memory[Collections.VITALS], sqlite[Collections.VITALS]
+    sqlite_client.close()
+
+
+KEYSET = (T0 + timedelta(seconds=10), ObjectId(f"{22:024x}"))
+
+FINDS = [
+    ({}, [("_id", 1)], 0),
+    ({"patient_id": "p1"}, [("timestamp", -1), ("_id", -1)], 5),
+    ({"patient_id": "p1", **before("timestamp", KEYSET)}, [("timestamp", -1), ("_id", -1)], 5),
+    (after("created_at", KEYSET), [("created_at", 1), ("_id", 1)], 7),
+    ({"patient_id": {"$in": ["p0", "p2"]}, "timestamp": {"$gte": T0 + timedelta(seconds=5)}}, [("timestamp", 1), ("_id", 1)], 0),
+    ({"heart_rate": {"$gt": 80}, "oxygen_level": {"$lte": 95}}, [("heart_rate", -1), ("_id", 1)], 0),
+    ({"heart_rate": None}, [("_id", 1)], 0),
+    ({"oxygen_level": {"$exists": False}}, [("_id", 1)], 0),
+    ({"heart_rate": {"$ne": 100}, "body_temperature": {"$gte": 36.2}}, [("_id", -1)], 10),
+    ({"$or": [{"patient_id": "p0"}, {"steps": {"$lt": 3}}]}, [("steps", 1)], 0),
+    ({"$and": [{"steps": {"$gte": 10}}, {"steps": {"$lt": 20}}]}, [("timestamp", 1), ("_id", 1)], 0),
+]
+
+
+@pytest.mark.parametrize("query,spec,limit", FINDS)
+async def test_find_parity(engines, query, spec, limit):
+    memory, sqlite = engines
+    expected = await memory.find(query).sort(spec).limit(limit).to_list(None)
+    assert await sqlite.find(query).sort(spec).limit(limit).to_list(None) == expected
+    assert await memory.count_documents(query) == await sqlite.count_documents(query)
+
+
+async def test_projection_parity(engines):
+    memory, sqlite = engines
+    projection = {"_id": 1, "heart_rate": 1, "timestamp": 1}
+    query = {"patient_id": "p0"}
+    assert await sqlite.find(query, projection).sort("_id", 1).to_list(None) == \
+        await memory.find(query, projection).sort("_id", 1).to_list(None)
+
+
+PIPELINES = [
+    # KPI window (SQL aggregate on sqlite)
+    [
+        {"$match": {"timestamp": {"$gte": T0 + timedelta(seconds=3)}}},
+        {"$group": {"_id": None, "avg": {"$avg": "$heart_rate"}, "min": {"$min": "$oxygen_level"}, "n": {"$sum": 1}}},
+    ],
+    # Empty input -> no group at all
+    [
+        {"$match": {"timestamp": {"$gte": T0 + timedelta(days=1)}}},
+        {"$group": {"_id": None, "avg": {"$avg": "$heart_rate"}}},
+    ],
+    # Latest readings per patient (ROW_NUMBER() on sqlite)
+    [
+        {"$match": {"patient_id": {"$in": ["p0", "p1"]}}},
+        {"$group": {"_id": "$patient_id", "latest": {"$topN": {
+            "n": 3, "sortBy": {"timestamp": -1, "_id": -1}, "output": "$$ROOT"
+        }}}},
+        {"$sort": {"_id": 1}},
+    ],
+    # Alerts-style modified_at
+    [
+        {"$addFields": {"modified_at": {"$max": ["$timestamp", {"$ifNull": ["$created_at", "$timestamp"]}]}}},
+        {"$match": after("modified_at", KEYSET)},
+        {"$sort": {"modified_at": 1, "_id": 1}},
+        {"$limit": 4},
+    ],
+    # Python fallback: group by a field with several accumulators
+    [
+        {"$group": {"_id": "$patient_id", "steps": {"$sum": "$steps"}, "last": {"$last": "$steps"}}},
+        {"$sort": {"_id": 1}},
+    ],
+]
+
+
+def _rounded(rows):
+    """SQL AVG and Python sum()/len() may differ in the last bit"""
+    return [{k: round(v, 9) if isinstance(v, float) else v for k, v in row.items()} for row in rows]
+
+
+@pytest.mark.parametrize("pipeline", PIPELINES)
+async def test_aggregate_parity(engines, pipeline):
+    memory, sqlite = engines
+    expected = await memory.aggregate(pipeline).to_list(None)
+    assert expected or pipeline is PIPELINES[1]
+    assert _rounded(await sqlite.aggregate(pipeline).to_list(None)) == _rounded(expected)
+
+
+async def test_update_parity(engines):
+    memory, sqlite = engines
+    for collection in (memory, sqlite):
+        await collection.update_one({"patient_id": "p9"}, {"$set": {"steps": 1}, "$setOnInsert": {"n": 0}}, upsert=True)
+        await collection.update_one({"patient_id": "p9"}, {"$set": {"steps": 2}, "$setOnInsert": {"n": 1}}, upsert=True)
+    expected = await memory.find_one({"patient_id": "p9"}, {"_id": 0})
+    assert expected == {"patient_id": "p9", "steps": 2, "n": 0}
+    assert await sqlite.find_one({"patient_id": "p9"}, {"_id": 0}) == expected
+
+
+# --- sqlite translation ---
+
+COLUMNS = {"_id": ID, **SCHEMAS[Collections.VITALS]}  # what SQLiteCollection translates against
+
+
+def test_translate_keyset_adds_index_envelope():
+    sql, params, complete = translate({"patient_id": "p1", **before("timestamp", KEYSET)}, COLUMNS)
+    assert complete
+    assert '"timestamp" <= ?' in sql  # lets SQLite seek the (patient_id, timestamp) index
+    assert params[0] == "p1"
+
+
+def test_translate_leaves_unknown_fields_to_python():
+    sql, params, complete = translate({"patient_id": "p1", "steps": {"$gt": 3}}, COLUMNS)
+    assert not complete
+    assert sql == '"patient_id" = ?' and params == ["p1"]
+
+
+def test_translate_type_mismatch_falls_back():
+    # A string can't be compared with the epoch-ms column - Python decides (no match)
+    _, _, complete = translate({"timestamp": {"$gte": "2026-01-01"}}, COLUMNS)
+    assert not complete
+
+
+def test_translate_in_with_null():
+    sql, params, complete = translate({"patient_id": {"$in": ["p1", None]}}, COLUMNS)
+    assert complete and "IS NULL" in sql and params == ["p1"]
+
+
+def test_order_by_only_on_columns():
+    assert order_by([("timestamp", -1), ("_id", -1)], COLUMNS) == \
+        ' ORDER BY "timestamp" DESC, "_id" DESC'
+    assert order_by([("steps", 1)], COLUMNS) is None
+
+
+async def test_unsupported_command_raises_query_error(tmp_path):
+    client = SQLiteClient(f"sqlite:///{tmp_path / 'command.db'}")
+    try:
+        assert await client.admin.command("ping") == {"ok": 1.0}
+        with pytest.raises(QueryError):
+            await client.admin.command("serverStatus")
+    finally:
+        client.close()
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+
+from domain.exceptions.custom_exceptions import SubscriberLaggingError
+from infrastructure.pubsub.broadcaster import OverflowPolicy, SubscriberQueue, VitalUpdate
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _update(patient_id: str, heart_rate: int) -> VitalUpdate:
+    return VitalUpdate(
+        patient_id=patient_id,
+        heart_rate=heart_rate,
+        oxygen_level=97,
+        body_temperature=36.6,
+        steps=0,
+        timestamp=T0,
+    )
+
+
+def _queue(policy: str, maxsize: int = 3, disconnect_after_drops: int = 0) -> SubscriberQueue:
+    return SubscriberQueue("vitals", maxsize, policy, disconnect_after_drops)
+
+
+def test_drop_oldest_keeps_the_newest():
+    queue = _queue(OverflowPolicy.DROP_OLDEST)
+    for i in range(5):
+        queue.put_nowait(i)
+    assert queue.drain() == [2, 3, 4]
+    assert queue.dropped == 2 and queue.max_lag == 3
+
+
+def test_drop_newest_keeps_the_oldest():
+    queue = _queue(OverflowPolicy.DROP_NEWEST)
+    for i in range(5):
+        queue.put_nowait(i)
+    assert queue.drain() == [0, 1, 2]
+    assert queue.dropped == 2
+
+
+def test_conflate_replaces_the_patients_queued_update_in_place():
+    queue = _queue(OverflowPolicy.CONFLATE)
+    for update in (_update("a", 60), _update("b", 61), _update("c", 62), _update("a", 99)):
+        queue.put_nowait(update)
+    assert [(u.patient_id, u.heart_rate) for u in queue.drain()] == [("a", 99), ("b", 61), ("c", 62)]
+    assert queue.conflated == 1 and queue.dropped == 0
+
+
+def test_conflate_without_a_queued_match_drops_oldest():
+    queue = _queue(OverflowPolicy.CONFLATE)
+    for update in (_update("a", 60), _update("b", 61), _update("c", 62), _update("d", 63)):
+        queue.put_nowait(update)
+    assert [u.patient_id for u in queue.drain()] == ["b", "c", "d"]
+    assert queue.dropped == 1
+
+
+def test_unbounded_never_drops():
+    queue = _queue(OverflowPolicy.DROP_NEWEST, maxsize=0)
+    for i in range(1000):
+        queue.put_nowait(i)
+    assert queue.lag == 1000 and queue.dropped == 0
+
+
+async def test_lagging_subscriber_is_disconnected():
+    queue = _queue(OverflowPolicy.DROP_OLDEST, maxsize=2, disconnect_after_drops=3)
+    for i in range(5):
+        queue.put_nowait(i)
+    assert queue.closed
+    queue.put_nowait(5)  # ignored once closed
+    with pytest.raises(SubscriberLaggingError):
+        await queue.get()
+    with pytest.raises(SubscriberLaggingError):
+        queue.drain()
+
+
+async def test_catching_up_resets_the_drop_budget():
+    queue = _queue(OverflowPolicy.DROP_NEWEST, maxsize=1, disconnect_after_drops=2)
+    queue.put_nowait(0)
+    queue.put_nowait(1)       # drop 1
+    assert await queue.get() == 0  # queue empty -> caught up
+    queue.put_nowait(2)
+    queue.put_nowait(3)       # drop 1 again, not 2
+    assert not queue.closed
+    assert queue.delivered == 1
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        _queue("drop-oldest")
+
+
+def test_misspelled_policy_setting_fails_validation(monkeypatch):
+    from pydantic import ValidationError
+
+    from config.settings import Settings
+
+    monkeypatch.setenv("BROADCASTER_OVERFLOW_POLICY", "drop-oldest")
+    with pytest.raises(ValidationError):
+        Settings()
+    monkeypatch.setenv("BROADCASTER_OVERFLOW_POLICY", "drop_newest")
+    assert Settings().broadcaster_overflow_policy == OverflowPolicy.DROP_NEWEST